@@ -0,0 +1,301 @@
+import os
+import json
+import time
+import asyncio
+from urllib.parse import parse_qs
+from http.cookies import SimpleCookie
+
+from asgiref.wsgi import WsgiToAsgi
+
+from app import app
+import routes
+import metrics
+import rate_limit
+import live_prices
+from genai import analyze_stocks_async, get_system_prompt
+from prompt_builder import build_prompt
+from reply_cache import reply_cache
+
+# ─────────────────────────────────────────────
+#  ASGI ENTRYPOINT
+#  /chat and /chat/stream run natively on the event
+#  loop (async Groq client, executor-backed data
+#  fetches), so a worker isn't pinned while it waits
+#  on the network. Every other route is the normal
+#  Flask app, adapted through WsgiToAsgi.
+#
+#  Run with:  uvicorn asgi:application --workers 4
+# ─────────────────────────────────────────────
+_async_client = None
+
+
+def async_groq_client():
+    # Built on first use, like routes.groq_client(); only the event loop thread calls this
+    global _async_client
+    if _async_client is None:
+        from groq import AsyncGroq
+        _async_client = AsyncGroq(api_key=os.getenv("GROQ_API_KEY"))
+    return _async_client
+
+
+flask_app = WsgiToAsgi(app)
+
+
+def session_id(scope) -> str:
+    """Read session_id out of Flask's signed session cookie."""
+    cookie_name = app.config["SESSION_COOKIE_NAME"]
+    for name, value in scope["headers"]:
+        if name != b"cookie":
+            continue
+        morsel = SimpleCookie(value.decode("latin-1")).get(cookie_name)
+        if morsel is None:
+            continue
+        serializer = app.session_interface.get_signing_serializer(app)
+        try:
+            data = serializer.loads(morsel.value, max_age=int(app.permanent_session_lifetime.total_seconds()))
+        except Exception:
+            break
+        return data.get("session_id", "default")
+    return "default"
+
+
+async def read_json(receive) -> dict:
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            break
+    try:
+        data = json.loads(body or b"{}")
+    except ValueError:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+async def send_json(send, payload: dict, status: int = 200, timings: list | None = None) -> None:
+    body = json.dumps(payload).encode()
+    headers = [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+    if timings and metrics.ENABLED:
+        headers.append((b"server-timing", metrics.server_timing(timings).encode()))
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": headers,
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def build_stock_context_async(user_msg: str) -> tuple[str, dict]:
+    stock_names = routes.extract_stock_names(user_msg)
+    if not stock_names:
+        return "", {}
+    try:
+        return routes.analyses_to_context(await analyze_stocks_async(stock_names))
+    except Exception as e:
+        return f"STOCK DATA ERROR: {str(e)}", {}
+
+
+# ─────────────────────────────────────────────
+#  ASYNC ROUTES
+# ─────────────────────────────────────────────
+async def chat(scope, receive, send):
+    data = await read_json(receive)
+    user_msg = str(data.get("message", "")).strip()
+    if not user_msg:
+        return await send_json(send, {"reply": "Please type your query."})
+
+    timings = metrics.begin_request()
+    sid = session_id(scope)
+    # The conversation store may be SQLite: its reads and writes go to a thread
+    history = await asyncio.to_thread(routes.get_history, sid)
+    with metrics.stage("analysis"):
+        stock_context, stock_meta = await build_stock_context_async(user_msg)
+    cache_key = reply_cache.key_for(user_msg, stock_meta, history)
+    cached = reply_cache.get(cache_key) if cache_key else None
+    # A reply conditioned on this session's earlier turns must not reach other sessions
+    shareable = cache_key is not None and not history
+    await asyncio.to_thread(routes.append_history, sid, history, {"role": "user", "content": user_msg})
+    if cached:
+        await asyncio.to_thread(routes.append_history, sid, history, {"role": "assistant", "content": cached})
+        return await send_json(send, {"reply": cached, "stock_meta": stock_meta, "cached": True}, timings=timings)
+
+    with metrics.stage("prompt"):
+        messages, prompt_stats = build_prompt(get_system_prompt(stock_context), history)
+    app.logger.info("prompt size for %s: %s", sid, prompt_stats)
+    try:
+        with metrics.stage("llm"), metrics.IN_FLIGHT.track("llm"):
+            response = await rate_limit.call_async(
+                "groq",
+                async_groq_client().chat.completions.create,
+                model=routes.LLM_MODEL,
+                messages=messages,
+                max_tokens=routes.LLM_MAX_TOKENS,
+            )
+        reply = response.choices[0].message.content
+    except Exception as e:
+        metrics.UPSTREAM_ERRORS.inc("groq")
+        app.logger.exception("LLM call failed for %s", sid)
+        return await send_json(send, {"reply": routes.llm_error_reply(e)}, timings=timings)
+
+    if shareable:
+        reply_cache.put(cache_key, reply)
+    await asyncio.to_thread(routes.append_history, sid, history, {"role": "assistant", "content": reply})
+    await send_json(send, {"reply": reply, "stock_meta": stock_meta, "prompt_stats": prompt_stats}, timings=timings)
+
+
+async def chat_stream(scope, receive, send):
+    data = await read_json(receive)
+    user_msg = str(data.get("message", "")).strip()
+
+    await send({
+        "type": "http.response.start",
+        "status": 200,
+        "headers": [
+            (b"content-type", b"text/event-stream; charset=utf-8"),
+            (b"cache-control", b"no-cache"),
+            (b"x-accel-buffering", b"no"),
+        ],
+    })
+
+    async def emit(event: str, payload) -> None:
+        await send({"type": "http.response.body", "body": routes.sse_event(event, payload).encode(), "more_body": True})
+
+    if not user_msg:
+        await emit("token", {"text": "Please type your query."})
+        await emit("done", {})
+        return await send({"type": "http.response.body", "body": b""})
+
+    timings = metrics.begin_request()
+    sid = session_id(scope)
+    history = await asyncio.to_thread(routes.get_history, sid)
+    with metrics.stage("analysis"):
+        stock_context, stock_meta = await build_stock_context_async(user_msg)
+    await emit("stock_meta", stock_meta)
+
+    cache_key = reply_cache.key_for(user_msg, stock_meta, history)
+    cached = reply_cache.get(cache_key) if cache_key else None
+    # A reply conditioned on this session's earlier turns must not reach other sessions
+    shareable = cache_key is not None and not history
+    await asyncio.to_thread(routes.append_history, sid, history, {"role": "user", "content": user_msg})
+    if cached:
+        await asyncio.to_thread(routes.append_history, sid, history, {"role": "assistant", "content": cached})
+        await emit("token", {"text": cached})
+        await emit("done", {"cached": True})
+        return await send({"type": "http.response.body", "body": b""})
+
+    with metrics.stage("prompt"):
+        messages, prompt_stats = build_prompt(get_system_prompt(stock_context), history)
+    app.logger.info("prompt size for %s: %s", sid, prompt_stats)
+    parts = []
+    try:
+        with metrics.stage("llm"), metrics.IN_FLIGHT.track("llm"):
+            stream = await rate_limit.call_async(
+                "groq",
+                async_groq_client().chat.completions.create,
+                model=routes.LLM_MODEL,
+                messages=messages,
+                max_tokens=routes.LLM_MAX_TOKENS,
+                stream=True,
+            )
+            async for chunk in stream:
+                text = chunk.choices[0].delta.content if chunk.choices else None
+                if text:
+                    parts.append(text)
+                    await emit("token", {"text": text})
+    except Exception as e:
+        metrics.UPSTREAM_ERRORS.inc("groq")
+        app.logger.exception("LLM stream failed for %s", sid)
+        await emit("error", {"text": routes.llm_error_reply(e)})
+    else:
+        reply = "".join(parts)
+        if shareable:
+            reply_cache.put(cache_key, reply)
+        await asyncio.to_thread(routes.append_history, sid, history, {"role": "assistant", "content": reply})
+        await emit("done", {"prompt_stats": prompt_stats, "server_timing": metrics.server_timing(timings)})
+    await send({"type": "http.response.body", "body": b""})
+
+
+async def wait_for_disconnect(receive) -> None:
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+
+async def live(scope, receive, send):
+    """SSE quote deltas for ?tickers=A,B; an idle stream is one queue and one parked task."""
+    query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+    tickers = live_prices.parse_tickers(query.get("tickers", [""])[0])
+    if not tickers:
+        return await send_json(send, {"error": "tickers is required"}, status=400)
+
+    loop = asyncio.get_running_loop()
+    events = asyncio.Queue(maxsize=live_prices.QUEUE_SIZE)
+    sub = live_prices.hub.subscribe(
+        tickers, lambda event, data: loop.call_soon_threadsafe(live_prices.offer, events, (event, data))
+    )
+    disconnected = asyncio.ensure_future(wait_for_disconnect(receive))
+    try:
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"text/event-stream; charset=utf-8"),
+                (b"cache-control", b"no-cache"),
+                (b"x-accel-buffering", b"no"),
+            ],
+        })
+        while not disconnected.done():
+            next_event = asyncio.ensure_future(events.get())
+            await asyncio.wait({next_event, disconnected}, timeout=live_prices.KEEPALIVE_SEC,
+                               return_when=asyncio.FIRST_COMPLETED)
+            if next_event.done():
+                body = routes.sse_event(*next_event.result())
+            else:
+                next_event.cancel()
+                if disconnected.done():
+                    break
+                body = ": keepalive\n\n"
+            await send({"type": "http.response.body", "body": body.encode(), "more_body": True})
+    except OSError:
+        pass
+    finally:
+        sub.close()
+        disconnected.cancel()
+
+
+ASYNC_ROUTES = {
+    ("POST", "/chat"): chat,
+    ("POST", "/chat/stream"): chat_stream,
+}
+# Long-lived streams: not timed as requests (they'd swamp the latency histogram)
+STREAM_ROUTES = {
+    ("GET", "/live"): live,
+}
+
+
+async def application(scope, receive, send):
+    if scope["type"] == "lifespan":
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                routes.start_background()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    # Servers without lifespan events start this worker's threads on its first request
+    routes.start_background()
+    route = (scope.get("method"), scope.get("path"))
+    if scope["type"] == "http" and route in STREAM_ROUTES:
+        return await STREAM_ROUTES[route](scope, receive, send)
+    handler = ASYNC_ROUTES.get(route)
+    if scope["type"] == "http" and handler:
+        endpoint = handler.__name__
+        started = time.perf_counter()
+        try:
+            with metrics.IN_FLIGHT.track(endpoint):
+                return await handler(scope, receive, send)
+        finally:
+            metrics.REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint)
+    await flask_app(scope, receive, send)
@@ -0,0 +1,273 @@
+import os
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from indicators import compute_indicator_series
+
+# ─────────────────────────────────────────────
+#  VECTORIZED SIGNAL BACKTEST
+#  Replays the predict_signal rules on every bar of a
+#  ticker's stored history at once: each rule is a
+#  boolean array, the score is their sum, and the
+#  buckets / claimed confidences follow from the score.
+#  Every bar past the warm-up opens a long trade at its
+#  close with the same 12% target / 7% stop; exits are
+#  found on a (bars x horizon) window of forward closes,
+#  so there is no per-bar Python loop anywhere.
+#
+#    python backtest.py                      (price store)
+#    python backtest.py --source data/bars.db --horizon 90
+# ─────────────────────────────────────────────
+SIGNALS = ("STRONG SELL", "SELL", "HOLD", "BUY", "STRONG BUY")
+# Score cut-offs between consecutive SIGNALS, as in predict_signal
+SCORE_BINS = np.array([-5, -2, 3, 6])
+TARGET_PCT = 0.12
+STOP_PCT = 0.07
+# Trading days a trade is held before it is closed at market
+DEFAULT_HORIZON = 60
+# Bars skipped at the start so MA200 is a real 200-day average
+WARMUP = 200
+
+# Decimals indicators_at() rounds to; the rules compare the rounded values
+_ROUNDING = {
+    "close": 2, "ma20": 2, "ma50": 2, "ma200": 2, "rsi": 2, "macd": 4,
+    "bb_upper": 2, "bb_lower": 2, "momentum_30d": 2, "trend_slope": 4,
+}
+
+
+def signal_scores(close: np.ndarray) -> np.ndarray:
+    """predict_signal's score for every bar, rule for rule."""
+    s = {k: np.round(v, _ROUNDING[k]) for k, v in compute_indicator_series(close).items() if k in _ROUNDING}
+    cp, rsi, mom = s["close"], s["rsi"], s["momentum_30d"]
+
+    score = np.where(cp > s["ma20"], 1, -1)
+    score += np.where(s["ma20"] > s["ma50"], 1, -1)
+    score += np.where(cp > s["ma200"], 2, -2)
+    score += np.select([rsi < 30, rsi > 70, (rsi >= 40) & (rsi <= 60)], [2, -2, 1], 0)
+    score += np.where(s["macd"] > 0, 1, -1)
+    score += np.select([cp < s["bb_lower"], cp > s["bb_upper"]], [1, -1], 0)
+    score += np.select([mom > 10, mom < -10], [1, -1], 0)
+    score += np.where(s["trend_slope"] > 0, 1, -1)
+    return score
+
+
+def claimed_confidence(score: np.ndarray, bucket: np.ndarray) -> np.ndarray:
+    """The confidence predict_signal attaches to each score."""
+    mag = np.abs(score)
+    return np.choose(bucket, [
+        np.minimum(95, 70 + mag * 2),
+        np.minimum(80, 55 + mag * 3),
+        np.full_like(score, 50),
+        np.minimum(80, 55 + mag * 3),
+        np.minimum(95, 70 + mag * 2),
+    ])
+
+
+def simulate_exits(close: np.ndarray, horizon: int = DEFAULT_HORIZON,
+                   target: float = TARGET_PCT, stop: float = STOP_PCT) -> dict[str, np.ndarray]:
+    """
+    Long trade from every bar's close. Exit on the first later close at or past
+    the target or stop, else at the close `horizon` bars on. Bars whose trade is
+    still open when the data ends get outcome -1.
+    Outcomes: 0 target, 1 stop, 2 time exit.
+    """
+    n = len(close)
+    padded = np.concatenate((close, np.full(horizon, np.nan)))
+    # ratio[i, k] = close[i + 1 + k] / close[i]
+    ratio = sliding_window_view(padded[1:], horizon)[:n] / close[:, None]
+
+    hit_target = ratio >= 1 + target
+    hit_stop = ratio <= 1 - stop
+    hit = hit_target | hit_stop
+    exited = hit.any(axis=1)
+    full = np.arange(n) + horizon < n
+    exit_at = np.where(exited, hit.argmax(axis=1), horizon - 1)
+
+    rows = np.arange(n)
+    outcome = np.where(exited, np.where(hit_target[rows, exit_at], 0, 1), np.where(full, 2, -1))
+    ret = ratio[rows, exit_at] - 1
+
+    # Worst close while the trade was open, relative to entry (closes only)
+    held = np.arange(horizon) <= exit_at[:, None]
+    drawdown = np.minimum(np.nanmin(np.where(held, ratio, np.inf), axis=1) - 1, 0.0)
+    return {"outcome": outcome, "return": ret, "bars": exit_at + 1, "drawdown": drawdown}
+
+
+def backtest_close(close: np.ndarray, horizon: int = DEFAULT_HORIZON) -> dict[str, np.ndarray]:
+    """Per-bucket sums for one ticker; merge with merge_stats, finish with summarize."""
+    close = np.ascontiguousarray(close, dtype=np.float64)
+    k = len(SIGNALS)
+    if len(close) <= WARMUP + 1:
+        return empty_stats()
+
+    score = signal_scores(close)
+    bucket = np.digitize(score, SCORE_BINS)
+    confidence = claimed_confidence(score, bucket)
+    trades = simulate_exits(close, horizon)
+
+    keep = (np.arange(len(close)) >= WARMUP) & (trades["outcome"] >= 0)
+    b = bucket[keep]
+    outcome = trades["outcome"][keep]
+    ret = trades["return"][keep]
+    dd = trades["drawdown"][keep]
+
+    worst = np.zeros(k)
+    np.minimum.at(worst, b, dd)
+    return {
+        "trades": np.bincount(b, minlength=k),
+        "targets": np.bincount(b, weights=outcome == 0, minlength=k),
+        "stops": np.bincount(b, weights=outcome == 1, minlength=k),
+        "return_sum": np.bincount(b, weights=ret, minlength=k),
+        "wins": np.bincount(b, weights=ret > 0, minlength=k),
+        "bars_sum": np.bincount(b, weights=trades["bars"][keep], minlength=k),
+        "drawdown_sum": np.bincount(b, weights=dd, minlength=k),
+        "drawdown_worst": worst,
+        "confidence_sum": np.bincount(b, weights=confidence[keep], minlength=k),
+    }
+
+
+def empty_stats() -> dict[str, np.ndarray]:
+    k = len(SIGNALS)
+    return {name: np.zeros(k) for name in (
+        "trades", "targets", "stops", "return_sum", "wins", "bars_sum",
+        "drawdown_sum", "drawdown_worst", "confidence_sum",
+    )}
+
+
+def merge_stats(a: dict, b: dict) -> dict:
+    return {
+        name: np.minimum(a[name], b[name]) if name == "drawdown_worst" else a[name] + b[name]
+        for name in a
+    }
+
+
+def summarize(stats: dict) -> dict:
+    out = {}
+    for i, signal in enumerate(SIGNALS):
+        n = int(stats["trades"][i])
+        if not n:
+            out[signal] = {"trades": 0}
+            continue
+        out[signal] = {
+            "trades": n,
+            "hit_rate": round(100 * stats["targets"][i] / n, 1),
+            "stop_rate": round(100 * stats["stops"][i] / n, 1),
+            "win_rate": round(100 * stats["wins"][i] / n, 1),
+            "avg_return": round(100 * stats["return_sum"][i] / n, 2),
+            "avg_bars_held": round(stats["bars_sum"][i] / n, 1),
+            "avg_drawdown": round(100 * stats["drawdown_sum"][i] / n, 2),
+            "max_drawdown": round(100 * float(stats["drawdown_worst"][i]), 2),
+            "claimed_confidence": round(stats["confidence_sum"][i] / n, 1),
+        }
+    return out
+
+
+# ─────────────────────────────────────────────
+#  UNIVERSE RUN
+#  Workers load their own tickers (memory-mapped from
+#  the price store, or from a local market-data
+#  export), so only the small per-bucket sums cross
+#  the process boundary.
+# ─────────────────────────────────────────────
+def _load_close(ticker: str, provider) -> np.ndarray | None:
+    if provider is not None:
+        df = provider.history(ticker, period="max")
+        return df["Close"].to_numpy(dtype=np.float64) if not df.empty else None
+    import history_store
+    series = history_store.load_series(ticker)
+    return series.close if series is not None else None
+
+
+def _backtest_chunk(tickers: list[str], source: str | None, horizon: int) -> tuple[dict, list[str], int]:
+    provider = None
+    if source:
+        import market_data
+        provider = market_data.open_local(source)
+    stats, missing, bars = empty_stats(), [], 0
+    for ticker in tickers:
+        close = _load_close(ticker, provider)
+        if close is None or len(close) <= WARMUP + 1:
+            missing.append(ticker)
+            continue
+        bars += len(close)
+        stats = merge_stats(stats, backtest_close(close, horizon))
+    return stats, missing, bars
+
+
+def backtest_universe(tickers: list[str], source: str | None = None,
+                      horizon: int = DEFAULT_HORIZON, workers: int | None = None) -> dict:
+    """
+    Backtest every ticker from local data only: the price store by default, or
+    a directory / .db written by `market_data.py load` when `source` is given.
+    """
+    tickers = list(dict.fromkeys(tickers))
+    workers = max(1, min(workers or os.cpu_count() or 2, len(tickers)))
+    size = max(1, -(-len(tickers) // (workers * 4)))
+    chunks = [tickers[i:i + size] for i in range(0, len(tickers), size)]
+
+    started = time.perf_counter()
+    if workers == 1:
+        parts = [_backtest_chunk(chunk, source, horizon) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_backtest_chunk, chunks, [source] * len(chunks), [horizon] * len(chunks)))
+
+    stats, missing, bars = empty_stats(), [], 0
+    for part_stats, part_missing, part_bars in parts:
+        stats = merge_stats(stats, part_stats)
+        missing += part_missing
+        bars += part_bars
+    return {
+        "horizon": horizon,
+        "target_pct": round(TARGET_PCT * 100, 2),
+        "stop_pct": round(STOP_PCT * 100, 2),
+        "tickers": len(tickers) - len(missing),
+        "bars": bars,
+        "seconds": round(time.perf_counter() - started, 3),
+        "buckets": summarize(stats),
+        "missing": missing,
+    }
+
+
+def _print_table(result: dict) -> None:
+    print(f"{result['tickers']} tickers, {result['bars']} bars, horizon {result['horizon']} "
+          f"(+{result['target_pct']:g}% / -{result['stop_pct']:g}%) in {result['seconds']}s")
+    print(f"{'signal':<12}{'trades':>8}{'hit%':>7}{'stop%':>7}{'win%':>7}{'avg ret%':>10}"
+          f"{'avg dd%':>9}{'max dd%':>9}{'bars':>7}{'claimed':>9}")
+    for signal, row in result["buckets"].items():
+        if not row["trades"]:
+            print(f"{signal:<12}{0:>8}")
+            continue
+        print(f"{signal:<12}{row['trades']:>8}{row['hit_rate']:>7}{row['stop_rate']:>7}{row['win_rate']:>7}"
+              f"{row['avg_return']:>10}{row['avg_drawdown']:>9}{row['max_drawdown']:>9}"
+              f"{row['avg_bars_held']:>7}{row['claimed_confidence']:>9}")
+    if result["missing"]:
+        print("no local history: " + ", ".join(result["missing"]), file=sys.stderr)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Backtest the predict_signal rules on local history")
+    parser.add_argument("--tickers", help="comma list or file, one per line (default: built-in universe)")
+    parser.add_argument("--source", help="directory (CSV/Parquet) or .db file from `market_data.py load`")
+    parser.add_argument("--horizon", type=int, default=DEFAULT_HORIZON, help="max trading days per trade")
+    parser.add_argument("--workers", type=int, help="processes (default: one per CPU)")
+    parser.add_argument("--json", action="store_true", help="print the result as JSON")
+    args = parser.parse_args()
+
+    from market_data import _read_tickers
+    result = backtest_universe(_read_tickers(args.tickers), args.source, args.horizon, args.workers)
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        _print_table(result)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
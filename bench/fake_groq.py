@@ -0,0 +1,86 @@
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# ─────────────────────────────────────────────
+#  FAKE GROQ SERVER
+#  Speaks just enough of the OpenAI-compatible
+#  /openai/v1/chat/completions API (plain and
+#  streamed) for the Groq SDK, with a configurable
+#  time-to-first-token and per-token delay.
+#  Point the app at it with GROQ_BASE_URL.
+# ─────────────────────────────────────────────
+CANNED_REPLY = (
+    "Based on the technical data, the stock is **technically positioned** for a HOLD. "
+    "Momentum indicators are mixed and the price sits between support and the resistance zone. "
+    "Please note this is for informational purposes only and not advice from a SEBI-registered "
+    "Investment Advisor or SEC-registered broker."
+)
+
+
+class FakeGroqServer:
+    def __init__(self, first_token_latency: float = 0.3, token_latency: float = 0.005, port: int = 0):
+        self.first_token_latency = first_token_latency
+        self.token_latency = token_latency
+        self.requests = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                server.requests += 1
+                words = CANNED_REPLY.split(" ")
+                time.sleep(server.first_token_latency)
+                if body.get("stream"):
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/event-stream")
+                    self.send_header("Connection", "close")
+                    self.end_headers()
+                    for i, word in enumerate(words):
+                        chunk = {
+                            "id": "bench", "object": "chat.completion.chunk", "created": int(time.time()),
+                            "model": body.get("model"),
+                            "choices": [{"index": 0, "delta": {"content": word + (" " if i < len(words) - 1 else "")},
+                                         "finish_reason": None}],
+                        }
+                        self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                        self.wfile.flush()
+                        time.sleep(server.token_latency)
+                    self.wfile.write(b"data: [DONE]\n\n")
+                    self.close_connection = True
+                    return
+
+                time.sleep(server.token_latency * len(words))
+                payload = json.dumps({
+                    "id": "bench", "object": "chat.completion", "created": int(time.time()),
+                    "model": body.get("model"),
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant", "content": CANNED_REPLY}}],
+                    "usage": {"prompt_tokens": 0, "completion_tokens": len(words), "total_tokens": len(words)},
+                }).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.httpd.daemon_threads = True
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeGroqServer":
+        threading.Thread(target=self.httpd.serve_forever, name="fake-groq", daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
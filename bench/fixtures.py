@@ -0,0 +1,155 @@
+import os
+import sys
+import json
+import argparse
+import datetime as dt
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+# ─────────────────────────────────────────────
+#  RECORDED MARKET FIXTURES
+#  History frames (one CSV per ticker) and .info
+#  dicts (info.json) for the built-in universe.
+#  install() swaps yfinance for a replay that reads
+#  them, so benchmarks never touch the network.
+#
+#    python -m bench.fixtures record      (needs network)
+#    python -m bench.fixtures synthesize  (deterministic, offline)
+# ─────────────────────────────────────────────
+DEFAULT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+HISTORY_PERIOD = "2y"
+COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+
+def universe() -> list[str]:
+    from genai import INDIAN_STOCKS, US_STOCKS
+    return list(dict.fromkeys([*INDIAN_STOCKS.values(), *US_STOCKS.values()]))
+
+
+def record(out_dir: str, tickers: list[str]) -> None:
+    os.makedirs(out_dir, exist_ok=True)
+    infos = {}
+    for ticker in tickers:
+        stock = yf.Ticker(ticker)
+        df = stock.history(period=HISTORY_PERIOD)
+        if df.empty:
+            print(f"skip {ticker}: no history", file=sys.stderr)
+            continue
+        df.index = df.index.tz_localize(None).normalize()
+        df[COLUMNS].to_csv(os.path.join(out_dir, f"{ticker}.csv"), index_label="Date")
+        infos[ticker] = {k: v for k, v in stock.info.items() if isinstance(v, (str, int, float, bool))}
+        print(f"recorded {ticker}: {len(df)} bars")
+    with open(os.path.join(out_dir, "info.json"), "w") as f:
+        json.dump(infos, f)
+
+
+def synthesize(out_dir: str, tickers: list[str], bars: int = 504, seed: int = 7) -> None:
+    """Geometric random walks with realistic-ish volume, stable across runs."""
+    os.makedirs(out_dir, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    idx = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=bars, name="Date")
+    infos = {}
+    for ticker in tickers:
+        start = rng.uniform(20, 3000)
+        close = start * np.exp(np.cumsum(rng.normal(0.0003, 0.018, bars)))
+        spread = np.abs(rng.normal(0, 0.01, bars))
+        df = pd.DataFrame({
+            "Open": close * (1 + rng.normal(0, 0.005, bars)),
+            "High": close * (1 + spread),
+            "Low": close * (1 - spread),
+            "Close": close,
+            "Volume": rng.integers(100_000, 5_000_000, bars).astype(float),
+        }, index=idx)
+        df.round(4).to_csv(os.path.join(out_dir, f"{ticker}.csv"))
+        infos[ticker] = {
+            "longName": ticker.split(".")[0].title() + " Ltd",
+            "sector": "Synthetic",
+            "marketCap": int(close[-1] * 1e9),
+            "trailingPE": round(float(rng.uniform(8, 60)), 2),
+            "fiftyTwoWeekHigh": round(float(close[-252:].max()), 2),
+            "fiftyTwoWeekLow": round(float(close[-252:].min()), 2),
+            "currentPrice": round(float(close[-1]), 2),
+            "currency": "INR" if ticker.endswith(".NS") else "USD",
+        }
+    with open(os.path.join(out_dir, "info.json"), "w") as f:
+        json.dump(infos, f)
+
+
+# ─────────────────────────────────────────────
+#  REPLAY
+# ─────────────────────────────────────────────
+_frames: dict[str, pd.DataFrame] = {}
+_infos: dict[str, dict] = {}
+
+_PERIOD_DAYS = {"5d": 7, "1mo": 31, "3mo": 92, "6mo": 183, "1y": 366, "2y": 731, "5y": 1827, "10y": 3653}
+
+
+def load(fixture_dir: str) -> None:
+    """Read fixtures, shifting dates by whole weeks so the last bar is recent."""
+    _frames.clear()
+    _infos.clear()
+    today = dt.date.today()
+    for name in os.listdir(fixture_dir):
+        if not name.endswith(".csv"):
+            continue
+        df = pd.read_csv(os.path.join(fixture_dir, name), index_col="Date", parse_dates=True)
+        lag_weeks = (today - df.index[-1].date()).days // 7
+        df.index = df.index + pd.Timedelta(weeks=lag_weeks)
+        _frames[name[:-4]] = df
+    with open(os.path.join(fixture_dir, "info.json")) as f:
+        _infos.update(json.load(f))
+
+
+def _slice(ticker: str, period: str | None = None, start=None) -> pd.DataFrame:
+    df = _frames.get(ticker)
+    if df is None:
+        return pd.DataFrame(columns=COLUMNS)
+    if start is not None:
+        return df[df.index >= pd.Timestamp(start)]
+    days = _PERIOD_DAYS.get(period or "1mo")
+    if days is None:
+        return df
+    return df[df.index >= pd.Timestamp(dt.date.today() - dt.timedelta(days=days))]
+
+
+class ReplayTicker:
+    def __init__(self, ticker: str):
+        self.ticker = ticker
+
+    def history(self, period: str | None = None, start=None, **kwargs) -> pd.DataFrame:
+        return _slice(self.ticker, period, start).copy()
+
+    @property
+    def info(self) -> dict:
+        return dict(_infos.get(self.ticker, {}))
+
+
+def replay_download(tickers, period: str | None = None, start=None, **kwargs) -> pd.DataFrame:
+    if isinstance(tickers, str):
+        tickers = tickers.split()
+    frames = {t: _slice(t, period, start) for t in tickers if t in _frames}
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, axis=1)
+
+
+def install(fixture_dir: str = DEFAULT_DIR) -> None:
+    load(fixture_dir)
+    yf.Ticker = ReplayTicker
+    yf.download = replay_download
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Record or synthesize market fixtures for the benchmarks")
+    parser.add_argument("mode", choices=["record", "synthesize"])
+    parser.add_argument("--out", default=DEFAULT_DIR)
+    parser.add_argument("--tickers", help="comma-separated; defaults to the built-in universe")
+    args = parser.parse_args()
+    tickers = args.tickers.split(",") if args.tickers else universe()
+    (record if args.mode == "record" else synthesize)(args.out, tickers)
+
+
+if __name__ == "__main__":
+    main()
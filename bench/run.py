@@ -0,0 +1,210 @@
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import tempfile
+import threading
+import urllib.request
+from http.cookiejar import CookieJar
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from bench import fixtures
+from bench.fake_groq import FakeGroqServer
+
+# ─────────────────────────────────────────────
+#  OFFLINE BENCHMARK SUITE
+#  Replays recorded market fixtures, answers LLM
+#  calls from a local fake Groq server, then reports
+#  micro-benchmarks for the hot helpers and /chat
+#  latency percentiles + throughput per concurrency
+#  level. No network access is needed.
+#
+#    python -m bench.run
+#    python -m bench.run --json out.json
+#    python -m bench.run --baseline out.json   (exit 1 on regression)
+# ─────────────────────────────────────────────
+SAMPLE_MESSAGES = [
+    "Analyse TCS",
+    "What about Reliance?",
+    "Should I buy Nvidia?",
+    "Apple stock analysis",
+    "compare HDFC Bank vs ICICI Bank",
+    "Is it a good time to invest in tata motors",
+    "hello, how are you?",
+    "thoughts on the market today",
+]
+SAMPLE_NAMES = ["tcs", "reliance", "nvidia", "hdfc", "bank of america", "AAPL", "tata steel", "INFY.NS"]
+
+
+def _per_call_us(fn, args_list, repeat: int = 5, min_time: float = 0.2) -> float:
+    """Median over `repeat` rounds of the mean per-call time, in microseconds."""
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            for args in args_list:
+                fn(*args)
+        if time.perf_counter() - start >= min_time / repeat:
+            break
+        loops *= 2
+    rounds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(loops):
+            for args in args_list:
+                fn(*args)
+        rounds.append((time.perf_counter() - start) / (loops * len(args_list)))
+    return float(np.median(rounds) * 1e6)
+
+
+def micro_benchmarks() -> dict:
+    import genai
+    import routes
+
+    prices = genai.fetch_prices("TCS.NS")
+    indicators = genai.compute_technical_indicators(prices)
+    return {
+        "extract_stock_name_us": _per_call_us(routes.extract_stock_name, [(m,) for m in SAMPLE_MESSAGES]),
+        "resolve_ticker_us": _per_call_us(
+            lambda n: genai.resolve_ticker(n, probe=False), [(n,) for n in SAMPLE_NAMES]
+        ),
+        "compute_technical_indicators_us": _per_call_us(genai.compute_technical_indicators, [(prices,)]),
+        "predict_signal_us": _per_call_us(genai.predict_signal, [(indicators,)]),
+    }
+
+
+def _serve_app():
+    from werkzeug.serving import make_server
+    from app import app
+
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, name="bench-app", daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def _new_user(base_url: str):
+    opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(CookieJar()))
+    opener.open(base_url + "/").read()
+    return opener
+
+
+def _chat(opener, base_url: str, message: str) -> float:
+    req = urllib.request.Request(
+        base_url + "/chat",
+        data=json.dumps({"message": message}).encode(),
+        headers={"Content-Type": "application/json"},
+    )
+    start = time.perf_counter()
+    opener.open(req).read()
+    return time.perf_counter() - start
+
+
+def chat_benchmarks(base_url: str, levels: list[int], requests_per_level: int) -> dict:
+    results = {}
+
+    # Cold pass: every sample once with an empty store (first-user latency)
+    cold_user = _new_user(base_url)
+    cold = [_chat(cold_user, base_url, m) for m in SAMPLE_MESSAGES]
+    results["cold_p50_ms"] = float(np.percentile(cold, 50) * 1e3)
+
+    for level in levels:
+        users = [_new_user(base_url) for _ in range(level)]
+        jobs = [(users[i % level], SAMPLE_MESSAGES[i % len(SAMPLE_MESSAGES)]) for i in range(requests_per_level)]
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=level) as pool:
+            latencies = list(pool.map(lambda job: _chat(job[0], base_url, job[1]), jobs))
+        elapsed = time.perf_counter() - start
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1e3
+        results[f"c{level}"] = {
+            "p50_ms": float(p50),
+            "p95_ms": float(p95),
+            "p99_ms": float(p99),
+            "rps": requests_per_level / elapsed,
+        }
+    return results
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Latency metrics that got slower than baseline by more than `tolerance`."""
+    regressions = []
+
+    def walk(cur, base, path):
+        for key, value in cur.items():
+            if key not in base:
+                continue
+            if isinstance(value, dict):
+                walk(value, base[key], f"{path}{key}.")
+            elif key.endswith(("_us", "_ms")) and value > base[key] * (1 + tolerance):
+                regressions.append(f"{path}{key}: {base[key]:.1f} -> {value:.1f}")
+            elif key == "rps" and value < base[key] * (1 - tolerance):
+                regressions.append(f"{path}{key}: {base[key]:.1f} -> {value:.1f}")
+
+    walk(current, baseline, "")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Offline latency benchmarks for the ARIA app")
+    parser.add_argument("--fixtures", help="fixture directory (default: bench/fixtures, else synthesized)")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="fake Groq time to first token (s)")
+    parser.add_argument("--token-latency", type=float, default=0.002, help="fake Groq per-token delay (s)")
+    parser.add_argument("--concurrency", default="1,8,32")
+    parser.add_argument("--requests", type=int, default=200, help="/chat requests per concurrency level")
+    parser.add_argument("--reply-cache", action="store_true", help="leave the LLM reply cache enabled")
+    parser.add_argument("--json", help="write results here")
+    parser.add_argument("--baseline", help="compare against a previous --json file")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="aria-bench-")
+    fake_llm = FakeGroqServer(args.llm_latency, args.token_latency).start()
+    # Must be set before any app module is imported
+    os.environ.update({
+        "HISTORY_DB_PATH": os.path.join(workdir, "history.db"),
+        "CONVERSATION_STORE": "memory",
+        "GROQ_API_KEY": "bench",
+        "GROQ_BASE_URL": fake_llm.base_url,
+        # The fake LLM has no quota; keep the governor in the path but out of the numbers
+        "RATE_LIMIT_GROQ": "1000,1000",
+    })
+
+    fixture_dir = args.fixtures or fixtures.DEFAULT_DIR
+    if not os.path.isdir(fixture_dir):
+        fixture_dir = os.path.join(workdir, "fixtures")
+        fixtures.synthesize(fixture_dir, fixtures.universe())
+    fixtures.install(fixture_dir)
+
+    from reply_cache import reply_cache
+    if not args.reply_cache:
+        reply_cache.max_entries = 0
+
+    server, base_url = _serve_app()
+    results = {
+        "chat": chat_benchmarks(base_url, [int(c) for c in args.concurrency.split(",")], args.requests),
+        "micro": micro_benchmarks(),
+        "llm_requests": fake_llm.requests,
+    }
+    server.shutdown()
+    fake_llm.stop()
+
+    print(json.dumps(results, indent=2))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print("REGRESSION", line, file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
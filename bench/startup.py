@@ -0,0 +1,190 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import statistics
+import subprocess
+import urllib.error
+import urllib.request
+
+# ─────────────────────────────────────────────
+#  STARTUP BENCHMARK
+#  Boots fresh worker processes and times, from spawn:
+#    import_ms           `import app` on its own
+#    first_index_ms      until GET / answers
+#    first_analysis_ms   until the first /api/analysis
+#                        answer, on an empty store, with
+#                        and without a warm-start snapshot
+#  Market data is synthesized and read through the
+#  local provider, so the cold numbers exclude network
+#  time a real upstream fetch would add on top.
+#
+#    python -m bench.startup
+#    python -m bench.startup --runs 7 --json startup.json
+# ─────────────────────────────────────────────
+POPULAR = ["TCS.NS", "RELIANCE.NS", "AAPL", "NVDA"]
+HEAVY_MODULES = ("pandas", "yfinance", "groq")
+BOOT_TIMEOUT = 60.0
+
+
+def _child_env(workdir: str, fixture_dir: str, snapshot: str) -> dict:
+    env = dict(os.environ)
+    env.update({
+        "HISTORY_DB_PATH": os.path.join(workdir, "history.db"),
+        "MARKET_DATA_PROVIDER": "local",
+        "MARKET_DATA_PATH": fixture_dir,
+        "CONVERSATION_STORE": "memory",
+        "WARM_SNAPSHOT_PATH": snapshot,
+        "WARM_SNAPSHOT_INTERVAL_SEC": "0",
+        "PYTHONDONTWRITEBYTECODE": "1",
+    })
+    env.pop("GROQ_API_KEY", None)
+    return env
+
+
+def _spawn(mode: str, env: dict, cwd: str) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", "bench.startup", "--child", mode],
+        env=env, cwd=cwd, stdout=subprocess.PIPE, text=True,
+    )
+
+
+# ── child modes ──
+def _child_import() -> None:
+    started = time.perf_counter()
+    import app  # noqa: F401
+    elapsed = time.perf_counter() - started
+    print(json.dumps({"import_ms": elapsed * 1e3, "heavy_loaded": [m for m in HEAVY_MODULES if m in sys.modules]}))
+
+
+def _child_serve() -> None:
+    import logging
+    from werkzeug.serving import make_server
+    from app import app
+
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    print(server.server_port, flush=True)
+    server.serve_forever()
+
+
+def _child_seed() -> None:
+    """Warm a store the way a long-running host would, then snapshot it."""
+    import genai
+    import warm_start
+    from bench import fixtures
+
+    genai.analyze_batch(fixtures.universe())
+    print(warm_start.write())
+
+
+# ── parent ──
+def _get(url: str) -> tuple[int, bytes]:
+    try:
+        with urllib.request.urlopen(url, timeout=BOOT_TIMEOUT) as res:
+            return res.status, res.read()
+    except urllib.error.HTTPError as e:
+        return e.code, b""
+
+
+def _wait_for_index(proc: subprocess.Popen, started: float) -> tuple[str, float]:
+    port = proc.stdout.readline().strip()
+    if not port:
+        raise RuntimeError("server child exited before listening")
+    base = f"http://127.0.0.1:{port}"
+    while time.perf_counter() - started < BOOT_TIMEOUT:
+        try:
+            if _get(base + "/")[0] == 200:
+                return base, time.perf_counter() - started
+        except OSError:
+            time.sleep(0.005)
+    raise RuntimeError("server did not answer / in time")
+
+
+def measure_import(env: dict, cwd: str) -> dict:
+    proc = _spawn("import", env, cwd)
+    out, _ = proc.communicate(timeout=BOOT_TIMEOUT)
+    return json.loads(out)
+
+
+def measure_boot(env: dict, cwd: str) -> dict:
+    started = time.perf_counter()
+    proc = _spawn("serve", env, cwd)
+    try:
+        base, index_s = _wait_for_index(proc, started)
+        request_started = time.perf_counter()
+        status, _ = _get(f"{base}/api/analysis/{POPULAR[0]}")
+        first = time.perf_counter()
+        for ticker in POPULAR[1:]:
+            _get(f"{base}/api/analysis/{ticker}")
+        done = time.perf_counter()
+    finally:
+        proc.kill()
+        proc.wait()
+    return {
+        "first_index_ms": index_s * 1e3,
+        "first_analysis_ms": (first - started) * 1e3,
+        "first_analysis_request_ms": (first - request_started) * 1e3,
+        "popular_total_ms": (done - request_started) * 1e3,
+        "status": status,
+    }
+
+
+def _median(rows: list[dict]) -> dict:
+    return {
+        key: round(statistics.median(r[key] for r in rows), 1) if isinstance(rows[0][key], float) else rows[0][key]
+        for key in rows[0]
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Worker import / boot / first-answer timings")
+    parser.add_argument("--runs", type=int, default=5, help="fresh processes per scenario (median reported)")
+    parser.add_argument("--json", help="write results here")
+    parser.add_argument("--child", choices=["import", "serve", "seed"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        {"import": _child_import, "serve": _child_serve, "seed": _child_seed}[args.child]()
+        return 0
+
+    from bench import fixtures
+
+    cwd = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    workdir = tempfile.mkdtemp(prefix="aria-startup-")
+    fixture_dir = os.path.join(workdir, "market")
+    snapshot = os.path.join(workdir, "warm_snapshot.json.gz")
+    fixtures.synthesize(fixture_dir, fixtures.universe())
+
+    seed = subprocess.run(
+        [sys.executable, "-m", "bench.startup", "--child", "seed"],
+        env=_child_env(os.path.join(workdir, "seed"), fixture_dir, snapshot),
+        cwd=cwd, stdout=subprocess.PIPE, text=True, check=True,
+    )
+
+    def fresh_env(name: str, with_snapshot: bool) -> dict:
+        # A new host every run: empty store, optionally the snapshot
+        run_dir = tempfile.mkdtemp(prefix=name + "-", dir=workdir)
+        return _child_env(run_dir, fixture_dir, snapshot if with_snapshot else os.path.join(run_dir, "none.gz"))
+
+    results = {
+        "snapshot_tickers": int(seed.stdout.strip().splitlines()[-1]),
+        "snapshot_bytes": os.path.getsize(snapshot),
+        "import": _median([measure_import(fresh_env("import", False), cwd) for _ in range(args.runs)]),
+        "cold": _median([measure_boot(fresh_env("cold", False), cwd) for _ in range(args.runs)]),
+        "warm": _median([measure_boot(fresh_env("warm", True), cwd) for _ in range(args.runs)]),
+    }
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    print(json.dumps(results, indent=2))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
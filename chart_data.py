@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import gzip
+import json
+import hashlib
+import threading
+import datetime as dt
+from collections import OrderedDict
+
+from indicators import compute_indicator_series
+from price_store import PriceSeries
+from lazy_imports import lazy_import
+
+np = lazy_import("numpy", __name__, "np")
+
+# ─────────────────────────────────────────────
+#  CHART HISTORY PAYLOADS
+#  Price plus indicator overlays for a display range,
+#  downsampled with Largest-Triangle-Three-Buckets so
+#  a 5y chart costs the same on the wire as a 1m one.
+#  Encoded bodies are cached by ETag, so a second
+#  viewer of the same ticker/range is a dict lookup.
+# ─────────────────────────────────────────────
+# range -> (days shown, period fetched); the extra history, at least 200 trading
+# days (~290 calendar days), warms up MA200 so it is drawn from the first point
+RANGES = {
+    "1m": (31, "1y"),
+    "6m": (183, "2y"),
+    "1y": (366, "2y"),
+    "5y": (1827, "10y"),
+}
+DEFAULT_POINTS = 300
+MAX_POINTS = 2000
+OVERLAYS = ("ma20", "ma50", "ma200", "bb_upper", "bb_lower")
+
+_CACHE_SIZE = 512
+_body_cache: OrderedDict[str, bytes] = OrderedDict()
+_body_cache_lock = threading.Lock()
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Indices of the `threshold` points that best preserve the line's shape."""
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # Inner points split into threshold-2 buckets; first and last are always kept
+    edges = (np.arange(threshold - 1) * ((n - 2) / (threshold - 2))).astype(np.int64) + 1
+    edges[-1] = n - 1
+    # Mean of each bucket, used as the third triangle vertex for the bucket before it
+    x_mean = np.add.reduceat(x[1:n - 1], edges[:-1] - 1) / np.diff(edges)
+    y_mean = np.add.reduceat(y[1:n - 1], edges[:-1] - 1) / np.diff(edges)
+
+    picked = np.empty(threshold, dtype=np.int64)
+    picked[0], picked[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        if i + 1 < threshold - 2:
+            cx, cy = x_mean[i + 1], y_mean[i + 1]
+        else:
+            cx, cy = x[n - 1], y[n - 1]
+        ax, ay = x[a], y[a]
+        area = np.abs((ax - cx) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (cy - ay))
+        a = lo + int(np.argmax(area))
+        picked[i + 1] = a
+    return picked
+
+
+def etag_for(ticker: str, range_key: str, points: int, prices: PriceSeries) -> str:
+    """Identifies the payload without building it: same bars in, same body out."""
+    last = f"{int(prices.dates[-1])}:{float(prices.close[-1])!r}:{len(prices)}" if len(prices) else "empty"
+    raw = f"{ticker}|{range_key}|{points}|{last}"
+    return hashlib.blake2b(raw.encode(), digest_size=10).hexdigest()
+
+
+def _rounded(values: np.ndarray) -> list:
+    return [None if v != v else round(float(v), 2) for v in values]
+
+
+def build_payload(ticker: str, range_key: str, points: int, prices: PriceSeries, currency: str) -> dict:
+    days, _ = RANGES[range_key]
+    series = compute_indicator_series(prices.close)
+    start = (dt.date.fromordinal(int(prices.dates[-1])) - dt.timedelta(days=days)).toordinal()
+    first = int(np.searchsorted(prices.dates, start))
+
+    dates = prices.dates[first:]
+    close = prices.close[first:]
+    picked = lttb(dates, close, points)
+    return {
+        "ticker": ticker,
+        "range": range_key,
+        "currency": currency,
+        "total_points": len(close),
+        "dates": [dt.date.fromordinal(int(d)).isoformat() for d in dates[picked]],
+        "close": _rounded(close[picked]),
+        "overlays": {name: _rounded(series[name][first:][picked]) for name in OVERLAYS},
+    }
+
+
+def encoded_body(etag: str, build, gzipped: bool) -> bytes:
+    """
+    JSON body for `etag`, gzip-compressed if asked, built at most once while
+    cached. The caller's etag must already differ per encoding.
+    """
+    with _body_cache_lock:
+        body = _body_cache.get(etag)
+        if body is not None:
+            _body_cache.move_to_end(etag)
+            return body
+
+    body = json.dumps(build(), separators=(",", ":")).encode()
+    if gzipped:
+        body = gzip.compress(body, compresslevel=6)
+
+    with _body_cache_lock:
+        _body_cache[etag] = body
+        if len(_body_cache) > _CACHE_SIZE:
+            _body_cache.popitem(last=False)
+    return body
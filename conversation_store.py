@@ -0,0 +1,213 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# ─────────────────────────────────────────────
+#  CONVERSATION STORES
+#  Both backends cap messages per session and expire
+#  idle sessions. The in-process store is an LRU with
+#  a TTL; the SQLite store is shared by every worker
+#  on the host, so history survives a request landing
+#  on a different gunicorn worker.
+# ─────────────────────────────────────────────
+MAX_MESSAGES = int(os.getenv("CONVERSATION_MAX_MESSAGES", "40"))
+MAX_SESSIONS = int(os.getenv("CONVERSATION_MAX_SESSIONS", "10000"))
+SESSION_TTL = float(os.getenv("CONVERSATION_TTL_SEC", str(6 * 3600)))
+
+
+def _content_bytes(messages) -> int:
+    # UTF-8 size, the same measure as SQLite's LENGTH() over a BLOB
+    return sum(len(m["content"].encode()) for m in messages)
+
+
+class MemoryConversationStore:
+    def __init__(self, max_sessions: int = MAX_SESSIONS, ttl: float = SESSION_TTL,
+                 max_messages: int = MAX_MESSAGES):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.max_messages = max_messages
+        self._lock = threading.Lock()
+        # sid -> (last_access, messages); least recently used first
+        self._sessions: OrderedDict[str, tuple[float, list[dict]]] = OrderedDict()
+        self._bytes = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _drop(self, sid: str) -> None:
+        _, messages = self._sessions.pop(sid)
+        self._bytes -= _content_bytes(messages)
+
+    def _sweep(self, now: float) -> None:
+        # Idle sessions sit at the front of the LRU order
+        while self._sessions:
+            sid, (last, _) = next(iter(self._sessions.items()))
+            if now - last <= self.ttl:
+                break
+            self._drop(sid)
+            self.expirations += 1
+
+    def get(self, sid: str) -> list[dict]:
+        now = time.monotonic()
+        with self._lock:
+            self._sweep(now)
+            entry = self._sessions.get(sid)
+            if entry is None:
+                return []
+            self._sessions[sid] = (now, entry[1])
+            self._sessions.move_to_end(sid)
+            return list(entry[1])
+
+    def append(self, sid: str, *messages: dict) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._sweep(now)
+            _, history = self._sessions.pop(sid, (now, []))
+            history.extend(messages)
+            self._bytes += _content_bytes(messages)
+            overflow = len(history) - self.max_messages
+            if overflow > 0:
+                self._bytes -= _content_bytes(history[:overflow])
+                del history[:overflow]
+            self._sessions[sid] = (now, history)
+            while len(self._sessions) > self.max_sessions:
+                self._drop(next(iter(self._sessions)))
+                self.evictions += 1
+
+    def reset(self, sid: str) -> None:
+        with self._lock:
+            if sid in self._sessions:
+                self._drop(sid)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "backend": "memory",
+                "sessions": len(self._sessions),
+                "messages": sum(len(h) for _, h in self._sessions.values()),
+                "content_bytes": self._bytes,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+class SQLiteConversationStore:
+    # Expired / over-cap sessions are purged every this many writes
+    PURGE_EVERY = 200
+
+    def __init__(self, path: str, max_sessions: int = MAX_SESSIONS, ttl: float = SESSION_TTL,
+                 max_messages: int = MAX_MESSAGES):
+        self.path = path
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.max_messages = max_messages
+        self._local = threading.local()
+        self._writes = 0
+        self.evictions = 0
+        self.expirations = 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._conn() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                " sid TEXT PRIMARY KEY, last_access REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS messages ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " sid TEXT NOT NULL, role TEXT NOT NULL, content TEXT NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS messages_sid ON messages (sid, id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS sessions_access ON sessions (last_access)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, sid: str) -> list[dict]:
+        conn = self._conn()
+        row = conn.execute("SELECT last_access FROM sessions WHERE sid = ?", (sid,)).fetchone()
+        if row is None or time.time() - row[0] > self.ttl:
+            return []
+        with conn:
+            conn.execute("UPDATE sessions SET last_access = ? WHERE sid = ?", (time.time(), sid))
+        rows = conn.execute(
+            "SELECT role, content FROM messages WHERE sid = ? ORDER BY id", (sid,)
+        ).fetchall()
+        return [{"role": role, "content": content} for role, content in rows]
+
+    def append(self, sid: str, *messages: dict) -> None:
+        conn = self._conn()
+        now = time.time()
+        with conn:
+            row = conn.execute("SELECT last_access FROM sessions WHERE sid = ?", (sid,)).fetchone()
+            if row is not None and now - row[0] > self.ttl:
+                conn.execute("DELETE FROM messages WHERE sid = ?", (sid,))
+                self.expirations += 1
+            conn.execute("INSERT OR REPLACE INTO sessions VALUES (?, ?)", (sid, now))
+            conn.executemany(
+                "INSERT INTO messages (sid, role, content) VALUES (?, ?, ?)",
+                [(sid, m["role"], m["content"]) for m in messages],
+            )
+            conn.execute(
+                "DELETE FROM messages WHERE sid = ? AND id <= ("
+                " SELECT id FROM messages WHERE sid = ? ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                (sid, sid, self.max_messages),
+            )
+        self._writes += 1
+        if self._writes % self.PURGE_EVERY == 0:
+            self.purge()
+
+    def reset(self, sid: str) -> None:
+        with self._conn() as conn:
+            conn.execute("DELETE FROM messages WHERE sid = ?", (sid,))
+            conn.execute("DELETE FROM sessions WHERE sid = ?", (sid,))
+
+    def purge(self) -> None:
+        """Drop expired sessions, then the least recently used beyond max_sessions."""
+        conn = self._conn()
+        with conn:
+            expired = conn.execute(
+                "SELECT sid FROM sessions WHERE last_access < ?", (time.time() - self.ttl,)
+            ).fetchall()
+            excess = conn.execute(
+                "SELECT sid FROM sessions WHERE last_access >= ? ORDER BY last_access DESC LIMIT -1 OFFSET ?",
+                (time.time() - self.ttl, self.max_sessions),
+            ).fetchall()
+            doomed = [(sid,) for sid, in expired + excess]
+            conn.executemany("DELETE FROM messages WHERE sid = ?", doomed)
+            conn.executemany("DELETE FROM sessions WHERE sid = ?", doomed)
+        self.expirations += len(expired)
+        self.evictions += len(excess)
+
+    def stats(self) -> dict:
+        conn = self._conn()
+        sessions = conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+        messages, content = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(CAST(content AS BLOB))), 0) FROM messages"
+        ).fetchone()
+        return {
+            "backend": "sqlite",
+            "sessions": sessions,
+            "messages": messages,
+            "content_bytes": content,
+            # Counters are per worker process; the totals above are shared
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+def create_conversation_store():
+    backend = os.getenv("CONVERSATION_STORE", "memory").lower()
+    if backend == "sqlite":
+        path = os.getenv(
+            "CONVERSATION_DB_PATH",
+            os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "conversations.db"),
+        )
+        return SQLiteConversationStore(path)
+    return MemoryConversationStore()
@@ -1,10 +1,36 @@
-import yfinance as yf
-import numpy as np
-import pandas as pd
+from __future__ import annotations
+
+import asyncio
+import heapq
+import logging
+import multiprocessing
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from typing import TYPE_CHECKING
+
+import history_store
+import market_data
+import metrics
+import rate_limit
+import warm_start
+from lazy_imports import lazy_import
+from singleflight import SingleFlight
+from symbol_index import AliasIndex, NegativeCache, SymbolMaster, load_listings
+from indicators import compute_indicator_series, indicators_at
+from price_store import PriceSeries
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+np = lazy_import("numpy", __name__, "np")
 
 import warnings
 warnings.filterwarnings("ignore")
 
+log = logging.getLogger(__name__)
+
 # ─────────────────────────────────────────────
 #  SUPPORTED US STOCKS (NASDAQ / NYSE)
 # ─────────────────────────────────────────────
@@ -110,24 +136,179 @@ INDIAN_STOCKS = {
     "paytm": "PAYTM.NS",
 }
 
+# Built once at import: Indian aliases take precedence, as in the original lookup order
+ALIAS_INDEX = AliasIndex({**US_STOCKS, **INDIAN_STOCKS})
+KNOWN_TICKERS = set(INDIAN_STOCKS.values()) | set(US_STOCKS.values())
+
+# Raw symbols that already came back empty from the market data provider
+UNKNOWN_SYMBOLS = NegativeCache()
+
+# Exchange listing files (NSE / NASDAQ / NYSE) for names outside the built-in lists
+SYMBOL_MASTER_PATH = os.getenv("SYMBOL_MASTER_PATH") or os.path.join(
+    os.path.dirname(history_store.DB_PATH), "symbols"
+)
+# Fuzzy name matches below this Dice score, or not this far ahead of the runner-up, are no match
+SYMBOL_MATCH_MIN = float(os.getenv("SYMBOL_MATCH_MIN", "0.75"))
+SYMBOL_MATCH_MARGIN = float(os.getenv("SYMBOL_MATCH_MARGIN", "0.15"))
+# Fuzzy matching is for company names; longer phrases or chat words mean a sentence fragment
+SYMBOL_NAME_MAX_WORDS = 4
+CHAT_WORDS = {
+    "market", "markets", "today", "now", "stock", "stocks", "share", "shares", "price", "prices",
+    "buy", "sell", "hold", "invest", "investing", "investment", "good", "bad", "time", "what",
+    "how", "is", "are", "should", "i", "my", "me", "you", "your", "thoughts", "opinion", "news",
+    "about", "doing", "right", "think", "hello", "hi", "thanks", "please", "tell", "this", "that",
+}
+# Free text that could still be a symbol missing from the listing files (indices, ETFs, BSE)
+SYMBOL_LIKE = re.compile(r"\^?[A-Z0-9&\-]{1,12}(?:\.[A-Z]{1,3})?")
+
+_symbol_master: SymbolMaster | None = None
+_symbol_master_lock = threading.Lock()
+
+
+def symbol_master() -> SymbolMaster:
+    """Built once; an empty master when no listing files are configured or they fail to load."""
+    global _symbol_master
+    with _symbol_master_lock:
+        if _symbol_master is None:
+            try:
+                listings = load_listings(SYMBOL_MASTER_PATH) if os.path.exists(SYMBOL_MASTER_PATH) else []
+                _symbol_master = SymbolMaster(listings)
+            except Exception:
+                log.exception("symbol master build failed for %s", SYMBOL_MASTER_PATH)
+                _symbol_master = SymbolMaster([])
+        return _symbol_master
+
+
+def _name_shaped(text: str) -> bool:
+    words = text.split()
+    return 0 < len(words) <= SYMBOL_NAME_MAX_WORDS and not CHAT_WORDS.intersection(words)
+
+
+def start_symbol_master_build() -> None:
+    """Index the listings off the request path; the first lookup waits only if it isn't done yet.
+
+    Called by the serving process once it is running, not at import: a fork taken
+    while the build holds _symbol_master_lock would leave the child's copy locked.
+    """
+    if _symbol_master is None and os.path.exists(SYMBOL_MASTER_PATH):
+        threading.Thread(target=symbol_master, name="symbol-master", daemon=True).start()
+
 # ─────────────────────────────────────────────
 #  FETCH HISTORICAL DATA
 # ─────────────────────────────────────────────
+class UpstreamFailed(Exception):
+    """
+    The provider errored (throttled, network, 5xx) and the store had nothing
+    usable. Unlike an empty answer, this says nothing about whether the symbol exists.
+    """
+
+
 def fetch_stock_data(ticker: str, period: str = "1y") -> pd.DataFrame | None:
+    start = history_store.period_start(period)
+    try:
+        if start is None:
+            # Periods the store can't express ("max", "ytd", ...) go straight upstream
+            return _download_history(ticker, period=period)
+        _sync_history(ticker, period, start)
+
+        try:
+            df = history_store.load(ticker, start)
+        except Exception:
+            return _download_history(ticker, period=period)
+    except UpstreamFailed:
+        return None
+    if df is None or len(df) < 30:
+        return None
+    return df
+
+
+def fetch_prices(ticker: str, period: str = "1y") -> PriceSeries | None:
+    """Like fetch_stock_data, but close/volume views into the mapped price store."""
     try:
-        stock = yf.Ticker(ticker)
-        df = stock.history(period=period)
-        if df.empty or len(df) < 30:
-            return None
-        return df
+        return load_prices(ticker, period)
+    except UpstreamFailed:
+        return None
+
+
+def load_prices(ticker: str, period: str = "1y") -> PriceSeries | None:
+    """
+    fetch_prices, but an upstream error with nothing usable on disk raises
+    UpstreamFailed instead of returning None, which means "no such data".
+    """
+    start = history_store.period_start(period)
+    if start is None:
+        df = _download_history(ticker, period=period)
+        return PriceSeries.from_frame(df) if df is not None else None
+    synced = _sync_history(ticker, period, start)
+
+    try:
+        series = history_store.load_series(ticker, start)
     except Exception:
+        df = _download_history(ticker, period=period)
+        return PriceSeries.from_frame(df) if df is not None else None
+    if series is None or len(series) < 30:
+        if not synced:
+            raise UpstreamFailed(ticker)
         return None
+    return series
+
+
+def _sync_history(ticker: str, period: str, start) -> bool:
+    """Bring the stored bars up to date; False if the provider errored."""
+    provider = market_data.provider
+    try:
+        meta = history_store.get_meta(ticker)
+        if meta is None or meta[0] > start:
+            # Cold ticker, or the stored series doesn't reach back far enough
+            df = provider.history(ticker, period=period)
+            if not df.empty:
+                history_store.save(ticker, df, covered_from=start)
+        elif history_store.is_stale(ticker, meta[1]):
+            # Re-pull from the last stored bar so a partial intraday bar is overwritten
+            since = history_store.last_date(ticker)
+            df = provider.history(ticker, start=since)
+            if df.empty:
+                history_store.touch(ticker)
+            else:
+                history_store.save(ticker, df)
+    except Exception:
+        # Upstream hiccup: fall back to whatever is already on disk
+        metrics.UPSTREAM_ERRORS.inc(f"{provider.name}_history")
+        return False
+    return True
+
+
+def _download_history(ticker: str, period: str) -> pd.DataFrame | None:
+    try:
+        df = market_data.provider.history(ticker, period=period)
+    except Exception as e:
+        metrics.UPSTREAM_ERRORS.inc(f"{market_data.provider.name}_history")
+        raise UpstreamFailed(ticker) from e
+    if df.empty or len(df) < 30:
+        return None
+    return df
 
 
 def get_stock_info(ticker: str) -> dict:
     try:
-        stock = yf.Ticker(ticker)
-        info = stock.info
+        cached = history_store.load_info(ticker)
+    except Exception:
+        cached = None
+    metrics.cache_lookup("info", bool(cached))
+    if cached:
+        return cached
+    info = _download_info(ticker)
+    if info:
+        try:
+            history_store.save_warm("info", ticker, info)
+        except Exception:
+            pass
+    return info
+
+
+def _download_info(ticker: str) -> dict:
+    try:
+        info = market_data.provider.info(ticker)
         return {
             "name": info.get("longName", ticker),
             "sector": info.get("sector", "N/A"),
@@ -139,9 +320,105 @@ def get_stock_info(ticker: str) -> dict:
             "currency": info.get("currency", "USD"),
         }
     except Exception:
+        metrics.UPSTREAM_ERRORS.inc(f"{market_data.provider.name}_info")
         return {}
 
 
+def fetch_bulk_history(tickers: list[str], period: str = "1y",
+                       failed: set[str] | None = None) -> dict[str, PriceSeries]:
+    """
+    History for many tickers at once. Anything missing or stale in the local
+    store is pulled with (at most) two batched provider calls: one for cold
+    tickers over the full period, one incremental pull for stale ones.
+    Tickers left out because their pull errored are added to `failed`.
+    """
+    provider = market_data.provider
+    start = history_store.period_start(period)
+    cold, stale, since = [], [], None
+    for ticker in tickers:
+        meta = history_store.get_meta(ticker)
+        if meta is None or (start is not None and meta[0] > start):
+            cold.append(ticker)
+        elif history_store.is_stale(ticker, meta[1]):
+            stale.append(ticker)
+            last = history_store.last_date(ticker)
+            since = last if since is None or last < since else since
+
+    for batch, batch_start in ((cold, None), (stale, since)):
+        if not batch:
+            continue
+        try:
+            pulled = provider.history_many(batch, period, start=batch_start)
+        except Exception:
+            metrics.UPSTREAM_ERRORS.inc(f"{provider.name}_download")
+            if failed is not None:
+                failed.update(batch)
+            continue
+        for ticker, df in pulled.items():
+            history_store.save(ticker, df, covered_from=start if ticker in cold else None)
+
+    series = {}
+    for ticker in tickers:
+        prices = history_store.load_series(ticker, start)
+        if prices is not None and len(prices) >= 30:
+            series[ticker] = prices
+    return series
+
+
+# ─────────────────────────────────────────────
+#  PER-TICKER FETCH COORDINATOR
+#  History and .info are pulled in parallel, and
+#  concurrent requests for the same ticker join the
+#  call already in flight.
+# ─────────────────────────────────────────────
+_fetch_pool = ThreadPoolExecutor(max_workers=32, thread_name_prefix="yf-fetch")
+_inflight = SingleFlight()
+
+
+def _fetch_bundle(ticker: str, period: str) -> tuple[PriceSeries | None, dict]:
+    with metrics.IN_FLIGHT.track("fetch"):
+        info_future = _fetch_pool.submit(metrics.bind(metrics.timed), "info", get_stock_info, ticker)
+        try:
+            prices = metrics.timed("history", load_prices, ticker, period)
+        except UpstreamFailed:
+            info_future.cancel()
+            raise
+        if prices is None:
+            # Bad symbol or no data: don't wait on .info we won't use
+            info_future.cancel()
+            return None, {}
+        return prices, info_future.result()
+
+
+def fetch_bundle(ticker: str, period: str = "1y") -> tuple[PriceSeries | None, dict]:
+    return _inflight.do((ticker, period), _fetch_bundle, ticker, period)
+
+
+# asyncio counterpart: same fan-out, coalesced per event loop with shared tasks
+_async_inflight: dict[tuple, asyncio.Task] = {}
+
+
+async def _fetch_bundle_async(ticker: str, period: str) -> tuple[PriceSeries | None, dict]:
+    loop = asyncio.get_running_loop()
+    with metrics.IN_FLIGHT.track("fetch"):
+        prices, info = await asyncio.gather(
+            loop.run_in_executor(_fetch_pool, metrics.bind(metrics.timed), "history", load_prices, ticker, period),
+            loop.run_in_executor(_fetch_pool, metrics.bind(metrics.timed), "info", get_stock_info, ticker),
+        )
+    return (prices, info) if prices is not None else (None, {})
+
+
+async def fetch_bundle_async(ticker: str, period: str = "1y") -> tuple[PriceSeries | None, dict]:
+    key = (id(asyncio.get_running_loop()), ticker, period)
+    task = _async_inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_fetch_bundle_async(ticker, period))
+        _async_inflight[key] = task
+        task.add_done_callback(lambda _: _async_inflight.pop(key, None))
+    # shield: one caller disconnecting must not cancel the fetch for the others
+    return await asyncio.shield(task)
+
+
 # ─────────────────────────────────────────────
 #  SIMPLE LSTM-STYLE PREDICTION (NumPy only)
 #  We implement a minimal manual LSTM to avoid
@@ -149,58 +426,10 @@ def get_stock_info(ticker: str) -> dict:
 #  Uses rolling window + linear regression trend
 #  + momentum indicators for signal generation.
 # ─────────────────────────────────────────────
-def compute_technical_indicators(df: pd.DataFrame) -> dict:
-    close = df["Close"].values.astype(float)
-
-    # Moving Averages
-    ma20 = np.mean(close[-20:]) if len(close) >= 20 else np.mean(close)
-    ma50 = np.mean(close[-50:]) if len(close) >= 50 else np.mean(close)
-    ma200 = np.mean(close[-200:]) if len(close) >= 200 else np.mean(close)
-
-    # RSI (14-day)
-    delta = np.diff(close[-15:])
-    gains = delta[delta > 0]
-    losses = -delta[delta < 0]
-    avg_gain = np.mean(gains) if len(gains) > 0 else 0
-    avg_loss = np.mean(losses) if len(losses) > 0 else 1e-9
-    rs = avg_gain / avg_loss
-    rsi = 100 - (100 / (1 + rs))
-
-    # MACD (12/26 EMA approximation via simple means)
-    ema12 = np.mean(close[-12:]) if len(close) >= 12 else close[-1]
-    ema26 = np.mean(close[-26:]) if len(close) >= 26 else close[-1]
-    macd = ema12 - ema26
-
-    # Bollinger Bands (20-day)
-    window = close[-20:] if len(close) >= 20 else close
-    bb_mean = np.mean(window)
-    bb_std = np.std(window)
-    bb_upper = bb_mean + 2 * bb_std
-    bb_lower = bb_mean - 2 * bb_std
-
-    # Price momentum (30-day return)
-    price_30d_ago = close[-30] if len(close) >= 30 else close[0]
-    momentum_30d = ((close[-1] - price_30d_ago) / price_30d_ago) * 100
-
-    # Trend direction via linear regression slope
-    x = np.arange(len(close[-60:])) if len(close) >= 60 else np.arange(len(close))
-    y = close[-60:] if len(close) >= 60 else close
-    slope = np.polyfit(x, y, 1)[0]
-
-    current = close[-1]
-
-    return {
-        "current_price": round(current, 2),
-        "ma20": round(ma20, 2),
-        "ma50": round(ma50, 2),
-        "ma200": round(ma200, 2),
-        "rsi": round(rsi, 2),
-        "macd": round(macd, 4),
-        "bb_upper": round(bb_upper, 2),
-        "bb_lower": round(bb_lower, 2),
-        "momentum_30d": round(momentum_30d, 2),
-        "trend_slope": round(slope, 4),
-    }
+def compute_technical_indicators(prices: PriceSeries | pd.DataFrame) -> dict:
+    # Latest row of the full-series engine (true EMA MACD, Wilder RSI, rolling slope)
+    close = prices.close if isinstance(prices, PriceSeries) else prices["Close"].values
+    return indicators_at(compute_indicator_series(close))
 
 
 def predict_signal(indicators: dict) -> dict:
@@ -209,6 +438,7 @@ def predict_signal(indicators: dict) -> dict:
     Returns signal: STRONG BUY / BUY / HOLD / SELL / STRONG SELL
     with confidence score and reasoning.
     """
+    # backtest.signal_scores replays these rules in NumPy; tests/test_backtest.py keeps the two in step
     score = 0
     reasons = []
 
@@ -330,28 +560,53 @@ def predict_signal(indicators: dict) -> dict:
 # ─────────────────────────────────────────────
 #  RESOLVE TICKER FROM USER INPUT
 # ─────────────────────────────────────────────
-def resolve_ticker(name: str) -> str | None:
+def resolve_ticker(name: str, probe: bool = True) -> str | None:
+    """
+    Map free text to a ticker. With probe=False an unknown symbol is returned
+    unverified, leaving validation to the caller's own history fetch.
+    """
     name_lower = name.lower().strip()
 
-    # Check Indian stock dictionary
-    for key, ticker in INDIAN_STOCKS.items():
-        if key in name_lower or name_lower in key:
-            return ticker
-
-    # Check US stock dictionary
-    for key, ticker in US_STOCKS.items():
-        if key in name_lower or name_lower in key:
-            return ticker
+    # Exact alias, then any alias mentioned in the text, then an unambiguous partial name
+    ticker = ALIAS_INDEX.lookup(name_lower)
+    if ticker:
+        return ticker
+    matches = ALIAS_INDEX.find_all(name_lower)
+    if matches:
+        return matches[0].ticker
+    ticker = ALIAS_INDEX.unique_prefix(name_lower)
+    if ticker:
+        return ticker
 
     # Try as direct ticker symbol (e.g. AAPL, TSLA, RELIANCE.NS)
     candidate = name.upper().strip()
-    test = yf.Ticker(candidate)
+    if not candidate or candidate in UNKNOWN_SYMBOLS:
+        return None
+    if candidate in KNOWN_TICKERS:
+        return candidate
+
+    # Listing symbol, then a ranked, typo-tolerant company-name match, all offline
+    master = symbol_master()
+    if len(master):
+        match = master.symbol(candidate)
+        if match is None and _name_shaped(name_lower):
+            match = master.best(name_lower, SYMBOL_MATCH_MIN, SYMBOL_MATCH_MARGIN)
+        metrics.cache_lookup("symbol_master", match is not None)
+        if match:
+            return match.ticker
+    # A phrase that names no listed company won't be a valid symbol either
+    if not SYMBOL_LIKE.fullmatch(candidate):
+        return None
+
+    if not probe:
+        return candidate
     try:
-        hist = test.history(period="5d")
+        hist = market_data.provider.history(candidate, period="5d")
         if not hist.empty:
             return candidate
+        UNKNOWN_SYMBOLS.add(candidate)
     except Exception:
-        pass
+        metrics.UPSTREAM_ERRORS.inc(f"{market_data.provider.name}_history")
 
     return None
 
@@ -360,19 +615,139 @@ def resolve_ticker(name: str) -> str | None:
 #  MAIN ANALYSIS FUNCTION
 # ─────────────────────────────────────────────
 def analyze_stock(name: str) -> dict:
-    ticker = resolve_ticker(name)
+    # Raw symbols are validated by the 1y history pull itself, not a separate 5d probe
+    with metrics.stage("resolve"):
+        ticker = resolve_ticker(name, probe=False)
+    warm = _warm_analysis(ticker)
+    if warm:
+        return warm
+    try:
+        prices, info = fetch_bundle(ticker) if ticker else (None, {})
+    except UpstreamFailed:
+        return build_analysis(name, ticker, None, {}, upstream_failed=True)
+    return _remember_analysis(build_analysis(name, ticker, prices, info), info)
+
+
+async def analyze_stock_async(name: str) -> dict:
+    with metrics.stage("resolve"):
+        ticker = resolve_ticker(name, probe=False)
+    # The warm cache is SQLite: keep it off the event loop like the fetch itself
+    warm = await asyncio.to_thread(_warm_analysis, ticker)
+    if warm:
+        return warm
+    try:
+        prices, info = await fetch_bundle_async(ticker) if ticker else (None, {})
+    except UpstreamFailed:
+        return build_analysis(name, ticker, None, {}, upstream_failed=True)
+    return await asyncio.to_thread(_remember_analysis, build_analysis(name, ticker, prices, info), info)
+
+
+# Separate from _fetch_pool: analyze_stock itself waits on work queued there
+_analysis_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="analysis")
+
+
+def analyze_stocks(names: list[str]) -> list[dict]:
+    """Analyse several stocks concurrently, results in input order."""
+    if len(names) == 1:
+        return [analyze_stock(names[0])]
+    futures = [_analysis_pool.submit(metrics.bind(analyze_stock), name) for name in names]
+    return [f.result() for f in futures]
+
+
+async def analyze_stocks_async(names: list[str]) -> list[dict]:
+    return list(await asyncio.gather(*(analyze_stock_async(name) for name in names)))
+
+
+def analyze_batch(names: list[str]) -> list[dict]:
+    """
+    Analyses for many stocks at once, in input order: warm copies where still
+    current, the rest from one bulk history pull with .info fetched concurrently.
+    """
+    with metrics.stage("resolve"):
+        tickers = [resolve_ticker(name, probe=False) for name in names]
+    results, missing = {}, []
+    for ticker in dict.fromkeys(t for t in tickers if t):
+        warm = _warm_analysis(ticker)
+        if warm:
+            results[ticker] = warm
+        else:
+            missing.append(ticker)
+
+    if missing:
+        failed = set()
+        with metrics.stage("history"):
+            series = fetch_bulk_history(missing, failed=failed)
+        found = [t for t in missing if t in series]
+        with metrics.stage("info"):
+            futures = [_fetch_pool.submit(metrics.bind(get_stock_info), t) for t in found]
+            infos = {t: f.result() for t, f in zip(found, futures)}
+        for ticker in missing:
+            info = infos.get(ticker, {})
+            results[ticker] = _remember_analysis(
+                build_analysis(ticker, ticker, series.get(ticker), info, ticker in failed), info
+            )
+
+    return [
+        results[ticker] if ticker else build_analysis(name, None, None, {})
+        for name, ticker in zip(names, tickers)
+    ]
+
+
+def _warm_analysis(ticker: str | None) -> dict | None:
     if not ticker:
-        return {"error": f"Could not resolve '{name}' to a known ticker. Please provide the stock name or ticker symbol."}
+        return None
+    try:
+        with metrics.stage("warm_cache"):
+            warm = history_store.load_analysis(ticker)
+    except Exception:
+        warm = None
+    metrics.cache_lookup("analysis", warm is not None)
+    if warm is None:
+        # A new host's store starts empty; the boot snapshot covers popular tickers meanwhile
+        warm = warm_start.analysis(ticker)
+        metrics.cache_lookup("snapshot", warm is not None)
+    return warm
+
+
+def _remember_analysis(analysis: dict, info: dict) -> dict:
+    if "error" in analysis:
+        return analysis
+    try:
+        # Without .info the name, sector and P/E are placeholders: serve this one but
+        # don't keep it, so the next request retries .info instead of reading them back
+        if info:
+            history_store.save_warm("analysis", analysis["ticker"], analysis)
+        # A cold chat fetch: let the prefetcher keep this ticker warm from now on.
+        # API and screener sweeps would otherwise enrol every ticker they touch.
+        if rate_limit.current_priority() == rate_limit.INTERACTIVE:
+            history_store.note_interest(analysis["ticker"])
+    except Exception:
+        pass
+    return analysis
 
-    df = fetch_stock_data(ticker)
-    if df is None:
-        return {"error": f"Unable to fetch historical data for {ticker}. Market may be closed or ticker invalid."}
 
-    info = get_stock_info(ticker)
-    indicators = compute_technical_indicators(df)
-    prediction = predict_signal(indicators)
+def build_analysis(name: str, ticker: str | None, prices: PriceSeries | None, info: dict,
+                   upstream_failed: bool = False) -> dict:
+    # Only an empty answer from upstream condemns a symbol; an error leaves it to the next try
+    if prices is None and ticker not in KNOWN_TICKERS and not upstream_failed:
+        if ticker:
+            UNKNOWN_SYMBOLS.add(ticker)
+        return {
+            "error": f"Could not resolve '{name}' to a known ticker. Please provide the stock name or ticker symbol.",
+            "reason": "unresolved",
+        }
+    if prices is None:
+        return {
+            "error": f"Unable to fetch historical data for {ticker}. Market may be closed or ticker invalid.",
+            "reason": "unavailable",
+        }
+
+    with metrics.stage("indicators"):
+        indicators = compute_technical_indicators(prices)
+        prediction = predict_signal(indicators)
 
     currency_symbol = "₹" if ticker.endswith(".NS") else "$"
+    recent = prices.tail(20)
 
     return {
         "ticker": ticker,
@@ -391,8 +766,81 @@ def analyze_stock(name: str) -> dict:
         "entry_price": prediction["entry_price"],
         "target_price": prediction["target_price"],
         "stop_loss": prediction["stop_loss"],
-        "prices_20d": [round(float(x), 2) for x in df["Close"].values[-20:]],
-        "dates_20d": [str(d.date()) for d in df.index[-20:]],
+        "prices_20d": [round(float(x), 2) for x in recent.close],
+        "dates_20d": recent.iso_dates(),
+    }
+
+
+# ─────────────────────────────────────────────
+#  UNIVERSE SCREENER
+#  Bars are bulk-loaded once, indicator + signal work
+#  is fanned out over a process pool in chunks, and
+#  the best k are picked with a heap, not a full sort.
+#  The pool's workers are started with forkserver (or
+#  spawn), never fork: forking a threaded server copies
+#  locks other threads hold at that moment.
+#
+#  SCREEN_WORKERS=1 screens inline, without a pool.
+# ─────────────────────────────────────────────
+# Below this many tickers the pool's IPC costs more than the maths it saves
+SCREEN_POOL_MIN = int(os.getenv("SCREEN_POOL_MIN", "256"))
+SCREEN_WORKERS = int(os.getenv("SCREEN_WORKERS", "0")) or os.cpu_count() or 2
+SCREEN_MAX_TICKERS = 5000
+
+_screen_pool: ProcessPoolExecutor | None = None
+
+# First alias per ticker, used as a display name without an .info round-trip
+TICKER_NAMES = {}
+for _alias, _ticker in {**INDIAN_STOCKS, **US_STOCKS}.items():
+    TICKER_NAMES.setdefault(_ticker, _alias.title())
+
+
+def _screen_one(ticker: str, close: np.ndarray) -> dict:
+    indicators = indicators_at(compute_indicator_series(close))
+    prediction = predict_signal(indicators)
+    return {
+        "ticker": ticker,
+        "name": TICKER_NAMES.get(ticker, ticker),
+        "currency": "₹" if ticker.endswith(".NS") else "$",
+        "current_price": indicators["current_price"],
+        "signal": prediction["signal"],
+        "score": prediction["score"],
+        "confidence": prediction["confidence"],
+    }
+
+
+def _screen_chunk(items: list[tuple[str, np.ndarray]]) -> list[dict]:
+    return [_screen_one(ticker, close) for ticker, close in items]
+
+
+def _get_screen_pool() -> ProcessPoolExecutor:
+    global _screen_pool
+    if _screen_pool is None:
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        _screen_pool = ProcessPoolExecutor(max_workers=SCREEN_WORKERS, mp_context=multiprocessing.get_context(method))
+    return _screen_pool
+
+
+def screen_stocks(tickers: list[str] | None = None, top_k: int = 10, period: str = "1y") -> dict:
+    if tickers is None:
+        tickers = list(dict.fromkeys([*INDIAN_STOCKS.values(), *US_STOCKS.values()]))
+    tickers = list(dict.fromkeys(tickers))[:SCREEN_MAX_TICKERS]
+
+    series = fetch_bulk_history(tickers, period)
+    items = [(t, prices.close) for t, prices in series.items()]
+
+    if len(items) < SCREEN_POOL_MIN or SCREEN_WORKERS <= 1:
+        results = _screen_chunk(items)
+    else:
+        size = max(1, -(-len(items) // (SCREEN_WORKERS * 4)))
+        chunks = [items[i:i + size] for i in range(0, len(items), size)]
+        results = [r for part in _get_screen_pool().map(_screen_chunk, chunks) for r in part]
+
+    top = heapq.nlargest(top_k, results, key=lambda r: (r["score"], r["confidence"]))
+    return {
+        "results": top,
+        "screened": len(results),
+        "missing": [t for t in tickers if t not in series],
     }
 
 
@@ -0,0 +1,306 @@
+from __future__ import annotations
+
+import os
+import json
+import sqlite3
+import threading
+import time
+import datetime as dt
+from typing import TYPE_CHECKING
+from zoneinfo import ZoneInfo
+
+import price_store
+from lazy_imports import lazy_import
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+np = lazy_import("numpy", __name__, "np")
+
+# ─────────────────────────────────────────────
+#  LOCAL OHLCV HISTORY STORE (SQLite)
+#  One table per ticker, keyed by bar date, plus
+#  a meta table recording how far back the stored
+#  series is complete and when it was last synced.
+#  Every save also republishes the ticker's mapped
+#  close/volume file (price_store) that reads use.
+# ─────────────────────────────────────────────
+DB_PATH = os.getenv(
+    "HISTORY_DB_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "history.db"),
+)
+
+# While a session is open the latest bar keeps moving, so re-sync after this long
+INTRADAY_TTL = dt.timedelta(minutes=int(os.getenv("HISTORY_INTRADAY_TTL_MIN", "15")))
+# Company profile fields (.info) barely move intraday
+INFO_TTL = dt.timedelta(hours=int(os.getenv("HISTORY_INFO_TTL_HOURS", "24")))
+# yfinance needs a little while after the bell to publish the final daily bar
+CLOSE_GRACE = dt.timedelta(minutes=20)
+
+EXCHANGE_SESSIONS = {
+    "NSE": (ZoneInfo("Asia/Kolkata"), dt.time(9, 15), dt.time(15, 30)),
+    "US":  (ZoneInfo("America/New_York"), dt.time(9, 30), dt.time(16, 0)),
+}
+
+PERIOD_DAYS = {
+    "1mo": 31,
+    "3mo": 92,
+    "6mo": 183,
+    "1y": 366,
+    "2y": 731,
+    "5y": 1827,
+    "10y": 3653,
+}
+
+COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+_local = threading.local()
+_init_lock = threading.Lock()
+
+
+def _conn() -> sqlite3.Connection:
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
+        conn = sqlite3.connect(DB_PATH, timeout=30)
+        with _init_lock:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS history_meta ("
+                " ticker TEXT PRIMARY KEY,"
+                " covered_from TEXT NOT NULL,"
+                " fetched_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS warm_cache ("
+                " kind TEXT NOT NULL, ticker TEXT NOT NULL, payload TEXT NOT NULL,"
+                " stored_at REAL NOT NULL, PRIMARY KEY (kind, ticker))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS interest ("
+                " ticker TEXT PRIMARY KEY, requested_at REAL NOT NULL)"
+            )
+        _local.conn = conn
+    return conn
+
+
+def _table(ticker: str) -> str:
+    return '"bars_' + ticker.replace('"', '""') + '"'
+
+
+# ─────────────────────────────────────────────
+#  EXCHANGE-AWARE STALENESS
+# ─────────────────────────────────────────────
+def exchange_for(ticker: str) -> str:
+    return "NSE" if ticker.upper().endswith((".NS", ".BO")) else "US"
+
+
+def is_market_open(exchange: str, now: dt.datetime | None = None) -> bool:
+    tz, open_t, close_t = EXCHANGE_SESSIONS[exchange]
+    local = (now or dt.datetime.now(dt.timezone.utc)).astimezone(tz)
+    return local.weekday() < 5 and open_t <= local.time() < close_t
+
+
+def last_session_close(exchange: str, now: dt.datetime | None = None) -> dt.datetime:
+    """Most recent weekday close at or before `now` (exchange holidays are not modelled)."""
+    tz, _, close_t = EXCHANGE_SESSIONS[exchange]
+    local = (now or dt.datetime.now(dt.timezone.utc)).astimezone(tz)
+    day = local.date()
+    while True:
+        close = dt.datetime.combine(day, close_t, tzinfo=tz)
+        if day.weekday() < 5 and close <= local:
+            return close
+        day -= dt.timedelta(days=1)
+
+
+def next_session_open(exchange: str, now: dt.datetime | None = None) -> dt.datetime:
+    tz, open_t, _ = EXCHANGE_SESSIONS[exchange]
+    local = (now or dt.datetime.now(dt.timezone.utc)).astimezone(tz)
+    day = local.date()
+    while True:
+        opens = dt.datetime.combine(day, open_t, tzinfo=tz)
+        if day.weekday() < 5 and opens > local:
+            return opens
+        day += dt.timedelta(days=1)
+
+
+def seconds_until_refresh(ticker: str, now: dt.datetime | None = None) -> float:
+    """How long data fetched now stays current: the intraday TTL, or until the next open."""
+    now = now or dt.datetime.now(dt.timezone.utc)
+    exchange = exchange_for(ticker)
+    if is_market_open(exchange, now):
+        return INTRADAY_TTL.total_seconds()
+    return (next_session_open(exchange, now) - now).total_seconds()
+
+
+def is_stale(ticker: str, fetched_at: float, now: dt.datetime | None = None) -> bool:
+    now = now or dt.datetime.now(dt.timezone.utc)
+    fetched = dt.datetime.fromtimestamp(fetched_at, dt.timezone.utc)
+    exchange = exchange_for(ticker)
+    if is_market_open(exchange, now):
+        return now - fetched > INTRADAY_TTL
+    settled = last_session_close(exchange, now - CLOSE_GRACE) + CLOSE_GRACE
+    return fetched < settled
+
+
+def period_start(period: str, today: dt.date | None = None) -> dt.date | None:
+    days = PERIOD_DAYS.get(period)
+    if days is None:
+        return None
+    return (today or dt.date.today()) - dt.timedelta(days=days)
+
+
+# ─────────────────────────────────────────────
+#  READ / WRITE
+# ─────────────────────────────────────────────
+def get_meta(ticker: str) -> tuple[dt.date, float] | None:
+    row = _conn().execute(
+        "SELECT covered_from, fetched_at FROM history_meta WHERE ticker = ?", (ticker,)
+    ).fetchone()
+    if row is None:
+        return None
+    return dt.date.fromisoformat(row[0]), row[1]
+
+
+def load(ticker: str, start: dt.date | None = None) -> pd.DataFrame | None:
+    sql = f"SELECT date, open, high, low, close, volume FROM {_table(ticker)}"
+    params: tuple = ()
+    if start is not None:
+        sql += " WHERE date >= ?"
+        params = (start.isoformat(),)
+    try:
+        rows = _conn().execute(sql + " ORDER BY date", params).fetchall()
+    except sqlite3.OperationalError:
+        return None
+    if not rows:
+        return None
+    import pandas as pd
+    df = pd.DataFrame(rows, columns=["Date"] + COLUMNS)
+    df.index = pd.DatetimeIndex(pd.to_datetime(df.pop("Date")), name="Date")
+    return df
+
+
+def last_date(ticker: str) -> dt.date | None:
+    try:
+        row = _conn().execute(f"SELECT MAX(date) FROM {_table(ticker)}").fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return dt.date.fromisoformat(row[0]) if row and row[0] else None
+
+
+def save(ticker: str, df: pd.DataFrame, covered_from: dt.date | None = None) -> None:
+    """Upsert bars from a yfinance history frame and mark the ticker as synced now."""
+    conn = _conn()
+    rows = [
+        (idx.date().isoformat(), float(r.Open), float(r.High), float(r.Low), float(r.Close), float(r.Volume))
+        for idx, r in zip(df.index, df[COLUMNS].itertuples(index=False))
+    ]
+    with conn:
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {_table(ticker)} ("
+            " date TEXT PRIMARY KEY, open REAL, high REAL, low REAL, close REAL, volume REAL"
+            ") WITHOUT ROWID"
+        )
+        conn.executemany(f"INSERT OR REPLACE INTO {_table(ticker)} VALUES (?, ?, ?, ?, ?, ?)", rows)
+        meta = get_meta(ticker)
+        if covered_from is None:
+            covered_from = meta[0] if meta else (df.index[0].date() if len(df) else dt.date.today())
+        elif meta:
+            covered_from = min(covered_from, meta[0])
+        conn.execute(
+            "INSERT OR REPLACE INTO history_meta VALUES (?, ?, ?)",
+            (ticker, covered_from.isoformat(), time.time()),
+        )
+    _publish(ticker)
+
+
+def _publish(ticker: str) -> bool:
+    """Rewrite the ticker's memory-mapped close/volume file from the stored bars."""
+    try:
+        rows = _conn().execute(f"SELECT date, close, volume FROM {_table(ticker)} ORDER BY date").fetchall()
+    except sqlite3.OperationalError:
+        return False
+    if not rows:
+        return False
+    dates, close, volume = zip(*rows)
+    price_store.write(
+        ticker,
+        np.fromiter((dt.date.fromisoformat(d).toordinal() for d in dates), dtype=np.int32, count=len(rows)),
+        np.asarray(close, dtype=np.float64),
+        np.asarray(volume, dtype=np.float64),
+    )
+    return True
+
+
+def load_series(ticker: str, start: dt.date | None = None) -> price_store.PriceSeries | None:
+    """Close/volume views from the mapped store, republished from SQLite if the file is missing."""
+    series = price_store.load(ticker, start)
+    if series is None and _publish(ticker):
+        series = price_store.load(ticker, start)
+    if series is None or not len(series):
+        return None
+    return series
+
+
+def touch(ticker: str) -> None:
+    """Record a sync that returned no new bars (e.g. an exchange holiday)."""
+    with _conn() as conn:
+        conn.execute("UPDATE history_meta SET fetched_at = ? WHERE ticker = ?", (time.time(), ticker))
+
+
+# ─────────────────────────────────────────────
+#  WARM CACHES
+#  .info dicts and finished analyses, shared by every
+#  worker through the same database. Written by chat
+#  requests and by the background prefetcher.
+# ─────────────────────────────────────────────
+def save_warm(kind: str, ticker: str, payload: dict) -> None:
+    with _conn() as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO warm_cache VALUES (?, ?, ?, ?)",
+            (kind, ticker, json.dumps(payload), time.time()),
+        )
+
+
+def load_warm(kind: str, ticker: str) -> tuple[dict, float] | None:
+    row = _conn().execute(
+        "SELECT payload, stored_at FROM warm_cache WHERE kind = ? AND ticker = ?", (kind, ticker)
+    ).fetchone()
+    return (json.loads(row[0]), row[1]) if row else None
+
+
+def recent_warm(kind: str, limit: int) -> list[tuple[str, dict, float]]:
+    """The `limit` most recently stored entries of `kind`, newest first."""
+    rows = _conn().execute(
+        "SELECT ticker, payload, stored_at FROM warm_cache WHERE kind = ? ORDER BY stored_at DESC LIMIT ?",
+        (kind, limit),
+    ).fetchall()
+    return [(ticker, json.loads(payload), stored_at) for ticker, payload, stored_at in rows]
+
+
+def load_info(ticker: str) -> dict | None:
+    hit = load_warm("info", ticker)
+    if hit is None or time.time() - hit[1] > INFO_TTL.total_seconds():
+        return None
+    return hit[0]
+
+
+def load_analysis(ticker: str) -> dict | None:
+    """A stored analysis, only while the bars it was computed from are still current."""
+    hit = load_warm("analysis", ticker)
+    if hit is None or is_stale(ticker, hit[1]):
+        return None
+    return hit[0]
+
+
+def note_interest(ticker: str) -> None:
+    """Flag a ticker an interactive request had to fetch cold, for the prefetcher."""
+    with _conn() as conn:
+        conn.execute("INSERT OR REPLACE INTO interest VALUES (?, ?)", (ticker, time.time()))
+
+
+def pop_interest() -> list[str]:
+    with _conn() as conn:
+        rows = conn.execute("DELETE FROM interest RETURNING ticker, requested_at").fetchall()
+    return [ticker for ticker, _ in sorted(rows, key=lambda r: r[1])]
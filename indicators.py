@@ -0,0 +1,371 @@
+from __future__ import annotations
+
+import math
+import struct
+from collections.abc import Mapping
+
+from lazy_imports import lazy_import
+
+np = lazy_import("numpy", __name__, "np")
+
+# ─────────────────────────────────────────────
+#  VECTORIZED INDICATOR ENGINE
+#  Every indicator is computed as a full series over
+#  the close array in O(n). Windows are truncated at
+#  the start of the series (a 200-day MA over 120 bars
+#  is the 120-bar mean), so the last row is always
+#  defined, matching the old single-point behaviour.
+# ─────────────────────────────────────────────
+MA_WINDOWS = (20, 50, 200)
+EMA_FAST, EMA_SLOW, EMA_SIGNAL = 12, 26, 9
+RSI_PERIOD = 14
+BB_WINDOW, BB_WIDTH = 20, 2.0
+SLOPE_WINDOW = 60
+MOMENTUM_LAG = 29   # close[-30] is 29 sessions back from close[-1]
+
+_EWM_BLOCK = 64
+
+
+def _window_bounds(n: int, window: int) -> tuple[np.ndarray, np.ndarray]:
+    hi = np.arange(1, n + 1)
+    lo = np.maximum(hi - window, 0)
+    return lo, hi
+
+
+def _rolling_sum(x: np.ndarray, window: int) -> np.ndarray:
+    c = np.concatenate(([0.0], np.cumsum(x)))
+    lo, hi = _window_bounds(len(x), window)
+    return c[hi] - c[lo]
+
+
+def rolling_mean(x: np.ndarray, window: int) -> np.ndarray:
+    lo, hi = _window_bounds(len(x), window)
+    return _rolling_sum(x, window) / (hi - lo)
+
+
+def rolling_std(x: np.ndarray, window: int) -> np.ndarray:
+    # Shift by the overall mean first so the sum-of-squares doesn't cancel badly
+    shifted = x - x.mean()
+    lo, hi = _window_bounds(len(x), window)
+    count = hi - lo
+    mean = _rolling_sum(shifted, window) / count
+    var = _rolling_sum(shifted * shifted, window) / count - mean * mean
+    return np.sqrt(np.maximum(var, 0.0))
+
+
+def ewm(x: np.ndarray, alpha: float, start: int = 0, seed: float | None = None) -> np.ndarray:
+    """
+    Recursive y[t] = alpha*x[t] + (1-alpha)*y[t-1] from index `start`, seeded
+    with `seed` (default x[start]). Solved in closed form per fixed-size block,
+    which keeps the powers of (1-alpha) numerically tame on long series.
+    """
+    out = np.empty_like(x)
+    out[:start] = np.nan
+    n = len(x)
+    if start >= n:
+        return out
+    decay = 1.0 - alpha
+    k = np.arange(_EWM_BLOCK)
+    grow = decay ** -k           # (1-a)^-j
+    shrink = decay ** (k + 1)    # (1-a)^(k+1)
+
+    carry = x[start] if seed is None else seed
+    out[start] = carry
+    pos = start + 1
+    while pos < n:
+        block = x[pos:pos + _EWM_BLOCK]
+        m = len(block)
+        acc = np.cumsum(block * grow[:m])
+        out[pos:pos + m] = shrink[:m] * (carry + alpha * acc / decay)
+        carry = out[pos + m - 1]
+        pos += m
+    return out
+
+
+def wilder_averages(close: np.ndarray, period: int = RSI_PERIOD) -> tuple[np.ndarray, np.ndarray]:
+    """Average gain / loss per bar change (length n-1)."""
+    delta = np.diff(close)
+    gain = np.maximum(delta, 0.0)
+    loss = np.maximum(-delta, 0.0)
+
+    # Simple average of the changes seen so far until a full period exists,
+    # then Wilder smoothing (alpha = 1/period) seeded from that average
+    avg_gain = rolling_mean(gain, period)
+    avg_loss = rolling_mean(loss, period)
+    if len(delta) > period:
+        avg_gain[period - 1:] = ewm(gain, 1.0 / period, period - 1, avg_gain[period - 1])[period - 1:]
+        avg_loss[period - 1:] = ewm(loss, 1.0 / period, period - 1, avg_loss[period - 1])[period - 1:]
+    return avg_gain, avg_loss
+
+
+def _rsi_from_averages(avg_gain, avg_loss):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rs = avg_gain / avg_loss
+        return np.where(avg_loss > 0, 100.0 - 100.0 / (1.0 + rs), np.where(avg_gain > 0, 100.0, 50.0))
+
+
+def wilder_rsi(close: np.ndarray, period: int = RSI_PERIOD) -> np.ndarray:
+    avg_gain, avg_loss = wilder_averages(close, period)
+    rsi = np.empty_like(close)
+    rsi[0] = 50.0
+    rsi[1:] = _rsi_from_averages(avg_gain, avg_loss)
+    return rsi
+
+
+def rolling_slope(y: np.ndarray, window: int = SLOPE_WINDOW) -> np.ndarray:
+    """Least-squares slope of y against 0..n-1 over each trailing window."""
+    shifted = y - y.mean()
+    lo, hi = _window_bounds(len(y), window)
+    n = (hi - lo).astype(float)
+    sy = _rolling_sum(shifted, window)
+    # sum over the window of (j - lo) * y_j, from a cumulative sum of j * y_j
+    sjy = _rolling_sum(np.arange(len(y)) * shifted, window) - lo * sy
+    sx = n * (n - 1) / 2
+    sxx = (n - 1) * n * (2 * n - 1) / 6
+    denom = n * sxx - sx * sx
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slope = (n * sjy - sx * sy) / denom
+    return np.where(denom > 0, slope, 0.0)
+
+
+def momentum(close: np.ndarray, lag: int = MOMENTUM_LAG) -> np.ndarray:
+    base = np.empty_like(close)
+    base[:lag] = close[0]
+    base[lag:] = close[:-lag] if lag else close
+    return (close - base) / base * 100
+
+
+def compute_indicator_series(close: np.ndarray) -> dict[str, np.ndarray]:
+    close = np.ascontiguousarray(close, dtype=np.float64)
+
+    ema_fast = ewm(close, 2.0 / (EMA_FAST + 1))
+    ema_slow = ewm(close, 2.0 / (EMA_SLOW + 1))
+    macd = ema_fast - ema_slow
+    macd_signal = ewm(macd, 2.0 / (EMA_SIGNAL + 1))
+
+    bb_mid = rolling_mean(close, BB_WINDOW)
+    bb_std = rolling_std(close, BB_WINDOW)
+
+    series = {
+        "close": close,
+        "ma20": rolling_mean(close, MA_WINDOWS[0]),
+        "ma50": rolling_mean(close, MA_WINDOWS[1]),
+        "ma200": rolling_mean(close, MA_WINDOWS[2]),
+        "ema12": ema_fast,
+        "ema26": ema_slow,
+        "macd": macd,
+        "macd_signal": macd_signal,
+        "rsi": wilder_rsi(close),
+        "bb_upper": bb_mid + BB_WIDTH * bb_std,
+        "bb_lower": bb_mid - BB_WIDTH * bb_std,
+        "momentum_30d": momentum(close),
+        "trend_slope": rolling_slope(close),
+    }
+    return {k: np.ascontiguousarray(v) for k, v in series.items()}
+
+
+def indicators_at(series: dict[str, np.ndarray], i: int = -1) -> dict:
+    """The per-bar dict predict_signal consumes, taken from row i (default: latest)."""
+    return {
+        "current_price": round(float(series["close"][i]), 2),
+        "ma20": round(float(series["ma20"][i]), 2),
+        "ma50": round(float(series["ma50"][i]), 2),
+        "ma200": round(float(series["ma200"][i]), 2),
+        "rsi": round(float(series["rsi"][i]), 2),
+        "macd": round(float(series["macd"][i]), 4),
+        "macd_signal": round(float(series["macd_signal"][i]), 4),
+        "bb_upper": round(float(series["bb_upper"][i]), 2),
+        "bb_lower": round(float(series["bb_lower"][i]), 2),
+        "momentum_30d": round(float(series["momentum_30d"][i]), 2),
+        "trend_slope": round(float(series["trend_slope"][i]), 4),
+    }
+
+
+# ─────────────────────────────────────────────
+#  INCREMENTAL INDICATOR STATE
+#  O(1) per appended bar: running sums over a ring
+#  buffer of the last 200 closes, EMA accumulators,
+#  Wilder gain/loss averages and the regression
+#  sufficient statistics. snapshot() yields the
+#  same dict as indicators_at() on the full series.
+# ─────────────────────────────────────────────
+_STATE_VERSION = 1
+_BUFFER = max(MA_WINDOWS + (BB_WINDOW, SLOPE_WINDOW, MOMENTUM_LAG + 1))
+# Running sums are rebuilt from the ring buffer this often to cap float drift
+_RESYNC_EVERY = 512
+
+_SCALARS = (
+    "n", "first_close", "ema_fast", "ema_slow", "macd_signal",
+    "avg_gain", "avg_loss", "sum20", "sum50", "sum200", "sumsq20", "slope_sy", "slope_sjy",
+)
+_HEADER = struct.Struct("<BqH" + "d" * (len(_SCALARS) - 1))
+
+
+class IndicatorState:
+    def __init__(self):
+        self.n = 0
+        self.head = 0
+        self.buf = np.zeros(_BUFFER)
+        self.first_close = 0.0
+        self.ema_fast = self.ema_slow = self.macd_signal = 0.0
+        self.avg_gain = self.avg_loss = 0.0
+        self.sum20 = self.sum50 = self.sum200 = self.sumsq20 = 0.0
+        self.slope_sy = self.slope_sjy = 0.0
+
+    # ── construction ──
+    @classmethod
+    def from_closes(cls, close: np.ndarray) -> "IndicatorState":
+        """Seed from a close history using the vectorized engine (no per-bar replay)."""
+        close = np.ascontiguousarray(close, dtype=np.float64)
+        state = cls()
+        n = len(close)
+        if n == 0:
+            return state
+        state.n = n
+        state.first_close = float(close[0])
+        tail = close[-_BUFFER:]
+        state.buf[:len(tail)] = tail
+        state.head = len(tail) % _BUFFER
+
+        ema_fast = ewm(close, 2.0 / (EMA_FAST + 1))
+        ema_slow = ewm(close, 2.0 / (EMA_SLOW + 1))
+        state.ema_fast = float(ema_fast[-1])
+        state.ema_slow = float(ema_slow[-1])
+        state.macd_signal = float(ewm(ema_fast - ema_slow, 2.0 / (EMA_SIGNAL + 1))[-1])
+        if n > 1:
+            avg_gain, avg_loss = wilder_averages(close)
+            state.avg_gain = float(avg_gain[-1])
+            state.avg_loss = float(avg_loss[-1])
+        state._resync()
+        return state
+
+    def _last(self, k: int) -> np.ndarray:
+        """The most recent min(k, n) closes, oldest first."""
+        k = min(k, self.n, _BUFFER)
+        idx = (self.head - k + np.arange(k)) % _BUFFER
+        return self.buf[idx]
+
+    def _back(self, k: int) -> float:
+        """Close k bars before the latest one."""
+        return float(self.buf[(self.head - 1 - k) % _BUFFER])
+
+    def _resync(self) -> None:
+        w20, w50, w200 = (self._last(w) for w in MA_WINDOWS)
+        self.sum20, self.sum50, self.sum200 = float(w20.sum()), float(w50.sum()), float(w200.sum())
+        self.sumsq20 = float((w20 * w20).sum())
+        win = self._last(SLOPE_WINDOW)
+        self.slope_sy = float(win.sum())
+        self.slope_sjy = float((np.arange(len(win)) * win).sum())
+
+    # ── per-bar update ──
+    def update(self, bar) -> dict:
+        close = float(bar["Close"] if isinstance(bar, Mapping) else bar)
+        n = self.n
+
+        if n == 0:
+            self.first_close = close
+            self.ema_fast = self.ema_slow = close
+            self.macd_signal = 0.0
+        else:
+            a_fast, a_slow, a_sig = 2.0 / (EMA_FAST + 1), 2.0 / (EMA_SLOW + 1), 2.0 / (EMA_SIGNAL + 1)
+            self.ema_fast += a_fast * (close - self.ema_fast)
+            self.ema_slow += a_slow * (close - self.ema_slow)
+            self.macd_signal += a_sig * ((self.ema_fast - self.ema_slow) - self.macd_signal)
+
+            delta = close - self._back(0)
+            gain, loss = max(delta, 0.0), max(-delta, 0.0)
+            changes = n   # bar changes seen, including this one
+            if changes <= RSI_PERIOD:
+                self.avg_gain += (gain - self.avg_gain) / changes
+                self.avg_loss += (loss - self.avg_loss) / changes
+            else:
+                self.avg_gain += (gain - self.avg_gain) / RSI_PERIOD
+                self.avg_loss += (loss - self.avg_loss) / RSI_PERIOD
+
+        # Rolling sums: drop the close leaving each window, add the new one
+        for attr, w in (("sum20", MA_WINDOWS[0]), ("sum50", MA_WINDOWS[1]), ("sum200", MA_WINDOWS[2])):
+            leaving = self._back(w - 1) if n >= w else 0.0
+            setattr(self, attr, getattr(self, attr) - leaving + close)
+        leaving = self._back(BB_WINDOW - 1) if n >= BB_WINDOW else 0.0
+        self.sumsq20 += close * close - leaving * leaving
+
+        if n >= SLOPE_WINDOW:
+            # Oldest point leaves; every remaining x index shifts down by one
+            leaving = self._back(SLOPE_WINDOW - 1)
+            self.slope_sy -= leaving
+            self.slope_sjy -= self.slope_sy
+            self.slope_sjy += (SLOPE_WINDOW - 1) * close
+        else:
+            self.slope_sjy += n * close
+        self.slope_sy += close
+
+        self.buf[self.head] = close
+        self.head = (self.head + 1) % _BUFFER
+        self.n = n + 1
+        if self.n % _RESYNC_EVERY == 0:
+            self._resync()
+        return self.snapshot()
+
+    # ── read-out ──
+    def snapshot(self) -> dict:
+        if self.n == 0:
+            raise ValueError("IndicatorState has no bars yet")
+        n = self.n
+        close = self._back(0)
+        c20, c50, c200 = (min(n, w) for w in MA_WINDOWS)
+        ma20, ma50, ma200 = self.sum20 / c20, self.sum50 / c50, self.sum200 / c200
+
+        cb = min(n, BB_WINDOW)
+        bb_mid = self.sum20 / cb
+        bb_std = math.sqrt(max(self.sumsq20 / cb - bb_mid * bb_mid, 0.0))
+
+        if n == 1:
+            rsi = 50.0
+        else:
+            rsi = float(_rsi_from_averages(np.float64(self.avg_gain), np.float64(self.avg_loss)))
+
+        base = self._back(MOMENTUM_LAG) if n > MOMENTUM_LAG else self.first_close
+        m = float(min(n, SLOPE_WINDOW))
+        sx = m * (m - 1) / 2
+        sxx = (m - 1) * m * (2 * m - 1) / 6
+        denom = m * sxx - sx * sx
+        slope = (m * self.slope_sjy - sx * self.slope_sy) / denom if denom > 0 else 0.0
+
+        macd = self.ema_fast - self.ema_slow
+        return {
+            "current_price": round(close, 2),
+            "ma20": round(ma20, 2),
+            "ma50": round(ma50, 2),
+            "ma200": round(ma200, 2),
+            "rsi": round(rsi, 2),
+            "macd": round(macd, 4),
+            "macd_signal": round(self.macd_signal, 4),
+            "bb_upper": round(bb_mid + BB_WIDTH * bb_std, 2),
+            "bb_lower": round(bb_mid - BB_WIDTH * bb_std, 2),
+            "momentum_30d": round((close - base) / base * 100, 2),
+            "trend_slope": round(slope, 4),
+        }
+
+    # ── compact serialization ──
+    def to_bytes(self) -> bytes:
+        """Header of scalars plus only the filled part of the ring buffer (≤ 1.7 KB)."""
+        filled = self._last(_BUFFER)
+        header = _HEADER.pack(
+            _STATE_VERSION, self.n, len(filled),
+            *(float(getattr(self, name)) for name in _SCALARS[1:]),
+        )
+        return header + filled.astype("<f8").tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "IndicatorState":
+        version, n, filled, *scalars = _HEADER.unpack_from(data)
+        if version != _STATE_VERSION:
+            raise ValueError(f"Unsupported IndicatorState version {version}")
+        state = cls()
+        state.n = n
+        for name, value in zip(_SCALARS[1:], scalars):
+            setattr(state, name, value)
+        tail = np.frombuffer(data, dtype="<f8", count=filled, offset=_HEADER.size)
+        state.buf[:filled] = tail
+        state.head = filled % _BUFFER
+        return state
@@ -0,0 +1,65 @@
+import sys
+import threading
+import importlib
+
+# ─────────────────────────────────────────────
+#  LAZY MODULE IMPORTS
+#  For dependencies used throughout a module's
+#  functions, where importing inside each one would
+#  be noise (numpy). The module-level name is a proxy
+#  until the first attribute access, which imports
+#  the real module and rebinds that name in every
+#  module that asked for it, so later calls pay
+#  nothing. Names evaluated at import time (default
+#  arguments, annotations without
+#  `from __future__ import annotations`, module
+#  constants) would defeat it.
+#
+#    np = lazy_import("numpy", __name__, "np")
+# ─────────────────────────────────────────────
+_lock = threading.Lock()
+_proxies: dict[str, "_LazyModule"] = {}
+
+
+class _LazyModule:
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+        self._bound: list[tuple[str, str]] = []
+
+    def _load(self):
+        with _lock:
+            if self._module is None:
+                module = importlib.import_module(self._name)
+                for owner, alias in self._bound:
+                    target = sys.modules.get(owner)
+                    if target is not None and getattr(target, alias, None) is self:
+                        setattr(target, alias, module)
+                self._module = module
+        return self._module
+
+    def __getattr__(self, attr: str):
+        return getattr(self._module or self._load(), attr)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module {self._name!r} ({state})>"
+
+
+def lazy_import(name: str, owner: str, alias: str):
+    """`name` if it is already imported, else a proxy that imports it on first use."""
+    if name in sys.modules:
+        return sys.modules[name]
+    with _lock:
+        proxy = _proxies.get(name)
+        if proxy is None:
+            proxy = _proxies[name] = _LazyModule(name)
+        if proxy._module is not None:
+            return proxy._module
+        proxy._bound.append((owner, alias))
+        return proxy
+
+
+def loaded(name: str) -> bool:
+    """Whether `name` has really been imported (not just proxied)."""
+    return name in sys.modules
@@ -0,0 +1,386 @@
+from __future__ import annotations
+
+import os
+import re
+import json
+import time
+import queue
+import asyncio
+import socket
+import sqlite3
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import history_store
+import market_data
+import metrics
+import rate_limit
+import warm_start
+from genai import fetch_prices, predict_signal
+from indicators import IndicatorState
+from lazy_imports import lazy_import
+
+np = lazy_import("numpy", __name__, "np")
+
+log = logging.getLogger(__name__)
+
+# ─────────────────────────────────────────────
+#  LIVE PRICE FEED
+#  Browsers subscribe (SSE) to the tickers on screen.
+#  Every worker heartbeats the tickers its own clients
+#  watch into a small SQLite broker; one worker per
+#  host (whoever holds live.lock) polls each watched
+#  ticker once per interval, however many clients are
+#  on it, and writes a quote only when the price or
+#  signal moved. Each worker tails that table once a
+#  tick and fans the changed fields out to its own
+#  subscribers, so an idle subscriber costs a queue
+#  and a dict entry, not a thread or a poll.
+#
+#  LIVE_POLL_SEC      upstream poll interval while the market is open
+#  LIVE_TICK_SEC      how often each worker heartbeats / reads the broker
+# ─────────────────────────────────────────────
+POLL_SEC = float(os.getenv("LIVE_POLL_SEC", "15"))
+# Closed markets still get an occasional poll (late prints, the next day's first bar)
+CLOSED_POLL_SEC = float(os.getenv("LIVE_CLOSED_POLL_SEC", "900"))
+TICK_SEC = float(os.getenv("LIVE_TICK_SEC", "1"))
+# SSE comment sent to idle streams so proxies don't time them out
+KEEPALIVE_SEC = 15
+MAX_TICKERS = 10
+# Undelivered events kept per subscriber; a stalled client loses the oldest
+QUEUE_SIZE = 32
+# Heartbeats older than this many ticks mean the worker (or its clients) went away
+_HEARTBEAT_TICKS = 5
+
+# Fields a client renders; a quote is published (and a delta sent) only when one changes
+QUOTE_FIELDS = ("current_price", "change_pct", "signal", "score", "confidence")
+
+_TICKER_RE = re.compile(r"\^?[A-Z0-9&\-]{1,12}(?:\.[A-Z]{1,3})?")
+
+SUBSCRIBERS = metrics.register(metrics.Gauge(
+    "aria_live_subscribers", "Open live-price streams in this worker.",
+    fn=lambda: hub.subscriber_count(),
+))
+UPDATES = metrics.register(metrics.Counter(
+    "aria_live_updates", "Live quotes polled upstream, published on change, and delivered to streams.", ("stage",)
+))
+
+
+def parse_tickers(raw: str) -> list[str]:
+    tickers = [t.strip().upper() for t in raw.split(",")]
+    return list(dict.fromkeys(t for t in tickers if _TICKER_RE.fullmatch(t)))[:MAX_TICKERS]
+
+
+def offer(q: queue.Queue | asyncio.Queue, item) -> None:
+    """put_nowait that drops the oldest queued event instead of failing when full."""
+    while True:
+        try:
+            q.put_nowait(item)
+            return
+        except (queue.Full, asyncio.QueueFull):
+            try:
+                q.get_nowait()
+            except (queue.Empty, asyncio.QueueEmpty):
+                pass
+
+
+def _db_path() -> str:
+    return os.getenv("LIVE_DB_PATH") or os.path.join(os.path.dirname(history_store.DB_PATH), "live.db")
+
+
+# ─────────────────────────────────────────────
+#  BROKER (shared by every worker on the host)
+# ─────────────────────────────────────────────
+class Broker:
+    def __init__(self, path: str | None = None):
+        self.path = path or _db_path()
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS live_subs ("
+                " worker TEXT NOT NULL, ticker TEXT NOT NULL, expires REAL NOT NULL,"
+                " PRIMARY KEY (worker, ticker))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS live_quotes ("
+                " ticker TEXT PRIMARY KEY, seq INTEGER NOT NULL, quote TEXT, polled REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS live_quotes_seq ON live_quotes (seq)")
+            self._local.conn = conn
+        return conn
+
+    def heartbeat(self, worker: str, tickers: list[str], ttl: float) -> None:
+        conn = self._conn()
+        expires = time.time() + ttl
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM live_subs WHERE worker = ?", (worker,))
+            conn.executemany(
+                "INSERT INTO live_subs VALUES (?, ?, ?)", [(worker, t, expires) for t in tickers]
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def watched(self) -> list[tuple[str, float | None]]:
+        """(ticker, last polled) for every ticker some live worker has a subscriber on."""
+        now = time.time()
+        conn = self._conn()
+        conn.execute("DELETE FROM live_subs WHERE expires < ?", (now,))
+        return conn.execute(
+            "SELECT s.ticker, q.polled FROM (SELECT DISTINCT ticker FROM live_subs) s"
+            " LEFT JOIN live_quotes q ON q.ticker = s.ticker"
+        ).fetchall()
+
+    def publish(self, ticker: str, quote: dict | None) -> bool:
+        """Store a fresh poll; bump seq (so readers see it) only if a client-visible field moved."""
+        conn = self._conn()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT quote FROM live_quotes WHERE ticker = ?", (ticker,)).fetchone()
+            previous = json.loads(row[0]) if row and row[0] else None
+            changed = quote is not None and (
+                previous is None or any(previous.get(k) != quote.get(k) for k in QUOTE_FIELDS)
+            )
+            if changed:
+                seq = conn.execute("SELECT COALESCE(MAX(seq), 0) + 1 FROM live_quotes").fetchone()[0]
+                conn.execute(
+                    "INSERT OR REPLACE INTO live_quotes VALUES (?, ?, ?, ?)",
+                    (ticker, seq, json.dumps(quote), now),
+                )
+            elif row:
+                conn.execute("UPDATE live_quotes SET polled = ? WHERE ticker = ?", (now, ticker))
+            else:
+                # Nothing to show yet (no data); remember the attempt so it isn't retried every tick
+                conn.execute("INSERT INTO live_quotes VALUES (?, 0, NULL, ?)", (ticker, now))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return changed
+
+    def changes(self, since: int) -> list[tuple[int, str, dict]]:
+        rows = self._conn().execute(
+            "SELECT seq, ticker, quote FROM live_quotes WHERE seq > ? ORDER BY seq", (since,)
+        ).fetchall()
+        return [(seq, ticker, json.loads(quote)) for seq, ticker, quote in rows if quote]
+
+
+# ─────────────────────────────────────────────
+#  QUOTES
+# ─────────────────────────────────────────────
+# ticker -> ((bars, last stored date), serialized IndicatorState up to yesterday)
+_base_states: dict[str, tuple[tuple[int, int], bytes]] = {}
+
+
+def _base_state(ticker: str, before: int) -> tuple[IndicatorState, float] | None:
+    """Indicator state over the stored closes before day ordinal `before`, plus the last of them."""
+    series = history_store.load_series(ticker, history_store.period_start("1y"))
+    if series is None:
+        warm = warm_start.base_state(ticker, before)
+        if warm is not None:
+            return warm
+        series = fetch_prices(ticker)
+    if series is None:
+        return None
+    n = int(np.searchsorted(series.dates, before))
+    if n == 0:
+        return None
+    key = (n, int(series.dates[n - 1]))
+    cached = _base_states.get(ticker)
+    if cached is None or cached[0] != key:
+        cached = _base_states[ticker] = (key, IndicatorState.from_closes(series.close[:n]).to_bytes())
+    return IndicatorState.from_bytes(cached[1]), float(series.close[n - 1])
+
+
+def build_quote(ticker: str, bars) -> dict | None:
+    """Signal-card fields for the latest polled bar: one O(1) indicator update on top of history."""
+    if bars is None or bars.empty:
+        return None
+    last_day = bars.index[-1]
+    price = float(bars["Close"].iloc[-1])
+    base = _base_state(ticker, last_day.toordinal())
+    if base is None or np.isnan(price):
+        return None
+    state, previous_close = base
+    indicators = state.update(price)
+    prediction = predict_signal(indicators)
+    return {
+        "ticker": ticker,
+        "currency": "₹" if ticker.endswith(".NS") else "$",
+        "current_price": indicators["current_price"],
+        "change_pct": round((price / previous_close - 1) * 100, 2),
+        "signal": prediction["signal"],
+        "score": prediction["score"],
+        "confidence": prediction["confidence"],
+        "as_of": last_day.date().isoformat(),
+    }
+
+
+# ─────────────────────────────────────────────
+#  PER-WORKER HUB
+# ─────────────────────────────────────────────
+class Subscription:
+    def __init__(self, hub: "LiveHub", tickers: list[str], deliver):
+        self.hub = hub
+        self.tickers = tickers
+        # deliver(event, payload) runs on the hub thread and must not block
+        self.deliver = deliver
+
+    def close(self) -> None:
+        self.hub._unsubscribe(self)
+
+
+class LiveHub:
+    def __init__(self, broker: Broker | None = None):
+        self.broker = broker or Broker()
+        self._lock = threading.Lock()
+        self._by_ticker: dict[str, set[Subscription]] = {}
+        self._pending: set[Subscription] = set()
+        self._quotes: dict[str, dict] = {}
+        self._seq = 0
+        self._wake = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._poll_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="live-poll")
+        self._polling = None
+        self._lock_handle = None
+        self._heartbeat_empty = False
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len({sub for subs in self._by_ticker.values() for sub in subs})
+
+    def subscribe(self, tickers: list[str], deliver) -> Subscription:
+        sub = Subscription(self, tickers, deliver)
+        with self._lock:
+            for ticker in tickers:
+                self._by_ticker.setdefault(ticker, set()).add(sub)
+            self._pending.add(sub)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="live-hub", daemon=True)
+                self._thread.start()
+        self._wake.set()
+        return sub
+
+    def _unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            for ticker in sub.tickers:
+                subs = self._by_ticker.get(ticker)
+                if subs is not None:
+                    subs.discard(sub)
+                    if not subs:
+                        del self._by_ticker[ticker]
+
+    # ── hub thread ──
+    def _run(self) -> None:
+        # pid is read here, after any pre-fork import, so each worker has its own id
+        worker = f"{socket.gethostname()}:{os.getpid()}"
+        while True:
+            try:
+                self._tick(worker)
+            except Exception:
+                log.exception("live price tick failed")
+            self._wake.wait(TICK_SEC)
+            self._wake.clear()
+
+    def _tick(self, worker: str) -> None:
+        with self._lock:
+            tickers = list(self._by_ticker)
+            pending, self._pending = self._pending, set()
+        # An idle worker clears its rows once, then stops writing
+        if tickers or not self._heartbeat_empty:
+            self.broker.heartbeat(worker, tickers, TICK_SEC * _HEARTBEAT_TICKS)
+            self._heartbeat_empty = not tickers
+
+        if self._is_poller() and (self._polling is None or self._polling.done()):
+            watched = self.broker.watched()
+            for ticker in set(_base_states) - {t for t, _ in watched}:
+                _base_states.pop(ticker, None)
+            due = self._due(watched)
+            if due:
+                self._polling = self._poll_pool.submit(self._poll, due)
+
+        for seq, ticker, quote in self.broker.changes(self._seq):
+            self._seq = max(self._seq, seq)
+            previous = self._quotes.get(ticker)
+            self._quotes[ticker] = quote
+            delta = {k: v for k, v in quote.items() if previous is None or previous.get(k) != v}
+            delta["ticker"] = ticker
+            with self._lock:
+                subs = list(self._by_ticker.get(ticker, ()))
+            for sub in subs:
+                if sub not in pending:
+                    self._deliver(sub, "quote", delta)
+
+        # New subscribers get the full current quote, then deltas from here on
+        for sub in pending:
+            for ticker in sub.tickers:
+                if ticker in self._quotes:
+                    self._deliver(sub, "quote", self._quotes[ticker])
+
+    def _deliver(self, sub: Subscription, event: str, payload: dict) -> None:
+        try:
+            sub.deliver(event, payload)
+            UPDATES.inc("delivered")
+        except Exception:
+            log.exception("live price delivery failed")
+
+    def _is_poller(self) -> bool:
+        """One poller per host: whoever holds live.lock (released when the process exits)."""
+        if self._lock_handle is not None:
+            return True
+        try:
+            import fcntl
+        except ImportError:
+            return True   # no cross-process lock here (Windows): every worker polls
+        path = os.path.join(os.path.dirname(self.broker.path) or ".", "live.lock")
+        handle = open(path, "w")
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            return False
+        self._lock_handle = handle
+        return True
+
+    @staticmethod
+    def _due(watched: list[tuple[str, float | None]]) -> list[str]:
+        now = time.time()
+        due = []
+        for ticker, polled in watched:
+            interval = POLL_SEC if history_store.is_market_open(history_store.exchange_for(ticker)) else CLOSED_POLL_SEC
+            if polled is None or now - polled >= interval:
+                due.append(ticker)
+        return due
+
+    def _poll(self, tickers: list[str]) -> None:
+        rate_limit.set_priority(rate_limit.BATCH)
+        try:
+            frames = market_data.provider.history_many(tickers, period="5d")
+        except Exception:
+            metrics.UPSTREAM_ERRORS.inc(f"{market_data.provider.name}_download")
+            log.exception("live price poll failed for %d tickers", len(tickers))
+            return
+        UPDATES.inc("polled", amount=len(tickers))
+        for ticker in tickers:
+            try:
+                quote = build_quote(ticker, frames.get(ticker))
+            except Exception:
+                log.exception("live quote failed for %s", ticker)
+                quote = None
+            if self.broker.publish(ticker, quote):
+                UPDATES.inc("published")
+        self._wake.set()
+
+
+hub = LiveHub()
@@ -0,0 +1,352 @@
+from __future__ import annotations
+
+import os
+import sys
+import json
+import sqlite3
+import argparse
+import threading
+import datetime as dt
+from typing import TYPE_CHECKING
+
+import rate_limit
+from history_store import PERIOD_DAYS, COLUMNS
+
+# pandas and yfinance are imported where used: they are most of a worker's
+# import time, and a booting worker can serve "/" and warm answers without them
+if TYPE_CHECKING:
+    import pandas as pd
+
+# ─────────────────────────────────────────────
+#  MARKET DATA PROVIDERS
+#  Everything upstream of the history store goes
+#  through one of these: yfinance over the network,
+#  or a local store (CSV / Parquet directory, or a
+#  SQLite file) filled out of band by the bulk loader
+#
+#    python market_data.py load --out data/market
+#
+#  MARKET_DATA_PROVIDER=local MARKET_DATA_PATH=... picks
+#  the local store; the default is yfinance.
+# ─────────────────────────────────────────────
+_PERIOD_DAYS = {"5d": 7, **PERIOD_DAYS}
+
+
+def _empty() -> pd.DataFrame:
+    import pandas as pd
+    return pd.DataFrame(columns=COLUMNS, index=pd.DatetimeIndex([], name="Date"))
+
+
+def _clip(df: pd.DataFrame, period: str | None, start: dt.date | None) -> pd.DataFrame:
+    import pandas as pd
+    if start is not None:
+        return df[df.index >= pd.Timestamp(start)]
+    days = _PERIOD_DAYS.get(period or "1y")
+    if days is None:
+        # "max", "ytd" and friends: the local store holds what it holds
+        return df
+    return df[df.index >= pd.Timestamp(dt.date.today() - dt.timedelta(days=days))]
+
+
+def _scalar_info(info: dict) -> dict:
+    return {k: v for k, v in info.items() if isinstance(v, (str, int, float, bool))}
+
+
+class MarketDataProvider:
+    """
+    history() frames have a DatetimeIndex and the Open/High/Low/Close/Volume
+    columns, and are empty (not None) when there is nothing to return. info()
+    returns yfinance-style keys (longName, trailingPE, ...).
+    """
+    name = "base"
+
+    def history(self, ticker: str, period: str = "1y", start: dt.date | None = None) -> pd.DataFrame:
+        raise NotImplementedError
+
+    def history_many(self, tickers: list[str], period: str = "1y",
+                     start: dt.date | None = None) -> dict[str, pd.DataFrame]:
+        frames = {}
+        for ticker in tickers:
+            df = self.history(ticker, period, start)
+            if not df.empty:
+                frames[ticker] = df
+        return frames
+
+    def info(self, ticker: str) -> dict:
+        raise NotImplementedError
+
+
+class YFinanceProvider(MarketDataProvider):
+    """Network provider; every call goes through the shared yfinance rate limiter."""
+    name = "yfinance"
+
+    def history(self, ticker: str, period: str = "1y", start: dt.date | None = None) -> pd.DataFrame:
+        import yfinance as yf
+        kwargs = {"start": start.isoformat()} if start is not None else {"period": period}
+        return rate_limit.call(self.name, yf.Ticker(ticker).history, **kwargs)
+
+    def history_many(self, tickers: list[str], period: str = "1y",
+                     start: dt.date | None = None) -> dict[str, pd.DataFrame]:
+        import pandas as pd
+        import yfinance as yf
+        kwargs = {"start": start.isoformat()} if start is not None else {"period": period}
+        # One batched call for the lot; it still fans out per ticker, so it costs a token each (up to a burst)
+        data = rate_limit.call(
+            self.name, yf.download, tickers, cost=len(tickers),
+            group_by="ticker", auto_adjust=True, threads=True, progress=False, **kwargs,
+        )
+        frames = {}
+        for ticker in tickers:
+            try:
+                df = data[ticker] if isinstance(data.columns, pd.MultiIndex) else data
+                df = df.dropna(how="all")
+            except KeyError:
+                continue
+            if not df.empty:
+                frames[ticker] = df
+        return frames
+
+    def info(self, ticker: str) -> dict:
+        import yfinance as yf
+        return rate_limit.call(self.name, lambda: yf.Ticker(ticker).info)
+
+
+class LocalFileProvider(MarketDataProvider):
+    """A directory of <TICKER>.parquet or <TICKER>.csv files plus info.json."""
+    name = "local"
+
+    def __init__(self, root: str):
+        self.root = root
+        self._lock = threading.Lock()
+        # ticker -> (mtime, frame); files are re-read only when the loader rewrites them
+        self._frames: dict[str, tuple[float, pd.DataFrame]] = {}
+        self._infos: tuple[float, dict] = (0.0, {})
+
+    def _path(self, ticker: str) -> str | None:
+        for ext in (".parquet", ".csv"):
+            path = os.path.join(self.root, ticker + ext)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def _frame(self, ticker: str) -> pd.DataFrame | None:
+        path = self._path(ticker)
+        if path is None:
+            return None
+        mtime = os.path.getmtime(path)
+        with self._lock:
+            cached = self._frames.get(ticker)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        import pandas as pd
+        if path.endswith(".parquet"):
+            df = pd.read_parquet(path)
+        else:
+            df = pd.read_csv(path, index_col=0, parse_dates=True)
+        df.index.name = "Date"
+        with self._lock:
+            self._frames[ticker] = (mtime, df)
+        return df
+
+    def history(self, ticker: str, period: str = "1y", start: dt.date | None = None) -> pd.DataFrame:
+        df = self._frame(ticker)
+        if df is None:
+            return _empty()
+        return _clip(df, period, start).copy()
+
+    def info(self, ticker: str) -> dict:
+        path = os.path.join(self.root, "info.json")
+        if not os.path.exists(path):
+            return {}
+        mtime = os.path.getmtime(path)
+        with self._lock:
+            if self._infos[0] != mtime:
+                with open(path) as f:
+                    self._infos = (mtime, json.load(f))
+            return dict(self._infos[1].get(ticker, {}))
+
+    # ── bulk loader side ──
+    def write(self, ticker: str, df: pd.DataFrame, fmt: str = "csv") -> None:
+        import pandas as pd
+        os.makedirs(self.root, exist_ok=True)
+        df = df[COLUMNS].copy()
+        df.index = pd.DatetimeIndex(df.index).tz_localize(None).normalize()
+        df.index.name = "Date"
+        # Write then rename so readers never see a half-written file
+        path = os.path.join(self.root, f"{ticker}.{fmt}")
+        tmp = path + ".tmp"
+        if fmt == "parquet":
+            df.to_parquet(tmp)
+        else:
+            df.to_csv(tmp)
+        os.replace(tmp, path)
+
+    def write_infos(self, infos: dict[str, dict]) -> None:
+        os.makedirs(self.root, exist_ok=True)
+        path = os.path.join(self.root, "info.json")
+        existing = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                existing = json.load(f)
+        existing.update(infos)
+        with open(path + ".tmp", "w") as f:
+            json.dump(existing, f)
+        os.replace(path + ".tmp", path)
+
+
+class SQLiteProvider(MarketDataProvider):
+    """Every ticker's bars in one SQLite file, keyed (ticker, date)."""
+    name = "sqlite"
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._conn() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS bars ("
+                " ticker TEXT NOT NULL, date TEXT NOT NULL,"
+                " open REAL, high REAL, low REAL, close REAL, volume REAL,"
+                " PRIMARY KEY (ticker, date)) WITHOUT ROWID"
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS info (ticker TEXT PRIMARY KEY, payload TEXT NOT NULL)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def history(self, ticker: str, period: str = "1y", start: dt.date | None = None) -> pd.DataFrame:
+        if start is None:
+            days = _PERIOD_DAYS.get(period or "1y")
+            start = dt.date.today() - dt.timedelta(days=days) if days is not None else dt.date.min
+        rows = self._conn().execute(
+            "SELECT date, open, high, low, close, volume FROM bars"
+            " WHERE ticker = ? AND date >= ? ORDER BY date",
+            (ticker, start.isoformat()),
+        ).fetchall()
+        if not rows:
+            return _empty()
+        import pandas as pd
+        df = pd.DataFrame(rows, columns=["Date", *COLUMNS])
+        df.index = pd.DatetimeIndex(pd.to_datetime(df.pop("Date")), name="Date")
+        return df
+
+    def info(self, ticker: str) -> dict:
+        row = self._conn().execute("SELECT payload FROM info WHERE ticker = ?", (ticker,)).fetchone()
+        return json.loads(row[0]) if row else {}
+
+    # ── bulk loader side ──
+    def write(self, ticker: str, df: pd.DataFrame, fmt: str | None = None) -> None:
+        import pandas as pd
+        index = pd.DatetimeIndex(df.index).tz_localize(None)
+        rows = [
+            (ticker, d.date().isoformat(), float(r.Open), float(r.High), float(r.Low), float(r.Close), float(r.Volume))
+            for d, r in zip(index, df[COLUMNS].itertuples(index=False))
+        ]
+        with self._conn() as conn:
+            # Replace the ticker's series wholesale, in one transaction
+            conn.execute("DELETE FROM bars WHERE ticker = ?", (ticker,))
+            conn.executemany("INSERT INTO bars VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def write_infos(self, infos: dict[str, dict]) -> None:
+        with self._conn() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO info VALUES (?, ?)",
+                [(ticker, json.dumps(info)) for ticker, info in infos.items()],
+            )
+
+
+def open_local(path: str) -> LocalFileProvider | SQLiteProvider:
+    if path.endswith((".db", ".sqlite", ".sqlite3")):
+        return SQLiteProvider(path)
+    return LocalFileProvider(path)
+
+
+def create_provider() -> MarketDataProvider:
+    backend = os.getenv("MARKET_DATA_PROVIDER", "yfinance").lower()
+    if backend == "local":
+        path = os.getenv(
+            "MARKET_DATA_PATH",
+            os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "market"),
+        )
+        return open_local(path)
+    return YFinanceProvider()
+
+
+provider = create_provider()
+
+
+# ─────────────────────────────────────────────
+#  BULK LOADER
+# ─────────────────────────────────────────────
+def bulk_load(target: LocalFileProvider | SQLiteProvider, tickers: list[str], period: str = "10y",
+              batch_size: int = 100, with_info: bool = True, fmt: str = "csv",
+              source: MarketDataProvider | None = None) -> dict:
+    """Fill a local store for a whole universe: batched history, then .info per ticker."""
+    source = source or YFinanceProvider()
+    loaded, missing = [], []
+    for i in range(0, len(tickers), batch_size):
+        batch = tickers[i:i + batch_size]
+        try:
+            frames = source.history_many(batch, period)
+        except Exception as e:
+            print(f"batch {i // batch_size} failed: {e}", file=sys.stderr)
+            frames = {}
+        for ticker in batch:
+            df = frames.get(ticker)
+            if df is None or df.empty:
+                missing.append(ticker)
+                continue
+            target.write(ticker, df, fmt)
+            loaded.append(ticker)
+
+    if with_info:
+        infos = {}
+        for ticker in loaded:
+            try:
+                infos[ticker] = _scalar_info(source.info(ticker))
+            except Exception:
+                continue
+        target.write_infos(infos)
+    return {"loaded": len(loaded), "missing": missing}
+
+
+def _read_tickers(arg: str | None) -> list[str]:
+    if not arg:
+        from genai import INDIAN_STOCKS, US_STOCKS
+        return list(dict.fromkeys([*INDIAN_STOCKS.values(), *US_STOCKS.values()]))
+    if os.path.exists(arg):
+        with open(arg) as f:
+            return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    return [t.strip() for t in arg.split(",") if t.strip()]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Market data store tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+    load = sub.add_parser("load", help="bulk-load history (+ .info) from yfinance into a local store")
+    load.add_argument("--out", required=True, help="directory (CSV/Parquet) or .db file (SQLite)")
+    load.add_argument("--tickers", help="comma list or file, one per line (default: built-in universe)")
+    load.add_argument("--period", default="10y")  # the 5y chart fetches 10y for MA200 warm-up
+    load.add_argument("--batch-size", type=int, default=100)
+    load.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    load.add_argument("--no-info", action="store_true")
+    args = parser.parse_args()
+
+    tickers = _read_tickers(args.tickers)
+    rate_limit.set_priority(rate_limit.BATCH)
+    result = bulk_load(open_local(args.out), tickers, args.period, args.batch_size,
+                       with_info=not args.no_info, fmt=args.format)
+    print(f"loaded {result['loaded']}/{len(tickers)} tickers into {args.out}")
+    if result["missing"]:
+        print("missing: " + ", ".join(result["missing"]), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,222 @@
+import os
+import time
+import bisect
+import threading
+import contextvars
+from contextlib import contextmanager
+from functools import partial
+from typing import Callable
+
+# ─────────────────────────────────────────────
+#  LIGHTWEIGHT METRICS
+#  Per-stage latency histograms, counters and gauges,
+#  rendered in Prometheus text format at /metrics.
+#  Stages timed during a request are also collected
+#  for that request's Server-Timing header. Values are
+#  per worker process; Prometheus scrapes each one.
+#
+#  METRICS=0 turns timing into a no-op.
+# ─────────────────────────────────────────────
+ENABLED = os.getenv("METRICS", "1") != "0"
+
+# Seconds; spans a warm cache read through a slow Groq reply
+STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_text(names: tuple[str, ...], values: tuple) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        for values, value in items:
+            yield f"{self.name}_total{_label_text(self.labels, values)} {value}"
+
+
+class Gauge:
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, labels: tuple[str, ...] = (),
+                 fn: Callable[[], float] | None = None):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        # Read-at-scrape gauges (queue sizes, store sizes) pass fn instead of being set
+        self.fn = fn
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def dec(self, *label_values, amount: float = 1.0) -> None:
+        self.inc(*label_values, amount=-amount)
+
+    def set(self, value: float, *label_values) -> None:
+        with self._lock:
+            self._values[label_values] = value
+
+    @contextmanager
+    def track(self, *label_values):
+        self.inc(*label_values)
+        try:
+            yield
+        finally:
+            self.dec(*label_values)
+
+    def samples(self):
+        if self.fn is not None:
+            try:
+                yield f"{self.name} {float(self.fn())}"
+            except Exception:
+                pass
+            return
+        with self._lock:
+            items = list(self._values.items())
+        for values, value in items:
+            yield f"{self.name}{_label_text(self.labels, values)} {value}"
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: tuple[str, ...] = (),
+                 buckets: tuple[float, ...] = STAGE_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.buckets = buckets
+        # label values -> [per-bucket counts (+Inf last), sum]
+        self._series: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values) -> None:
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][i] += 1
+            series[1] += value
+
+    def samples(self):
+        with self._lock:
+            items = [(values, list(counts), total) for values, (counts, total) in self._series.items()]
+        for values, counts, total in items:
+            running = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                running += count
+                labels = _label_text((*self.labels, "le"), (*values, bound))
+                yield f"{self.name}_bucket{labels} {running}"
+            labels = _label_text(self.labels, values)
+            yield f"{self.name}_sum{labels} {total}"
+            yield f"{self.name}_count{labels} {running}"
+
+
+REGISTRY: list = []
+
+
+def register(metric):
+    REGISTRY.append(metric)
+    return metric
+
+
+def render() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.samples())
+    return "\n".join(lines) + "\n"
+
+
+STAGE_SECONDS = register(Histogram(
+    "aria_stage_seconds", "Time spent in each stage of a chat / analysis request.", ("stage",)
+))
+REQUEST_SECONDS = register(Histogram(
+    "aria_request_seconds", "End-to-end request latency by endpoint.", ("endpoint",)
+))
+UPSTREAM_ERRORS = register(Counter(
+    "aria_upstream_errors", "Failed calls to yfinance / Groq.", ("source",)
+))
+CACHE_LOOKUPS = register(Counter(
+    "aria_cache_lookups", "Cache lookups by cache and result (hit / miss).", ("cache", "result")
+))
+IN_FLIGHT = register(Gauge(
+    "aria_in_flight", "Requests / upstream calls currently in progress.", ("what",)
+))
+
+
+# ─────────────────────────────────────────────
+#  PER-REQUEST STAGE TIMINGS
+# ─────────────────────────────────────────────
+_timings: contextvars.ContextVar[list | None] = contextvars.ContextVar("stage_timings", default=None)
+
+
+def begin_request() -> list:
+    """Start collecting stage timings for the current request (thread / task)."""
+    timings = []
+    _timings.set(timings)
+    return timings
+
+
+@contextmanager
+def stage(name: str):
+    if not ENABLED:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, name)
+        timings = _timings.get()
+        if timings is not None:
+            timings.append((name, elapsed))
+
+
+def timed(name: str, fn: Callable, *args, **kwargs):
+    with stage(name):
+        return fn(*args, **kwargs)
+
+
+def bind(fn: Callable) -> Callable:
+    """
+    fn bound to a copy of the caller's context, so stages it times on a pool
+    thread still land in the calling request's Server-Timing.
+    """
+    return partial(contextvars.copy_context().run, fn)
+
+
+def cache_lookup(cache: str, hit: bool) -> None:
+    CACHE_LOOKUPS.inc(cache, "hit" if hit else "miss")
+
+
+def server_timing(timings: list, total: float | None = None) -> str:
+    parts = [f"{name};dur={elapsed * 1000:.1f}" for name, elapsed in timings]
+    if total is not None:
+        parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
@@ -0,0 +1,177 @@
+import os
+import sys
+import time
+import heapq
+import logging
+import threading
+from collections import OrderedDict
+
+import history_store
+import rate_limit
+from genai import INDIAN_STOCKS, US_STOCKS, fetch_bulk_history, get_stock_info, build_analysis
+
+# ─────────────────────────────────────────────
+#  BACKGROUND PREFETCH SCHEDULER
+#  Keeps history, .info and the finished analysis
+#  warm for the built-in universe (plus any ticker a
+#  user had to fetch cold), so chat requests read
+#  results instead of paying yfinance latency.
+#
+#  One scheduler per host: either a dedicated process
+#      python prefetch.py
+#  or PREFETCH=thread in the app's environment, where
+#  only the worker that wins data/prefetch.lock runs it.
+# ─────────────────────────────────────────────
+INTERACTIVE, BACKGROUND = 0, 1
+
+TICK_SECONDS = float(os.getenv("PREFETCH_TICK_SEC", "30"))
+BATCH_SIZE = int(os.getenv("PREFETCH_BATCH_SIZE", "20"))
+# Pause between upstream batches, and between per-ticker .info calls
+BATCH_STAGGER = float(os.getenv("PREFETCH_BATCH_STAGGER_SEC", "2.0"))
+INFO_STAGGER = float(os.getenv("PREFETCH_INFO_STAGGER_SEC", "0.25"))
+MAX_EXTRA_TICKERS = 500
+# Extra tickers nobody has asked about for this long drop out of the refresh rounds
+EXTRA_TTL = float(os.getenv("PREFETCH_EXTRA_TTL_SEC", str(7 * 86400)))
+
+LOCK_PATH = os.path.join(os.path.dirname(history_store.DB_PATH), "prefetch.lock")
+
+log = logging.getLogger("prefetch")
+
+
+class PrefetchScheduler:
+    def __init__(self, tickers: list[str] | None = None):
+        self.universe = tickers or list(dict.fromkeys([*INDIAN_STOCKS.values(), *US_STOCKS.values()]))
+        # Tickers outside the universe that users asked about -> when, most recent last
+        self.extra: OrderedDict[str, float] = OrderedDict()
+        self._heap: list[tuple[int, int, str]] = []
+        self._best: dict[str, int] = {}
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    # ── queue ──
+    def request(self, ticker: str, priority: int = INTERACTIVE) -> None:
+        with self._lock:
+            if self._best.get(ticker, priority + 1) <= priority:
+                return
+            self._best[ticker] = priority
+            self._seq += 1
+            heapq.heappush(self._heap, (priority, self._seq, ticker))
+
+    def _pop_batch(self) -> list[str]:
+        batch = []
+        with self._lock:
+            while self._heap and len(batch) < BATCH_SIZE:
+                priority, _, ticker = heapq.heappop(self._heap)
+                # Skip entries superseded by a higher-priority push
+                if self._best.get(ticker) == priority:
+                    del self._best[ticker]
+                    batch.append(ticker)
+        return batch
+
+    def _drain_interest(self) -> None:
+        now = time.time()
+        for ticker in history_store.pop_interest():
+            if ticker not in self.universe:
+                self.extra.pop(ticker, None)
+                self.extra[ticker] = now
+                if len(self.extra) > MAX_EXTRA_TICKERS:
+                    self.extra.popitem(last=False)
+            self.request(ticker, INTERACTIVE)
+        while self.extra and next(iter(self.extra.values())) < now - EXTRA_TTL:
+            self.extra.popitem(last=False)
+
+    def _is_due(self, ticker: str) -> bool:
+        hit = history_store.load_warm("analysis", ticker)
+        return hit is None or history_store.is_stale(ticker, hit[1])
+
+    # ── work ──
+    def refresh(self, tickers: list[str]) -> int:
+        series = fetch_bulk_history(tickers)
+        done = 0
+        for ticker in tickers:
+            prices = series.get(ticker)
+            if prices is None:
+                continue
+            info = get_stock_info(ticker)
+            analysis = build_analysis(ticker, ticker, prices, info)
+            # No .info means placeholder name and fundamentals; leave it due for the next pass
+            if "error" not in analysis and info:
+                history_store.save_warm("analysis", ticker, analysis)
+                done += 1
+            time.sleep(INFO_STAGGER)
+        return done
+
+    def run_once(self) -> int:
+        """Queue everything due (interactive misses first) and work through it."""
+        self._drain_interest()
+        for ticker in [*self.universe, *self.extra]:
+            if self._is_due(ticker):
+                self.request(ticker, BACKGROUND)
+
+        refreshed = 0
+        while not self._stop.is_set():
+            # New interactive misses jump ahead of the remaining background work
+            self._drain_interest()
+            batch = self._pop_batch()
+            if not batch:
+                break
+            try:
+                refreshed += self.refresh(batch)
+            except Exception:
+                log.exception("prefetch batch failed: %s", batch)
+            self._stop.wait(BATCH_STAGGER)
+        return refreshed
+
+    def run_forever(self) -> None:
+        # Upstream calls from here queue behind interactive and batch work
+        rate_limit.set_priority(rate_limit.PREFETCH)
+        while not self._stop.is_set():
+            started = time.monotonic()
+            refreshed = self.run_once()
+            if refreshed:
+                log.info("prefetch refreshed %d tickers in %.1fs", refreshed, time.monotonic() - started)
+            self._stop.wait(TICK_SECONDS)
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+# ─────────────────────────────────────────────
+#  SINGLE-OWNER STARTUP
+# ─────────────────────────────────────────────
+_lock_file = None
+scheduler: PrefetchScheduler | None = None
+
+
+def acquire_owner_lock() -> bool:
+    global _lock_file
+    try:
+        import fcntl
+    except ImportError:
+        return True
+    os.makedirs(os.path.dirname(LOCK_PATH), exist_ok=True)
+    handle = open(LOCK_PATH, "w")
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        handle.close()
+        return False
+    _lock_file = handle   # held for the life of the process
+    return True
+
+
+def start_in_background() -> PrefetchScheduler | None:
+    global scheduler
+    if scheduler is not None or not acquire_owner_lock():
+        return scheduler
+    scheduler = PrefetchScheduler()
+    threading.Thread(target=scheduler.run_forever, name="prefetch", daemon=True).start()
+    return scheduler
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+    if not acquire_owner_lock():
+        sys.exit("Another prefetch scheduler already owns " + LOCK_PATH)
+    PrefetchScheduler().run_forever()
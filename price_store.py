@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import os
+import re
+import struct
+import threading
+import datetime as dt
+from collections import OrderedDict
+
+from lazy_imports import lazy_import
+
+np = lazy_import("numpy", __name__, "np")
+
+# ─────────────────────────────────────────────
+#  MEMORY-MAPPED COLUMNAR PRICE STORE
+#  One small file per ticker: int32 day ordinals,
+#  float64 closes and float64 volumes, back to back.
+#  Files are mapped read-only, so every worker on the
+#  host shares the same page-cache pages and slices
+#  handed to the indicator engine are views, not
+#  copies. Writers replace a file atomically; readers
+#  pick up the new inode on their next open.
+# ─────────────────────────────────────────────
+STORE_DIR = os.getenv("PRICE_STORE_DIR")
+# Mapped files kept open per process (each holds a file descriptor)
+MAX_OPEN = int(os.getenv("PRICE_STORE_MAX_OPEN", "512"))
+
+_MAGIC = b"PXS1"
+_HEADER = struct.Struct("<4sI8x")   # magic, bar count, padding to 16 bytes
+_SAFE_NAME = re.compile(r"[^A-Za-z0-9.\-]")
+
+
+class PriceSeries:
+    """Parallel date / close / volume arrays, usually views into a mapped file."""
+    __slots__ = ("dates", "close", "volume")
+
+    def __init__(self, dates: np.ndarray, close: np.ndarray, volume: np.ndarray):
+        self.dates = dates      # int32 proleptic-Gregorian day ordinals
+        self.close = close
+        self.volume = volume
+
+    @classmethod
+    def from_frame(cls, df) -> "PriceSeries":
+        ordinals = np.fromiter((d.toordinal() for d in df.index.date), dtype=np.int32, count=len(df))
+        return cls(
+            ordinals,
+            np.ascontiguousarray(df["Close"].values, dtype=np.float64),
+            np.ascontiguousarray(df["Volume"].values, dtype=np.float64),
+        )
+
+    def __len__(self) -> int:
+        return len(self.close)
+
+    def since(self, start: dt.date | None) -> "PriceSeries":
+        if start is None:
+            return self
+        i = int(np.searchsorted(self.dates, start.toordinal()))
+        return PriceSeries(self.dates[i:], self.close[i:], self.volume[i:])
+
+    def tail(self, n: int) -> "PriceSeries":
+        return PriceSeries(self.dates[-n:], self.close[-n:], self.volume[-n:])
+
+    def iso_dates(self) -> list[str]:
+        return [dt.date.fromordinal(int(d)).isoformat() for d in self.dates]
+
+    @property
+    def last_date(self) -> dt.date | None:
+        return dt.date.fromordinal(int(self.dates[-1])) if len(self.dates) else None
+
+
+def _store_dir() -> str:
+    if STORE_DIR:
+        return STORE_DIR
+    import history_store
+    return os.path.join(os.path.dirname(history_store.DB_PATH), "prices")
+
+
+def _path(ticker: str) -> str:
+    # Keep symbols like M&M.NS or ^NSEI filesystem-safe and distinct
+    name = _SAFE_NAME.sub(lambda m: f"%{ord(m.group()):02X}", ticker)
+    return os.path.join(_store_dir(), name + ".px")
+
+
+def write(ticker: str, dates: np.ndarray, close: np.ndarray, volume: np.ndarray) -> None:
+    n = len(close)
+    dates = np.ascontiguousarray(dates, dtype="<i4")
+    pad = b"\0" * ((-4 * n) % 8)   # keep the float64 columns 8-byte aligned
+    path = _path(ticker)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, n))
+        f.write(dates.tobytes())
+        f.write(pad)
+        f.write(np.ascontiguousarray(close, dtype="<f8").tobytes())
+        f.write(np.ascontiguousarray(volume, dtype="<f8").tobytes())
+    os.replace(tmp, path)
+
+
+# ticker -> ((inode, mtime_ns), series); least recently used first
+_open: OrderedDict[str, tuple[tuple[int, int], PriceSeries]] = OrderedDict()
+_open_lock = threading.Lock()
+
+
+def load(ticker: str, start: dt.date | None = None) -> PriceSeries | None:
+    """Zero-copy view of a ticker's stored series (from `start`), or None if not stored."""
+    path = _path(ticker)
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    key = (st.st_ino, st.st_mtime_ns)
+    with _open_lock:
+        cached = _open.get(ticker)
+        if cached and cached[0] == key:
+            _open.move_to_end(ticker)
+            return cached[1].since(start)
+
+    mm = np.memmap(path, dtype=np.uint8, mode="r")
+    magic, n = _HEADER.unpack_from(mm, 0)
+    if magic != _MAGIC:
+        return None
+    offset = _HEADER.size
+    dates = np.frombuffer(mm, dtype="<i4", count=n, offset=offset)
+    offset += 4 * n + (-4 * n) % 8
+    close = np.frombuffer(mm, dtype="<f8", count=n, offset=offset)
+    volume = np.frombuffer(mm, dtype="<f8", count=n, offset=offset + 8 * n)
+    series = PriceSeries(dates, close, volume)
+
+    with _open_lock:
+        # Dropping the old entry unmaps it once no caller still holds a view
+        _open[ticker] = (key, series)
+        _open.move_to_end(ticker)
+        while len(_open) > MAX_OPEN:
+            _open.popitem(last=False)
+    return series.since(start)
@@ -0,0 +1,104 @@
+import os
+import re
+import hashlib
+import threading
+from collections import OrderedDict
+
+# ─────────────────────────────────────────────
+#  TOKEN-BUDGETED PROMPT ASSEMBLY
+#  The last few turns go to the LLM verbatim; older
+#  turns are collapsed into a rolling extractive
+#  summary whose per-message lines are cached, so
+#  prompt size stays flat as a conversation grows.
+# ─────────────────────────────────────────────
+KEEP_MESSAGES = int(os.getenv("PROMPT_KEEP_MESSAGES", "6"))        # 3 user/assistant turns
+HISTORY_TOKEN_BUDGET = int(os.getenv("PROMPT_HISTORY_TOKENS", "1500"))
+SUMMARY_TOKEN_BUDGET = int(os.getenv("PROMPT_SUMMARY_TOKENS", "300"))
+SUMMARY_LINE_CHARS = 160
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+_SENTENCE_RE = re.compile(r"(.+?[.!?])(?:\s|$)", re.DOTALL)
+
+_line_cache: OrderedDict[str, str] = OrderedDict()
+_line_cache_lock = threading.Lock()
+_LINE_CACHE_SIZE = 50_000
+
+
+def count_tokens(text: str) -> int:
+    """
+    Cheap tokenizer-free estimate: one token per word or punctuation mark,
+    with long words counted at ~4 characters per token (close to Llama's BPE
+    on English financial text).
+    """
+    return sum(max(1, len(piece) // 4) for piece in _TOKEN_RE.findall(text))
+
+
+def _summary_line(message: dict) -> str:
+    key = hashlib.blake2b(f"{message['role']}\0{message['content']}".encode(), digest_size=12).hexdigest()
+    with _line_cache_lock:
+        line = _line_cache.get(key)
+        if line is not None:
+            _line_cache.move_to_end(key)
+            return line
+
+    text = " ".join(message["content"].split())
+    first = _SENTENCE_RE.match(text)
+    text = first.group(1) if first else text
+    if len(text) > SUMMARY_LINE_CHARS:
+        text = text[:SUMMARY_LINE_CHARS - 1].rstrip() + "…"
+    line = f"- {'User' if message['role'] == 'user' else 'ARIA'}: {text}"
+
+    with _line_cache_lock:
+        _line_cache[key] = line
+        if len(_line_cache) > _LINE_CACHE_SIZE:
+            _line_cache.popitem(last=False)
+    return line
+
+
+def build_prompt(system_prompt: str, history: list[dict]) -> tuple[list[dict], dict]:
+    """Messages for the LLM plus a size report for logging / the response payload."""
+    recent = [
+        {"role": m["role"], "content": m["content"]}
+        for m in history[-KEEP_MESSAGES:]
+    ]
+    older = history[:-KEEP_MESSAGES] if len(history) > KEEP_MESSAGES else []
+
+    # Keep the newest verbatim messages that fit the budget (the latest always goes)
+    kept, used = [], 0
+    for m in reversed(recent):
+        cost = count_tokens(m["content"])
+        if kept and used + cost > HISTORY_TOKEN_BUDGET:
+            older = history[:len(history) - len(kept)]
+            break
+        kept.append(m)
+        used += cost
+    kept.reverse()
+
+    # Rolling summary of everything older, newest lines kept when over budget
+    lines, summary_tokens = [], 0
+    for m in reversed(older):
+        line = _summary_line(m)
+        cost = count_tokens(line)
+        if summary_tokens + cost > SUMMARY_TOKEN_BUDGET:
+            break
+        lines.append(line)
+        summary_tokens += cost
+    lines.reverse()
+
+    messages = [{"role": "system", "content": system_prompt}]
+    if lines:
+        messages.append({"role": "system", "content": "Summary of the earlier conversation:\n" + "\n".join(lines)})
+    messages.extend(kept)
+
+    system_tokens = count_tokens(system_prompt)
+    raw_tokens = system_tokens + sum(count_tokens(m["content"]) for m in history)
+    total = system_tokens + summary_tokens + used
+    return messages, {
+        "prompt_tokens": total,
+        "unbudgeted_tokens": raw_tokens,
+        "system_tokens": system_tokens,
+        "summary_tokens": summary_tokens,
+        "history_tokens": used,
+        "messages_verbatim": len(kept),
+        "messages_summarized": len(lines),
+    }
@@ -0,0 +1,298 @@
+import os
+import time
+import heapq
+import random
+import sqlite3
+import asyncio
+import threading
+import contextvars
+from contextlib import contextmanager
+
+import metrics
+
+# ─────────────────────────────────────────────
+#  UPSTREAM CALL GOVERNOR
+#  Every yfinance / Groq call takes a token from a
+#  per-provider bucket kept in SQLite, so all workers
+#  on the host share one budget. Callers waiting on a
+#  bucket queue by priority (interactive chat first,
+#  then batch API / screener work, then prefetch), and
+#  a 429 from upstream is retried with jittered
+#  exponential backoff while the shared bucket is
+#  drained so the other workers back off too.
+#
+#  RATE_LIMIT_<PROVIDER>="<per second>,<burst>"
+#  RATE_LIMIT=0 disables the governor.
+# ─────────────────────────────────────────────
+INTERACTIVE, BATCH, PREFETCH = 0, 1, 2
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BATCH: "batch", PREFETCH: "prefetch"}
+
+ENABLED = os.getenv("RATE_LIMIT", "1") != "0"
+DEFAULT_LIMITS = {
+    "yfinance": (2.0, 10.0),
+    "groq": (0.5, 10.0),
+}
+MAX_RETRIES = int(os.getenv("RATE_LIMIT_RETRIES", "3"))
+BACKOFF_BASE = float(os.getenv("RATE_LIMIT_BACKOFF_SEC", "1.0"))
+BACKOFF_CAP = 30.0
+# Queue waits longer than this fail the call rather than hang a request
+MAX_WAIT = {INTERACTIVE: 15.0, BATCH: 60.0, PREFETCH: 300.0}
+# How often a queued coroutine checks whether it has reached the head of the queue
+ASYNC_POLL_SEC = 0.05
+
+QUEUE_DEPTH = metrics.register(metrics.Gauge(
+    "aria_upstream_queue_depth", "Calls waiting for an upstream rate-limit token.", ("provider", "priority")
+))
+THROTTLED = metrics.register(metrics.Counter(
+    "aria_upstream_throttled", "Calls delayed by the local bucket or rejected upstream (429).", ("provider", "reason")
+))
+WAIT_SECONDS = metrics.register(metrics.Histogram(
+    "aria_upstream_wait_seconds", "Time spent queued for an upstream token.", ("provider",)
+))
+
+
+class UpstreamThrottled(Exception):
+    """Raised when a call can't get a token within its priority's MAX_WAIT."""
+
+
+def is_throttle_error(exc: BaseException) -> bool:
+    status = getattr(exc, "status_code", None) or getattr(getattr(exc, "response", None), "status_code", None)
+    return (
+        status == 429
+        or type(exc).__name__ in ("YFRateLimitError", "RateLimitError")
+        or "Too Many Requests" in str(exc)
+    )
+
+
+def backoff_delay(attempt: int) -> float:
+    """Full-jitter exponential backoff: uniform over [0, base * 2^attempt], capped."""
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+
+# ─────────────────────────────────────────────
+#  REQUEST PRIORITY
+# ─────────────────────────────────────────────
+_priority: contextvars.ContextVar[int] = contextvars.ContextVar("upstream_priority", default=INTERACTIVE)
+
+
+@contextmanager
+def priority(level: int):
+    token = _priority.set(level)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def set_priority(level: int) -> None:
+    """For long-lived threads (the prefetcher) that only ever do one kind of work."""
+    _priority.set(level)
+
+
+def current_priority() -> int:
+    return _priority.get()
+
+
+# ─────────────────────────────────────────────
+#  SHARED TOKEN BUCKETS
+# ─────────────────────────────────────────────
+def _db_path() -> str:
+    path = os.getenv("RATE_LIMIT_DB_PATH")
+    if path:
+        return path
+    import history_store
+    return os.path.join(os.path.dirname(history_store.DB_PATH), "ratelimit.db")
+
+
+class SharedTokenBucket:
+    def __init__(self, name: str, rate: float, burst: float, path: str | None = None):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.path = path or _db_path()
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets ("
+                " name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+            )
+            self._local.conn = conn
+        return conn
+
+    def _update(self, change) -> float:
+        """Refill, apply `change(tokens) -> (tokens, result)` atomically across processes."""
+        conn = self._conn()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tokens, updated FROM buckets WHERE name = ?", (self.name,)).fetchone()
+            tokens = self.burst if row is None else min(self.burst, row[0] + (now - row[1]) * self.rate)
+            tokens, result = change(tokens)
+            conn.execute("INSERT OR REPLACE INTO buckets VALUES (?, ?, ?)", (self.name, tokens, now))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return result
+
+    def try_take(self, cost: float = 1.0) -> float:
+        """0 if `cost` tokens were taken, else seconds until they will be available."""
+        cost = min(cost, self.burst)
+
+        def take(tokens):
+            if tokens >= cost:
+                return tokens - cost, 0.0
+            return tokens, (cost - tokens) / self.rate
+
+        return self._update(take)
+
+    def penalize(self, seconds: float) -> None:
+        """Empty the bucket for roughly `seconds` on every worker (after an upstream 429)."""
+        self._update(lambda tokens: (min(tokens, 0.0) - seconds * self.rate, None))
+
+
+class Governor:
+    """One per provider: a shared bucket plus an in-process priority queue of waiters."""
+
+    def __init__(self, provider: str, rate: float, burst: float):
+        self.provider = provider
+        self.bucket = SharedTokenBucket(provider, rate, burst)
+        self._cond = threading.Condition()
+        self._waiting: list[tuple[int, int]] = []
+        self._seq = 0
+
+    def _join(self, level: int) -> tuple[int, int]:
+        with self._cond:
+            self._seq += 1
+            ticket = (level, self._seq)
+            heapq.heappush(self._waiting, ticket)
+        QUEUE_DEPTH.inc(self.provider, PRIORITY_NAMES[level])
+        return ticket
+
+    def _leave(self, ticket: tuple[int, int]) -> None:
+        with self._cond:
+            self._waiting.remove(ticket)
+            heapq.heapify(self._waiting)
+            self._cond.notify_all()
+        QUEUE_DEPTH.dec(self.provider, PRIORITY_NAMES[ticket[0]])
+
+    def _at_head(self, ticket: tuple[int, int]) -> bool:
+        with self._cond:
+            return self._waiting[0] == ticket
+
+    def acquire(self, cost: float = 1.0, level: int | None = None) -> None:
+        level = _priority.get() if level is None else level
+        started = time.monotonic()
+        deadline = started + MAX_WAIT.get(level, MAX_WAIT[BATCH])
+        with self._cond:
+            ticket = self._join(level)
+            throttled = False
+            try:
+                while True:
+                    remaining = deadline - time.monotonic()
+                    # Only the most urgent waiter polls the bucket; the rest sleep behind it
+                    if self._waiting[0] == ticket:
+                        wait = self.bucket.try_take(cost)
+                        if wait <= 0:
+                            break
+                        if not throttled:
+                            throttled = True
+                            THROTTLED.inc(self.provider, "local_bucket")
+                    else:
+                        wait = remaining
+                    if remaining <= 0:
+                        raise UpstreamThrottled(f"{self.provider}: no rate-limit token within the allowed wait")
+                    self._cond.wait(min(wait, remaining))
+            finally:
+                self._leave(ticket)
+        WAIT_SECONDS.observe(time.monotonic() - started, self.provider)
+
+    async def acquire_async(self, cost: float = 1.0, level: int | None = None) -> None:
+        """
+        acquire() for the event loop. Queues in the same priority order, but
+        waits with asyncio.sleep, so a queued call holds no thread: only the
+        brief bucket transaction runs on one.
+        """
+        level = _priority.get() if level is None else level
+        started = time.monotonic()
+        deadline = started + MAX_WAIT.get(level, MAX_WAIT[BATCH])
+        ticket = self._join(level)
+        throttled = False
+        try:
+            while True:
+                remaining = deadline - time.monotonic()
+                if self._at_head(ticket):
+                    wait = await asyncio.to_thread(self.bucket.try_take, cost)
+                    if wait <= 0:
+                        break
+                    if not throttled:
+                        throttled = True
+                        THROTTLED.inc(self.provider, "local_bucket")
+                else:
+                    # Thread waiters are woken by the condition; a coroutine re-checks its place
+                    wait = ASYNC_POLL_SEC
+                if remaining <= 0:
+                    raise UpstreamThrottled(f"{self.provider}: no rate-limit token within the allowed wait")
+                await asyncio.sleep(min(wait, remaining))
+        finally:
+            self._leave(ticket)
+        WAIT_SECONDS.observe(time.monotonic() - started, self.provider)
+
+
+_governors: dict[str, Governor] = {}
+_governors_lock = threading.Lock()
+
+
+def governor(provider: str) -> Governor:
+    with _governors_lock:
+        gov = _governors.get(provider)
+        if gov is None:
+            rate, burst = DEFAULT_LIMITS.get(provider, (5.0, 20.0))
+            spec = os.getenv(f"RATE_LIMIT_{provider.upper()}")
+            if spec:
+                rate, _, burst_text = spec.partition(",")
+                rate, burst = float(rate), float(burst_text or rate)
+            gov = _governors[provider] = Governor(provider, rate, burst)
+        return gov
+
+
+def call(provider: str, fn, *args, cost: float = 1.0, **kwargs):
+    """Run an upstream call under the provider's budget, retrying 429s with backoff."""
+    if not ENABLED:
+        return fn(*args, **kwargs)
+    gov = governor(provider)
+    for attempt in range(MAX_RETRIES + 1):
+        gov.acquire(cost)
+        try:
+            return fn(*args, **kwargs)
+        except Exception as e:
+            if not is_throttle_error(e) or attempt == MAX_RETRIES:
+                raise
+            delay = backoff_delay(attempt)
+            THROTTLED.inc(provider, "upstream_429")
+            gov.bucket.penalize(delay)
+            time.sleep(delay)
+
+
+async def call_async(provider: str, fn, *args, cost: float = 1.0, **kwargs):
+    """call() for coroutine functions; queue waits are asyncio sleeps, not blocked threads."""
+    if not ENABLED:
+        return await fn(*args, **kwargs)
+    gov = governor(provider)
+    for attempt in range(MAX_RETRIES + 1):
+        await gov.acquire_async(cost)
+        try:
+            return await fn(*args, **kwargs)
+        except Exception as e:
+            if not is_throttle_error(e) or attempt == MAX_RETRIES:
+                raise
+            delay = backoff_delay(attempt)
+            THROTTLED.inc(provider, "upstream_429")
+            await asyncio.to_thread(gov.bucket.penalize, delay)
+            await asyncio.sleep(delay)
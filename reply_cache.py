@@ -0,0 +1,105 @@
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import history_store
+import metrics
+
+# ─────────────────────────────────────────────
+#  LLM REPLY CACHE
+#  First-turn / context-free stock questions are
+#  answered from cache when the same normalized
+#  question hits the same analysis snapshot. Only
+#  replies to a session's first turn are stored, since
+#  a later one was conditioned on that session's
+#  history. Entries live until that ticker's data
+#  would next refresh.
+# ─────────────────────────────────────────────
+MAX_ENTRIES = 5000
+
+# Words that lean on earlier turns; a question using them isn't context-free
+_CONTEXT_WORDS = {
+    "it", "its", "it's", "that", "this", "these", "those", "they", "them", "their",
+    "above", "previous", "earlier", "again", "more", "else", "also", "same", "instead",
+}
+_WORD_RE = re.compile(r"[a-z0-9&.']+")
+
+
+def normalize_question(text: str) -> str:
+    return " ".join(_WORD_RE.findall(text.lower())).strip(" .")
+
+
+def snapshot_key(analysis: dict) -> str:
+    """Hash of what the LLM actually reasons over: signal, score and rounded indicators."""
+    ind = analysis.get("indicators", {})
+    parts = [
+        analysis.get("ticker", ""),
+        analysis.get("signal", ""),
+        str(analysis.get("score", "")),
+        (analysis.get("dates_20d") or [""])[-1],
+        *(f"{k}={float(ind[k]):.3g}" for k in sorted(ind)),
+    ]
+    return hashlib.blake2b("|".join(parts).encode(), digest_size=10).hexdigest()
+
+
+class ReplyCache:
+    def __init__(self, max_entries: int = MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[tuple, tuple[float, str]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def key_for(self, user_msg: str, stock_meta: dict, history: list[dict]) -> tuple | None:
+        """Cache key, or None when the question isn't safe to answer from cache."""
+        if not stock_meta.get("ticker") or not stock_meta.get("snapshot"):
+            return None
+        question = normalize_question(user_msg)
+        if history and _CONTEXT_WORDS.intersection(question.split()):
+            return None
+        tickers = ",".join(m["ticker"] for m in stock_meta.get("compare", [stock_meta]))
+        return question, tickers, stock_meta["snapshot"]
+
+    def get(self, key: tuple) -> str | None:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < now:
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+        metrics.cache_lookup("reply", entry is not None)
+        return entry[1] if entry is not None else None
+
+    def put(self, key: tuple, reply: str) -> None:
+        ttl = min(history_store.seconds_until_refresh(t) for t in key[1].split(","))
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, reply)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+reply_cache = ReplyCache()
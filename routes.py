@@ -1,61 +1,130 @@
-from flask import render_template, request, jsonify, session
-from groq import Groq
+from flask import render_template, request, jsonify, session, g, Response, stream_with_context
 import os
 import uuid  # ⬅️ ADDED THIS BACK
 import re
+import json
+import time
+import queue
+import threading
+import datetime as dt
+from werkzeug.http import is_resource_modified
 from dotenv import load_dotenv
-from genai import get_system_prompt, analyze_stock, INDIAN_STOCKS, US_STOCKS
+import genai
+from genai import get_system_prompt, analyze_stock, analyze_stocks, analyze_batch, resolve_ticker, screen_stocks, fetch_prices, ALIAS_INDEX, INDIAN_STOCKS, US_STOCKS
 from app_creator import app  # Import app from the neutral file
+from conversation_store import create_conversation_store
+from prompt_builder import build_prompt
+from reply_cache import reply_cache, snapshot_key
+import prefetch
+import metrics
+import chart_data
+import rate_limit
+import history_store
+import live_prices
+import warm_start
 #import ollama
 
 load_dotenv()
 
-client = Groq(api_key=os.getenv("GROQ_API_KEY"))
-conversations = {}
+_client = None
+_client_lock = threading.Lock()
+
+
+def groq_client():
+    """Built on first use: importing groq costs more than booting the rest of the app."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from groq import Groq
+                _client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+    return _client
+
+
+LLM_MODEL = "llama-3.3-70b-versatile"
+LLM_MAX_TOKENS = 512
+conversations = create_conversation_store()
+
+# Boot warm: the last snapshot answers popular tickers until this worker's caches fill
+warm_start.load()
+
+metrics.register(metrics.Gauge(
+    "aria_conversation_sessions", "Live chat sessions in the conversation store.",
+    fn=lambda: conversations.stats()["sessions"],
+))
+metrics.register(metrics.Gauge(
+    "aria_reply_cache_entries", "Cached LLM replies.", fn=lambda: reply_cache.stats()["entries"],
+))
 
 def get_history(sid):
-    if sid not in conversations:
-        conversations[sid] = []
-    return conversations[sid]
+    return conversations.get(sid)
+
+
+def append_history(sid, history, message):
+    # history is the request's working copy; the store is the shared record
+    history.append(message)
+    conversations.append(sid, message)
 
 # ─────────────────────────────────────────────
 #  STOCK NAME EXTRACTOR
 # ─────────────────────────────────────────────
 
-def extract_stock_name(message: str) -> str | None:
-    msg_lower = message.lower()
-
-    # Check against known Indian stock names
-    for key in INDIAN_STOCKS:
-        if key in msg_lower:
-            return key
-
-    # Check against known US stock names
-    for key in US_STOCKS:
-        if key in msg_lower:
-            return key
+# Compiled once at import rather than on every message
+TICKER_PATTERN = re.compile(r'\b[A-Z]{2,5}\b')
+TICKER_SKIP = {"I", "A", "THE", "AND", "OR", "BUY", "SELL", "MY", "IN", "ON",
+               "FOR", "TO", "AT", "IS", "IT", "US", "DO", "NSE", "BSE", "PE", "VS",
+               # Indicator and finance jargon that is also all-caps
+               "HOLD", "RSI", "MACD", "EMA", "SMA", "MA", "EPS", "ETF", "SIP", "IPO", "CEO", "CFO",
+               "NAV", "GDP", "ROE", "ROI", "ROCE", "FII", "DII", "FD", "PB", "PEG", "ATH", "YTD",
+               "USD", "INR", "AI", "OK", "FAQ"}
+# Raw tickers alongside a known name only count when the message asks for a comparison
+COMPARE_CUE = re.compile(r"\b(?:vs\.?|versus|compare[ds]?|comparing|comparison)\b", re.IGNORECASE)
+KEYWORD_PATTERNS = [
+    re.compile(r"(?:about|analyse|analyze|check|look at|invest in|buy|sell|thoughts on|opinion on)\s+([A-Za-z\s&]+?)(?:\?|$|\.|\s+stock|\s+share)", re.IGNORECASE),
+    re.compile(r"([A-Za-z\s&]+?)\s+(?:stock|share|equity|scrip)\b", re.IGNORECASE),
+]
+# Most tickers analysed for one comparison question
+MAX_COMPARE = 5
+
+
+def extract_stock_names(message: str, limit: int = MAX_COMPARE) -> list[str]:
+    """Every distinct stock mentioned, known names first, then raw tickers, in message order."""
+    names, seen = [], set()
+
+    # Check against known Indian / US stock names in a single pass
+    matches = ALIAS_INDEX.find_all(message)
+    for m in matches:
+        if m.ticker not in seen:
+            seen.add(m.ticker)
+            names.append(m.alias)
 
     # Check for all-caps ticker pattern (e.g. AAPL, TSLA, MSFT)
-    matches = re.findall(r'\b[A-Z]{2,5}\b', message)
-    for m in matches:
-        skip = {"I", "A", "THE", "AND", "OR", "BUY", "SELL", "MY", "IN", "ON",
-                "FOR", "TO", "AT", "IS", "IT", "US", "DO", "NSE", "BSE", "PE"}
-        if m not in skip:
-            return m
+    raw_tickers = TICKER_PATTERN.finditer(message) if not names or COMPARE_CUE.search(message) else ()
+    for m in raw_tickers:
+        token = m.group()
+        if token in TICKER_SKIP or any(a.start <= m.start() < a.end for a in matches):
+            continue
+        if token not in seen:
+            seen.add(token)
+            names.append(token)
+
+    if names:
+        return names[:limit]
 
     # Keyword-after-pattern
-    patterns = [
-        r"(?:about|analyse|analyze|check|look at|invest in|buy|sell|thoughts on|opinion on)\s+([A-Za-z\s&]+?)(?:\?|$|\.|\s+stock|\s+share)",
-        r"([A-Za-z\s&]+?)\s+(?:stock|share|equity|scrip)\b",
-    ]
-    for pat in patterns:
-        match = re.search(pat, message, re.IGNORECASE)
+    for pat in KEYWORD_PATTERNS:
+        match = pat.search(message)
         if match:
             candidate = match.group(1).strip()
             if 2 < len(candidate) < 30:
-                return candidate
+                return [candidate]
+
+    return []
 
-    return None
+
+def extract_stock_name(message: str) -> str | None:
+    names = extract_stock_names(message, limit=1)
+    return names[0] if names else None
 
 
 def format_stock_context(analysis: dict) -> str:
@@ -79,8 +148,8 @@ P/E Ratio: {analysis['pe_ratio']}
 
 --- Technical Indicators ---
 MA20: {currency}{ind['ma20']} | MA50: {currency}{ind['ma50']} | MA200: {currency}{ind['ma200']}
-RSI (14): {ind['rsi']}
-MACD: {ind['macd']}
+RSI (14, Wilder): {ind['rsi']}
+MACD: {ind['macd']} | Signal: {ind.get('macd_signal', 'N/A')}
 Bollinger Upper: {currency}{ind['bb_upper']} | Lower: {currency}{ind['bb_lower']}
 30-Day Momentum: {ind['momentum_30d']}%
 Trend Slope (60-day): {ind['trend_slope']}
@@ -99,6 +168,155 @@ Stop-Loss (7% maximum loss): {stop}
 {reasons_text}
 """
 
+def format_comparison_context(analyses: list[dict]) -> str:
+    ok = [a for a in analyses if "error" not in a]
+    rows = [
+        "Ticker | Price | Signal | Score | Confidence | RSI | MACD | 30d Mom | vs MA200 | P/E"
+    ]
+    for a in ok:
+        ind = a["indicators"]
+        vs_ma200 = (ind["current_price"] / ind["ma200"] - 1) * 100 if ind["ma200"] else 0.0
+        rows.append(
+            f"{a['ticker']} | {a['currency']}{a['current_price']} | {a['signal']} | {a['score']}/10 | "
+            f"{a['confidence']}% | {ind['rsi']} | {ind['macd']} | {ind['momentum_30d']}% | "
+            f"{vs_ma200:+.1f}% | {a['pe_ratio']}"
+        )
+    reasons = "\n".join(
+        f"{a['ticker']}: " + "; ".join(a["reasons"][:3]) for a in ok
+    )
+    errors = "\n".join(f"STOCK LOOKUP ERROR: {a['error']}" for a in analyses if "error" in a)
+
+    return f"""
+Side-by-side comparison of {len(ok)} stocks:
+{chr(10).join(rows)}
+
+--- Key Reasons ---
+{reasons}
+{errors}
+"""
+
+
+def build_stock_context(user_msg: str) -> tuple[str, dict]:
+    stock_names = extract_stock_names(user_msg)
+    if not stock_names:
+        return "", {}
+    try:
+        return analyses_to_context(analyze_stocks(stock_names))
+    except Exception as e:
+        return f"STOCK DATA ERROR: {str(e)}", {}
+
+
+def analyses_to_context(analyses: list[dict]) -> tuple[str, dict]:
+    if len(analyses) == 1:
+        return analysis_to_context(analyses[0])
+
+    metas = [stock_meta_for(a) for a in analyses if "error" not in a]
+    stock_meta = dict(metas[0]) if metas else {}
+    if metas:
+        # The signal card shows the first stock; the chart overlays them all
+        stock_meta["compare"] = metas
+        stock_meta["snapshot"] = "-".join(m["snapshot"] for m in metas)
+    return format_comparison_context(analyses), stock_meta
+
+
+def analysis_to_context(analysis: dict) -> tuple[str, dict]:
+    return format_stock_context(analysis), stock_meta_for(analysis)
+
+
+def stock_meta_for(analysis: dict) -> dict:
+    stock_meta = {
+        "ticker": analysis.get("ticker", ""),
+        "signal": analysis.get("signal", ""),
+        "confidence": analysis.get("confidence", ""),
+        "current_price": analysis.get("current_price", ""),
+        "currency": analysis.get("currency", ""),
+        "prices_20d": analysis.get("prices_20d", []),
+        "dates_20d": analysis.get("dates_20d", []),
+    }
+    if "error" not in analysis:
+        stock_meta["snapshot"] = snapshot_key(analysis)
+    return stock_meta
+
+
+def llm_error_reply(e: Exception) -> str:
+    if isinstance(e, rate_limit.UpstreamThrottled) or rate_limit.is_throttle_error(e):
+        return "I'm handling a lot of requests right now. Please try again in a few seconds."
+    return f"I apologise, I encountered an error: {str(e)}"
+
+
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+# ─────────────────────────────────────────────
+#  BACKGROUND THREADS
+#  Started by each worker process on its first
+#  request, never at import: with `gunicorn --preload`
+#  the app is imported once and forked, and a fork
+#  copies locks but not the threads holding them.
+# ─────────────────────────────────────────────
+_background_pid = None
+_background_lock = threading.Lock()
+
+
+def start_background() -> None:
+    global _background_pid
+    if _background_pid == os.getpid():
+        return
+    with _background_lock:
+        if _background_pid == os.getpid():
+            return
+        _background_pid = os.getpid()
+        genai.start_symbol_master_build()
+        # Warm-up of the built-in universe; only one worker per host wins the lock
+        if os.getenv("PREFETCH") == "thread":
+            prefetch.start_in_background()
+        # Snapshot writer, and the imports deferred for a fast boot pulled in off the request path
+        warm_start.start_writer()
+        warm_start.prewarm(groq_client)
+
+
+@app.before_request
+def start_background_once():
+    start_background()
+
+# ─────────────────────────────────────────────
+#  REQUEST TIMING
+#  Every request is timed by endpoint; stages timed
+#  along the way come back in a Server-Timing header
+#  (streamed replies carry them in the `done` event).
+# ─────────────────────────────────────────────
+
+@app.before_request
+def start_timing():
+    g.request_started = time.perf_counter()
+    g.stage_timings = metrics.begin_request()
+    metrics.IN_FLIGHT.inc(request.endpoint or "unknown")
+
+
+def _finish_timing(started, endpoint):
+    metrics.IN_FLIGHT.dec(endpoint)
+    metrics.REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint)
+
+
+@app.after_request
+def add_server_timing(response):
+    if response.is_streamed:
+        # Time streams to their last byte, not to the headers
+        started = g.pop("request_started", None)
+        if started is not None:
+            response.call_on_close(lambda endpoint=request.endpoint or "unknown": _finish_timing(started, endpoint))
+    elif metrics.ENABLED:
+        total = time.perf_counter() - g.request_started
+        response.headers["Server-Timing"] = metrics.server_timing(g.stage_timings, total)
+    return response
+
+
+@app.teardown_request
+def finish_timing(exc=None):
+    started = g.pop("request_started", None)
+    if started is not None:
+        _finish_timing(started, request.endpoint or "unknown")
+
 # ─────────────────────────────────────────────
 #  ROUTES
 # ─────────────────────────────────────────────
@@ -124,27 +342,20 @@ def chat():
     history = get_history(sid)
 
     # ── Detect stock mention and run analysis ──
-    stock_name = extract_stock_name(user_msg)
-    stock_context = ""
-    stock_meta = {}
+    with metrics.stage("analysis"):
+        stock_context, stock_meta = build_stock_context(user_msg)
 
-    if stock_name:
-        try:
-            analysis = analyze_stock(stock_name)
-            stock_context = format_stock_context(analysis)
-            stock_meta = {
-                "ticker": analysis.get("ticker", ""),
-                "signal": analysis.get("signal", ""),
-                "confidence": analysis.get("confidence", ""),
-                "current_price": analysis.get("current_price", ""),
-                "currency": analysis.get("currency", ""),
-                "prices_20d": analysis.get("prices_20d", []),
-                "dates_20d": analysis.get("dates_20d", []),
-            }
-        except Exception as e:
-            stock_context = f"STOCK DATA ERROR: {str(e)}"
+    # ── Same question on the same analysis snapshot: skip the LLM ──
+    cache_key = reply_cache.key_for(user_msg, stock_meta, history)
+    cached = reply_cache.get(cache_key) if cache_key else None
+    # A reply conditioned on this session's earlier turns must not reach other sessions
+    shareable = cache_key is not None and not history
 
-    history.append({"role": "user", "content": user_msg})
+    append_history(sid, history, {"role": "user", "content": user_msg})
+
+    if cached:
+        append_history(sid, history, {"role": "assistant", "content": cached})
+        return jsonify({"reply": cached, "stock_meta": stock_meta, "cached": True})
 
     try:
         # # 🟢 LOCAL OLLAMA FIX
@@ -159,18 +370,28 @@ def chat():
         # )
         # reply = response['message']['content']  # Ollama returns a dictionary-style object
 
-        response = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[{"role": "system", "content": get_system_prompt(stock_context)}] + history,
-            max_tokens=512,
-        )
+        with metrics.stage("prompt"):
+            messages, prompt_stats = build_prompt(get_system_prompt(stock_context), history)
+        app.logger.info("prompt size for %s: %s", sid, prompt_stats)
+        with metrics.stage("llm"), metrics.IN_FLIGHT.track("llm"):
+            response = rate_limit.call(
+                "groq",
+                groq_client().chat.completions.create,
+                model=LLM_MODEL,
+                messages=messages,
+                max_tokens=LLM_MAX_TOKENS,
+            )
         reply = response.choices[0].message.content
+        if shareable:
+            reply_cache.put(cache_key, reply)
 
-        history.append({"role": "assistant", "content": reply})
-        return jsonify({"reply": reply, "stock_meta": stock_meta})
+        append_history(sid, history, {"role": "assistant", "content": reply})
+        return jsonify({"reply": reply, "stock_meta": stock_meta, "prompt_stats": prompt_stats})
 
     except Exception as e:
-        return jsonify({"reply": f"I apologise, I encountered an error: {str(e)}"})
+        metrics.UPSTREAM_ERRORS.inc("groq")
+        app.logger.exception("LLM call failed for %s", sid)
+        return jsonify({"reply": llm_error_reply(e)})
 
     #ollama chat() is short cut for local computers
     #client.chat.completions.create standard format meant for GROQ
@@ -179,8 +400,260 @@ def chat():
     #client object manages connections, security keys, and
     #complex traffic for thousands of users at once.
 
+
+@app.route("/chat/stream", methods=["POST"])
+def chat_stream():
+    """
+    Same pipeline as /chat, delivered as Server-Sent Events: `stock_meta` as soon
+    as the analysis is ready, then `token` events as Groq produces them, then `done`.
+    """
+    data = request.get_json(silent=True) or {}
+    user_msg = data.get("message", "").strip()
+    sid = session.get("session_id", "default")
+
+    def generate():
+        if not user_msg:
+            yield sse_event("token", {"text": "Please type your query."})
+            yield sse_event("done", {})
+            return
+
+        timings = metrics.begin_request()
+        history = get_history(sid)
+        with metrics.stage("analysis"):
+            stock_context, stock_meta = build_stock_context(user_msg)
+        yield sse_event("stock_meta", stock_meta)
+
+        cache_key = reply_cache.key_for(user_msg, stock_meta, history)
+        cached = reply_cache.get(cache_key) if cache_key else None
+        # A reply conditioned on this session's earlier turns must not reach other sessions
+        shareable = cache_key is not None and not history
+        append_history(sid, history, {"role": "user", "content": user_msg})
+        if cached:
+            append_history(sid, history, {"role": "assistant", "content": cached})
+            yield sse_event("token", {"text": cached})
+            yield sse_event("done", {"cached": True})
+            return
+
+        with metrics.stage("prompt"):
+            messages, prompt_stats = build_prompt(get_system_prompt(stock_context), history)
+        app.logger.info("prompt size for %s: %s", sid, prompt_stats)
+        parts = []
+        try:
+            with metrics.stage("llm"), metrics.IN_FLIGHT.track("llm"):
+                stream = rate_limit.call(
+                    "groq",
+                    groq_client().chat.completions.create,
+                    model=LLM_MODEL,
+                    messages=messages,
+                    max_tokens=LLM_MAX_TOKENS,
+                    stream=True,
+                )
+                for chunk in stream:
+                    text = chunk.choices[0].delta.content if chunk.choices else None
+                    if text:
+                        parts.append(text)
+                        yield sse_event("token", {"text": text})
+        except Exception as e:
+            metrics.UPSTREAM_ERRORS.inc("groq")
+            app.logger.exception("LLM stream failed for %s", sid)
+            yield sse_event("error", {"text": llm_error_reply(e)})
+            return
+
+        reply = "".join(parts)
+        if shareable:
+            reply_cache.put(cache_key, reply)
+        append_history(sid, history, {"role": "assistant", "content": reply})
+        yield sse_event("done", {"prompt_stats": prompt_stats, "server_timing": metrics.server_timing(timings)})
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @app.route("/reset", methods=["POST"])
 def reset():
     sid = session.get("session_id", "default")
-    conversations[sid] = []
-    return jsonify({"status": "ok"})
\ No newline at end of file
+    conversations.reset(sid)
+    return jsonify({"status": "ok"})
+
+
+@app.route("/screen", methods=["GET", "POST"])
+def screen():
+    if request.method == "POST":
+        params = request.get_json(silent=True) or {}
+    else:
+        params = request.args
+    market = str(params.get("market", "all")).lower()
+    try:
+        top_k = max(1, min(int(params.get("top_k", 10)), 100))
+    except (TypeError, ValueError):
+        return jsonify({"error": "top_k must be an integer"}), 400
+
+    tickers = params.get("tickers")
+    if isinstance(tickers, str):
+        tickers = [t for t in tickers.split(",") if t.strip()]
+    if tickers:
+        resolved = [resolve_ticker(t, probe=False) for t in tickers]
+        tickers = [t for t in resolved if t]
+    elif market == "in":
+        tickers = list(dict.fromkeys(INDIAN_STOCKS.values()))
+    elif market == "us":
+        tickers = list(dict.fromkeys(US_STOCKS.values()))
+    else:
+        tickers = None
+
+    with rate_limit.priority(rate_limit.BATCH):
+        return jsonify(screen_stocks(tickers, top_k=top_k))
+
+
+@app.route("/history/<path:ticker>")
+def price_history(ticker):
+    """Downsampled price + overlay series for the chart, with ETag / Last-Modified revalidation."""
+    range_key = request.args.get("range", "1m").lower()
+    if range_key not in chart_data.RANGES:
+        return jsonify({"error": f"range must be one of {', '.join(chart_data.RANGES)}"}), 400
+    try:
+        points = max(10, min(int(request.args.get("points", chart_data.DEFAULT_POINTS)), chart_data.MAX_POINTS))
+    except ValueError:
+        return jsonify({"error": "points must be an integer"}), 400
+
+    symbol = resolve_ticker(ticker, probe=False)
+    prices = fetch_prices(symbol, chart_data.RANGES[range_key][1]) if symbol else None
+    if prices is None:
+        return jsonify({"error": f"No price history for '{ticker}'."}), 404
+
+    gzipped = "gzip" in request.accept_encodings
+    etag = chart_data.etag_for(symbol, range_key, points, prices) + ("-gz" if gzipped else "")
+    meta = history_store.get_meta(symbol)
+    last_modified = dt.datetime.fromtimestamp(meta[1], dt.timezone.utc).replace(microsecond=0) if meta else None
+
+    response = Response(mimetype="application/json")
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    response.vary.add("Accept-Encoding")
+    # Bars can't change before the next sync is due; revalidate (cheaply) after that
+    response.cache_control.private = True
+    response.cache_control.max_age = int(min(history_store.seconds_until_refresh(symbol), 3600))
+    if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+        response.status_code = 304
+        return response
+
+    currency = "₹" if symbol.endswith(".NS") else "$"
+    response.set_data(chart_data.encoded_body(
+        etag, lambda: chart_data.build_payload(symbol, range_key, points, prices, currency), gzipped
+    ))
+    if gzipped:
+        response.headers["Content-Encoding"] = "gzip"
+    return response
+
+
+@app.route("/live")
+def live_stream():
+    """SSE quote deltas for ?tickers=A,B (one thread per stream; asgi.py serves this natively)."""
+    tickers = live_prices.parse_tickers(request.args.get("tickers", ""))
+    if not tickers:
+        return jsonify({"error": "tickers is required"}), 400
+
+    events = queue.Queue(maxsize=live_prices.QUEUE_SIZE)
+    sub = live_prices.hub.subscribe(tickers, lambda event, data: live_prices.offer(events, (event, data)))
+
+    def generate():
+        try:
+            while True:
+                try:
+                    event, data = events.get(timeout=live_prices.KEEPALIVE_SEC)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                    continue
+                yield sse_event(event, data)
+        finally:
+            sub.close()
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# ─────────────────────────────────────────────
+#  JSON ANALYSIS API
+#  The analyze_stock output for dashboards and
+#  scripts, straight from the analysis cache; no LLM
+#  call anywhere on this path.
+# ─────────────────────────────────────────────
+API_MAX_BATCH = 500
+# The 20-day chart arrays only come back when asked for by name
+API_DEFAULT_EXCLUDE = {"prices_20d", "dates_20d"}
+
+
+def parse_fields(raw) -> list[str] | None:
+    if not raw:
+        return None
+    if isinstance(raw, str):
+        raw = raw.split(",")
+    return [f.strip() for f in raw if isinstance(f, str) and f.strip()]
+
+
+def select_fields(analysis: dict, fields: list[str] | None) -> dict:
+    """Project an analysis to `fields` (dotted names reach into indicators); errors pass through."""
+    if "error" in analysis:
+        return analysis
+    if fields is None:
+        return {k: v for k, v in analysis.items() if k not in API_DEFAULT_EXCLUDE}
+    out = {"ticker": analysis["ticker"]}
+    for field in fields:
+        head, _, rest = field.partition(".")
+        value = analysis.get(head)
+        if rest and isinstance(value, dict):
+            if rest in value:
+                out.setdefault(head, {})[rest] = value[rest]
+        elif not rest and head in analysis:
+            out[head] = value
+    return out
+
+
+@app.route("/api/analysis/<path:ticker>")
+def api_analysis(ticker):
+    with rate_limit.priority(rate_limit.BATCH):
+        analysis = analyze_stock(ticker)
+    if "error" in analysis:
+        # Unknown ticker is the caller's problem; a known one we couldn't fetch is upstream's
+        status = 404 if analysis.get("reason") == "unresolved" else 502
+        return jsonify({"query": ticker, "error": analysis["error"], "reason": analysis.get("reason")}), status
+    return jsonify(select_fields(analysis, parse_fields(request.args.get("fields"))))
+
+
+@app.route("/api/analysis", methods=["POST"])
+def api_analysis_batch():
+    data = request.get_json(silent=True) or {}
+    tickers = data.get("tickers")
+    if isinstance(tickers, str):
+        tickers = tickers.split(",")
+    if not isinstance(tickers, list):
+        return jsonify({"error": "tickers must be a list"}), 400
+    tickers = [str(t).strip() for t in tickers if str(t).strip()]
+    if len(tickers) > API_MAX_BATCH:
+        return jsonify({"error": f"at most {API_MAX_BATCH} tickers per request"}), 400
+
+    fields = parse_fields(data.get("fields") or request.args.get("fields"))
+    results = []
+    with rate_limit.priority(rate_limit.BATCH):
+        analyses = analyze_batch(tickers)
+    for query, analysis in zip(tickers, analyses):
+        if "error" in analysis:
+            results.append({"query": query, "error": analysis["error"], "reason": analysis.get("reason")})
+        else:
+            results.append(select_fields(analysis, fields))
+    return jsonify({"results": results})
+
+
+@app.route("/stats")
+def stats():
+    return jsonify({"conversations": conversations.stats(), "reply_cache": reply_cache.stats()})
+
+
+@app.route("/metrics")
+def prometheus_metrics():
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
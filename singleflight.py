@@ -0,0 +1,36 @@
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Hashable
+
+# ─────────────────────────────────────────────
+#  SINGLE-FLIGHT CALL COALESCING
+#  Concurrent callers asking for the same key share
+#  one in-flight call instead of each running it.
+# ─────────────────────────────────────────────
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, Future] = {}
+
+    def do(self, key: Hashable, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        with self._lock:
+            fut = self._calls.get(key)
+            leader = fut is None
+            if leader:
+                fut = Future()
+                self._calls[key] = fut
+
+        if leader:
+            try:
+                fut.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                fut.set_exception(e)
+            finally:
+                with self._lock:
+                    self._calls.pop(key, None)
+
+        return fut.result()
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
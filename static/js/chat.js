@@ -31,108 +31,325 @@ function renderMarkdown(text) {
     .replace(/\n/g, "<br/>");
 }
 
-function appendMessage(from, text) {
+// ─────────────────────────────────────────────
+// Windowed message list
+// Only rows near the viewport are in the DOM; the rest are dropped and their
+// measured heights stand in as two spacers, so a 500-message session lays out
+// like a 30-message one. DOM work (markdown, attach/detach, scrolling) is
+// batched into one requestAnimationFrame per frame.
+// ─────────────────────────────────────────────
+const WINDOWING = new URLSearchParams(location.search).get("windowing") !== "off";
+const OVERSCAN_PX = 800;
+const ROW_GAP_PX = 10;        // #chat-box > .msg-row margin-bottom
+const ESTIMATED_ROW_PX = 60;  // until a row has been measured
+const FOLLOW_SLACK_PX = 40;
+
+const messages = [];          // { from, text, height, row, bubble }
+const dirtyMessages = new Set();
+const topSpacer = document.createElement("div");
+const bottomSpacer = document.createElement("div");
+topSpacer.className = bottomSpacer.className = "chat-spacer";
+chatBox.append(topSpacer, bottomSpacer);
+
+let frameQueued = false;
+let followBottom = true;
+
+function buildRow(msg) {
   const row = document.createElement("div");
-  row.className = `msg-row ${from}`;
+  row.className = `msg-row ${msg.from}`;
 
   const avatar = document.createElement("div");
-  avatar.className = `msg-avatar ${from}`;
-  avatar.textContent = from === "bot" ? "🤖" : "🙋";
+  avatar.className = `msg-avatar ${msg.from}`;
+  avatar.textContent = msg.from === "bot" ? "🤖" : "🙋";
 
   const right = document.createElement("div");
   const bubble = document.createElement("div");
-  bubble.className = `bubble ${from}`;
-  bubble.innerHTML = renderMarkdown(text);
+  bubble.className = `bubble ${msg.from}`;
+  bubble.innerHTML = renderMarkdown(msg.text);
   right.appendChild(bubble);
 
-  if (from === "bot") {
+  if (msg.from === "bot") {
     row.appendChild(avatar);
     row.appendChild(right);
   } else {
     row.appendChild(right);
     row.appendChild(avatar);
   }
+  // Fade in once; rows re-attached while scrolling back just appear
+  if (msg.seen) row.classList.add("seen");
+  msg.seen = true;
+  msg.row = row;
+  msg.bubble = bubble;
+  msg.measured = false;
+  return row;
+}
+
+function appendMessage(from, text) {
+  const msg = { from, text, height: ESTIMATED_ROW_PX, row: null, bubble: null, seen: false, measured: false };
+  messages.push(msg);
+  if (from === "user") followBottom = true;
+  scheduleFrame();
+  return msg;
+}
+
+// Streaming replies call this per token; the bubble re-renders at most once per frame
+function updateMessage(msg, text) {
+  msg.text = text;
+  dirtyMessages.add(msg);
+  scheduleFrame();
+}
+
+function scrollToBottom() {
+  followBottom = true;
+  scheduleFrame();
+}
+
+function scheduleFrame() {
+  if (frameQueued) return;
+  frameQueued = true;
+  requestAnimationFrame(flushFrame);
+}
+
+function flushFrame() {
+  frameQueued = false;
+  // Writes first: re-render changed bubbles that are attached (detached ones render on attach)
+  for (const msg of dirtyMessages) {
+    if (msg.bubble) {
+      msg.bubble.innerHTML = renderMarkdown(msg.text);
+      msg.measured = false;
+    }
+  }
+  dirtyMessages.clear();
+
+  layoutWindow();
+  if (followBottom) chatBox.scrollTop = chatBox.scrollHeight;
+}
+
+function layoutWindow() {
+  const n = messages.length;
+  if (!n) return;
+
+  // One read pass: rows attached or re-rendered since the last frame
+  for (const msg of messages) {
+    if (msg.row && !msg.measured) {
+      msg.height = msg.row.offsetHeight + ROW_GAP_PX;
+      msg.measured = true;
+    }
+  }
+
+  let start = 0;
+  let end = n - 1;
+  if (WINDOWING) {
+    let total = 0;
+    for (const msg of messages) total += msg.height;
+    const viewport = chatBox.clientHeight;
+    const top = followBottom ? Math.max(0, total - viewport) : chatBox.scrollTop;
+    const lo = top - OVERSCAN_PX;
+    const hi = top + viewport + OVERSCAN_PX;
+
+    let offset = 0;
+    start = -1;
+    for (let i = 0; i < n; i++) {
+      const bottom = offset + messages[i].height;
+      if (start < 0 && bottom >= lo) start = i;
+      if (offset <= hi) end = i;
+      offset = bottom;
+    }
+    if (start < 0) start = n - 1;
+    end = Math.max(start, end);
+  }
 
-  chatBox.appendChild(row);
-  chatBox.scrollTop = chatBox.scrollHeight;
+  // Write pass: drop rows outside [start, end], attach the missing ones in order
+  let above = 0;
+  let below = 0;
+  let attached = false;
+  let next = bottomSpacer;
+  for (let i = n - 1; i >= 0; i--) {
+    const msg = messages[i];
+    if (i < start || i > end) {
+      if (msg.row) {
+        msg.row.remove();
+        msg.row = msg.bubble = null;
+      }
+      if (i < start) above += msg.height;
+      else below += msg.height;
+      continue;
+    }
+    if (!msg.row) {
+      chatBox.insertBefore(buildRow(msg), next);
+      attached = true;
+    }
+    next = msg.row;
+  }
+  topSpacer.style.height = `${above}px`;
+  bottomSpacer.style.height = `${below}px`;
+
+  // New rows were placed at estimated heights; measure them next frame
+  if (attached && WINDOWING) scheduleFrame();
 }
 
+chatBox.addEventListener("scroll", () => {
+  followBottom = chatBox.scrollHeight - chatBox.scrollTop - chatBox.clientHeight < FOLLOW_SLACK_PX;
+  scheduleFrame();
+}, { passive: true });
+
 function showTyping(show) {
   typingRow.classList.toggle("visible", show);
-  if (show) chatBox.scrollTop = chatBox.scrollHeight;
+  if (show) scrollToBottom();
 }
 
+let chartRange = "1m";
+let chartTicker = null;
+let historyRequest = 0;
+
 function drawChart(meta) {
   const container = document.getElementById("chartContainer");
   const canvas = document.getElementById("stockChart");
+  const ranges = document.getElementById("chartRanges");
 
   if (!meta || !meta.prices_20d || meta.prices_20d.length === 0) {
     container.style.display = "none";
+    chartTicker = null;
     return;
   }
 
   container.style.display = "block";
 
-  const prices = meta.prices_20d;
-  const labels = meta.dates_20d.map(d => d.slice(5)); // show MM-DD
-  const ma20 = prices.reduce((a, b) => a + b, 0) / prices.length;
-  const ma20Line = new Array(prices.length).fill(parseFloat(ma20.toFixed(2)));
+  if (meta.compare && meta.compare.length > 1) {
+    ranges.style.display = "none";
+    chartTicker = null;
+    drawComparisonChart(canvas, meta.compare);
+    return;
+  }
+
+  ranges.style.display = "flex";
+  chartTicker = meta.ticker;
+  // Draw the 20 days embedded in stock_meta right away; /history then fills in the range + MA20
+  renderPriceChart(canvas, meta.ticker, meta.dates_20d, meta.prices_20d, null);
+  loadHistory(meta.ticker, chartRange);
+}
+
+function renderPriceChart(canvas, ticker, dates, prices, ma20) {
+  // MM-DD for short windows, YYYY-MM once the window spans more than ~7 months
+  const long = dates.length > 1 && Date.parse(dates[dates.length - 1]) - Date.parse(dates[0]) > 210 * 864e5;
+  const labels = dates.map(d => long ? d.slice(0, 7) : d.slice(5));
   const currentPrice = prices[prices.length - 1];
   const isUp = currentPrice >= prices[0];
 
-  if (stockChart) stockChart.destroy();
-
-  stockChart = new Chart(canvas, {
-    type: "line",
-    data: {
-      labels: labels,
-      datasets: [
-        {
-          label: `${meta.ticker} Price`,
-          data: prices,
-          borderColor: isUp ? "#1A7F5A" : "#C0392B",
-          backgroundColor: isUp ? "rgba(26,127,90,0.08)" : "rgba(192,57,43,0.08)",
-          borderWidth: 2,
-          pointRadius: 2,
-          fill: true,
-          tension: 0.3,
+  const datasets = [
+    {
+      label: `${ticker} Price`,
+      data: prices,
+      borderColor: isUp ? "#1A7F5A" : "#C0392B",
+      backgroundColor: isUp ? "rgba(26,127,90,0.08)" : "rgba(192,57,43,0.08)",
+      borderWidth: 2,
+      pointRadius: prices.length > 60 ? 0 : 2,
+      fill: true,
+      tension: 0.3,
+    }
+  ];
+  if (ma20) {
+    datasets.push({
+      label: "20-Day MA",
+      data: ma20,
+      borderColor: "#C9A84C",
+      borderWidth: 1.5,
+      borderDash: [5, 4],
+      pointRadius: 0,
+      fill: false,
+    });
+  }
+
+  setChartData(canvas, labels, datasets, null);
+}
+
+// One Chart.js instance for the session: later answers swap labels / datasets and
+// redraw without animation instead of tearing the canvas down and rebuilding it
+function setChartData(canvas, labels, datasets, yTitle) {
+  if (!stockChart) {
+    stockChart = new Chart(canvas, {
+      type: "line",
+      data: { labels: labels, datasets: datasets },
+      options: {
+        responsive: true,
+        maintainAspectRatio: false,
+        plugins: {
+          legend: { labels: { font: { size: 10 }, color: "#0A1628" } },
+          tooltip: { mode: "index", intersect: false }
         },
-        {
-          label: "20-Day MA",
-          data: ma20Line,
-          borderColor: "#C9A84C",
-          borderWidth: 1.5,
-          borderDash: [5, 4],
-          pointRadius: 0,
-          fill: false,
+        scales: {
+          x: { ticks: { font: { size: 9 }, color: "#8892A4", maxTicksLimit: 7 }, grid: { display: false } },
+          y: {
+            ticks: { font: { size: 9 }, color: "#8892A4" },
+            grid: { color: "rgba(0,0,0,0.05)" },
+            title: { display: !!yTitle, text: yTitle || "", font: { size: 9 }, color: "#8892A4" }
+          }
         }
-      ]
-    },
-    options: {
-      responsive: true,
-      maintainAspectRatio: false,
-      plugins: {
-        legend: { labels: { font: { size: 10 }, color: "#0A1628" } },
-        tooltip: { mode: "index", intersect: false }
-      },
-      scales: {
-        x: { ticks: { font: { size: 9 }, color: "#8892A4", maxTicksLimit: 7 }, grid: { display: false } },
-        y: { ticks: { font: { size: 9 }, color: "#8892A4" }, grid: { color: "rgba(0,0,0,0.05)" } }
       }
-    }
+    });
+  } else {
+    stockChart.data.labels = labels;
+    stockChart.data.datasets = datasets;
+    stockChart.options.scales.y.title.display = !!yTitle;
+    stockChart.options.scales.y.title.text = yTitle || "";
+    stockChart.update("none");
+  }
+  scrollToBottom();
+}
+
+// Downsampled server-side to about one point per pixel of chart width
+async function loadHistory(ticker, range) {
+  const request = ++historyRequest;
+  const canvas = document.getElementById("stockChart");
+  const points = Math.max(60, Math.min(1000, Math.round(canvas.clientWidth || 300)));
+  let data = null;
+  try {
+    const res = await fetch(`/history/${encodeURIComponent(ticker)}?range=${range}&points=${points}`);
+    if (res.ok) data = await res.json();
+  } catch (e) {}
+
+  // Keep the 20-day fallback on failure; drop replies overtaken by a newer stock or range
+  if (!data || request !== historyRequest || ticker !== chartTicker) return;
+  renderPriceChart(canvas, ticker, data.dates, data.close, data.overlays.ma20);
+}
+
+function setChartRange(range) {
+  chartRange = range;
+  document.querySelectorAll("#chartRanges .range-btn").forEach(btn => {
+    btn.classList.toggle("active", btn.dataset.range === range);
   });
+  if (chartTicker) loadHistory(chartTicker, range);
+}
+
+const COMPARE_COLORS = ["#1A7F5A", "#C9A84C", "#2E5EAA", "#C0392B", "#7D3C98"];
 
-  chatBox.scrollTop = chatBox.scrollHeight;
+// Overlays each stock rebased to 100 at the start of the window
+function drawComparisonChart(canvas, metas) {
+  const labels = metas[0].dates_20d.map(d => d.slice(5));
+  const datasets = metas.map((m, i) => {
+    const base = m.prices_20d[0];
+    return {
+      label: m.ticker,
+      data: m.prices_20d.map(p => parseFloat((p / base * 100).toFixed(2))),
+      borderColor: COMPARE_COLORS[i % COMPARE_COLORS.length],
+      borderWidth: 2,
+      pointRadius: 0,
+      fill: false,
+      tension: 0.3,
+    };
+  });
+
+  setChartData(canvas, labels, datasets, "Rebased (start = 100)");
 }
 
-function updateSignalCard(meta) {
-  if (!meta || !meta.ticker) {
-    signalCard.classList.remove("visible");
-    return;
-  }
+let cardMeta = null;
+let liveSource = null;
+let liveTickers = "";
 
+function renderSignalCard(meta) {
+  const change = meta.change_pct == null ? "" : ` (${meta.change_pct > 0 ? "+" : ""}${meta.change_pct}%)`;
   signalTicker.textContent = meta.ticker;
-  signalPrice.textContent = `${meta.currency}${meta.current_price}`;
+  signalPrice.textContent = `${meta.currency}${meta.current_price}${change}`;
   signalBadge.textContent = meta.signal;
   signalConf.textContent = `Confidence: ${meta.confidence}%`;
 
@@ -141,9 +358,41 @@ function updateSignalCard(meta) {
   if (sig.includes("BUY"))  signalBadge.classList.add("badge-buy");
   else if (sig.includes("SELL")) signalBadge.classList.add("badge-sell");
   else signalBadge.classList.add("badge-hold");
+}
+
+function updateSignalCard(meta) {
+  if (!meta || !meta.ticker) {
+    signalCard.classList.remove("visible");
+    cardMeta = null;
+    subscribeLive([]);
+    return;
+  }
 
+  cardMeta = { ...meta };
+  renderSignalCard(cardMeta);
   signalCard.classList.add("visible");
   drawChart(meta);
+  subscribeLive([meta.ticker]);
+}
+
+// Keeps the card's price / signal current without re-asking; /live sends only the fields that changed
+function subscribeLive(tickers) {
+  const key = tickers.join(",");
+  if (key === liveTickers) return;
+  liveTickers = key;
+  if (liveSource) {
+    liveSource.close();
+    liveSource = null;
+  }
+  if (!key || !window.EventSource) return;
+
+  liveSource = new EventSource(`/live?tickers=${encodeURIComponent(key)}`);
+  liveSource.addEventListener("quote", (e) => {
+    const delta = JSON.parse(e.data);
+    if (!cardMeta || delta.ticker !== cardMeta.ticker) return;
+    Object.assign(cardMeta, delta);
+    renderSignalCard(cardMeta);
+  });
 }
 
 async function sendMsg(text) {
@@ -153,6 +402,76 @@ async function sendMsg(text) {
   autoResize(document.getElementById("user-input"));
   showTyping(true);
 
+  let res = null;
+  try {
+    res = await fetch("/chat/stream", {
+      method: "POST",
+      headers: { "Content-Type": "application/json", "Accept": "text/event-stream" },
+      body: JSON.stringify({ message: text })
+    });
+  } catch (e) {}
+
+  // Older browsers / proxies without streaming bodies get the one-shot endpoint
+  if (!res || !res.ok || !res.body) {
+    await sendMsgBlocking(text);
+    return;
+  }
+
+  try {
+    await readReplyStream(res.body);
+  } catch (e) {
+    showTyping(false);
+    appendMessage("bot", "I apologise — the connection was interrupted. Please try again.");
+  }
+}
+
+// Parses the /chat/stream SSE frames: stock_meta first, then token deltas
+async function readReplyStream(body) {
+  const reader = body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+  let reply = "";
+  let message = null;
+
+  const handle = (event, data) => {
+    if (event === "stock_meta") {
+      updateSignalCard(data);
+    } else if (event === "token" || event === "error") {
+      if (!message) {
+        showTyping(false);
+        message = appendMessage("bot", "");
+      }
+      reply += data.text;
+      updateMessage(message, reply);
+    }
+  };
+
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    let sep;
+    while ((sep = buffer.indexOf("\n\n")) !== -1) {
+      const frame = buffer.slice(0, sep);
+      buffer = buffer.slice(sep + 2);
+      let event = "message";
+      let data = "";
+      for (const line of frame.split("\n")) {
+        if (line.startsWith("event: ")) event = line.slice(7);
+        else if (line.startsWith("data: ")) data += line.slice(6);
+      }
+      if (data) handle(event, JSON.parse(data));
+    }
+  }
+
+  if (!message) {
+    showTyping(false);
+    appendMessage("bot", reply || "I apologise — the response was empty. Please try again.");
+  }
+}
+
+async function sendMsgBlocking(text) {
   try {
     const res = await fetch("/chat", {
       method: "POST",
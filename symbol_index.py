@@ -0,0 +1,380 @@
+from __future__ import annotations
+
+import os
+import re
+import csv
+import threading
+import time
+from bisect import bisect_left
+from typing import NamedTuple
+
+from lazy_imports import lazy_import
+
+np = lazy_import("numpy", __name__, "np")
+
+# ─────────────────────────────────────────────
+#  ALIAS INDEX
+#  All company aliases are folded into a single
+#  trie-shaped regex, so one pass over a message
+#  finds every mention (longest alias wins) no
+#  matter how large the universe grows.
+# ─────────────────────────────────────────────
+class AliasMatch(NamedTuple):
+    alias: str
+    ticker: str
+    start: int
+    end: int
+
+
+def _trie_regex(node: dict) -> str:
+    branches = [re.escape(ch) + _trie_regex(child) for ch, child in sorted(node.items()) if ch]
+    terminal = "" in node
+    if not branches:
+        return ""
+    if len(branches) == 1 and not terminal:
+        return branches[0]
+    body = "(?:" + "|".join(branches) + ")"
+    return body + "?" if terminal else body
+
+
+class AliasIndex:
+    def __init__(self, aliases: dict[str, str]):
+        self.aliases = dict(aliases)
+        self._sorted = sorted(self.aliases)
+
+        trie: dict = {}
+        for alias in self.aliases:
+            node = trie
+            for ch in alias:
+                node = node.setdefault(ch, {})
+            node[""] = {}
+        self._pattern = re.compile(r"(?<![a-z0-9])(" + _trie_regex(trie) + r")(?![a-z0-9])")
+
+    def find_all(self, text: str) -> list[AliasMatch]:
+        return [
+            AliasMatch(m.group(1), self.aliases[m.group(1)], m.start(1), m.end(1))
+            for m in self._pattern.finditer(text.lower())
+        ]
+
+    def lookup(self, alias: str) -> str | None:
+        return self.aliases.get(alias)
+
+    def unique_prefix(self, prefix: str, min_len: int = 3) -> str | None:
+        """Ticker for a partial name like "hdfc", only when every matching alias agrees."""
+        if len(prefix) < min_len:
+            return None
+        tickers = set()
+        i = bisect_left(self._sorted, prefix)
+        while i < len(self._sorted) and self._sorted[i].startswith(prefix):
+            tickers.add(self.aliases[self._sorted[i]])
+            i += 1
+        return tickers.pop() if len(tickers) == 1 else None
+
+
+# ─────────────────────────────────────────────
+#  NEGATIVE CACHE
+#  Symbols that already failed an upstream lookup
+#  are remembered for a while so typos don't keep
+#  costing network round-trips.
+# ─────────────────────────────────────────────
+class NegativeCache:
+    def __init__(self, ttl: float = 6 * 3600, max_size: int = 10_000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._expiry: dict[str, float] = {}
+
+    def add(self, symbol: str) -> None:
+        with self._lock:
+            if len(self._expiry) >= self.max_size:
+                # Dicts keep insertion order: drop the oldest entry
+                self._expiry.pop(next(iter(self._expiry)))
+            self._expiry.pop(symbol, None)
+            self._expiry[symbol] = time.monotonic() + self.ttl
+
+    def __contains__(self, symbol: str) -> bool:
+        with self._lock:
+            expiry = self._expiry.get(symbol)
+            if expiry is None:
+                return False
+            if expiry < time.monotonic():
+                del self._expiry[symbol]
+                return False
+            return True
+
+    def __len__(self) -> int:
+        return len(self._expiry)
+
+
+# ─────────────────────────────────────────────
+#  SYMBOL MASTER
+#  Exchange listing files (NSE EQUITY_L.csv, NASDAQ
+#  nasdaqlisted.txt / otherlisted.txt) folded into a
+#  trigram index over company names plus exact and
+#  prefix lookups on symbols. Postings live in one
+#  flat uint32 array, so tens of thousands of listings
+#  cost a few MB, and a misspelt name still shares
+#  most of its trigrams with the real one.
+# ─────────────────────────────────────────────
+class SymbolMatch(NamedTuple):
+    ticker: str
+    name: str
+    exchange: str
+    score: float
+
+
+# Legal-form and share-class words that carry no identity
+_NAME_NOISE = {
+    "inc", "incorporated", "corp", "corporation", "co", "company", "ltd", "limited", "plc",
+    "llc", "lp", "sa", "nv", "ag", "se", "the", "common", "stock", "ordinary", "shares",
+    "share", "depositary", "ads", "adr", "class", "new",
+}
+# Listings that aren't the company's stock
+_SKIP_WORDS = {"warrant", "warrants", "right", "rights", "unit", "units", "notes", "debentures"}
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+# otherlisted.txt exchange codes worth indexing
+_US_EXCHANGES = {"N": "NYSE", "A": "NYSE American", "P": "NYSE Arca", "Q": "NASDAQ"}
+# Bonus for a name that starts with the whole query ("tata mot" -> Tata Motors)
+_PREFIX_BONUS = 0.25
+# Postings read per query; the rarest trigrams are read first, common ones skipped past this
+_CANDIDATE_BUDGET = 4096
+
+# Trigrams over [ a-z0-9] packed into one int: 37^3 codes
+_ALPHABET = 37
+_CODES = _ALPHABET ** 3
+# Byte -> letter code; plain bytes so building it does not import numpy
+_CHAR_CODES = bytearray(256)
+for _code, _ch in enumerate(" abcdefghijklmnopqrstuvwxyz0123456789"):
+    _CHAR_CODES[ord(_ch)] = _code
+_CHAR_CODES = bytes(_CHAR_CODES)
+
+
+def normalize_name(text: str) -> str:
+    words = _NON_ALNUM.sub(" ", text.lower().replace("&", " and ")).split()
+    return " ".join(w for w in words if w not in _NAME_NOISE)
+
+
+def _trigrams(norm: str) -> set[str]:
+    padded = f" {norm} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _yahoo_symbol(symbol: str) -> str | None:
+    # Share classes are BRK.B on the exchange files and BRK-B on Yahoo; skip preferreds ($)
+    if not symbol or "$" in symbol or " " in symbol:
+        return None
+    return symbol.replace(".", "-")
+
+
+def _read_listing_file(path: str) -> list[tuple[str, str, str]]:
+    """(ticker, company name, exchange) rows from one listing file, by its header."""
+    with open(path, newline="", encoding="utf-8-sig", errors="replace") as f:
+        head = f.readline()
+        f.seek(0)
+        if "|" in head:
+            rows = csv.DictReader(f, delimiter="|")
+        else:
+            rows = csv.DictReader(f, skipinitialspace=True)
+        fields = {(name or "").strip().upper() for name in rows.fieldnames or ()}
+        out = []
+        for row in rows:
+            row = {(k or "").strip().upper(): (v or "").strip() for k, v in row.items()}
+            if "NAME OF COMPANY" in fields:                          # NSE EQUITY_L.csv
+                out.append((row["SYMBOL"] + ".NS", row["NAME OF COMPANY"], "NSE"))
+            elif "SECURITY NAME" in fields:                          # nasdaqlisted / otherlisted
+                if row.get("TEST ISSUE") == "Y" or row.get("SECURITY NAME") is None:
+                    continue
+                exchange = _US_EXCHANGES.get(row.get("EXCHANGE", "Q"))
+                ticker = _yahoo_symbol(row.get("SYMBOL") or row.get("ACT SYMBOL", ""))
+                if exchange and ticker:
+                    out.append((ticker, row["SECURITY NAME"].split(" - ")[0], exchange))
+            elif "SYMBOL" in fields and "NAME" in fields:            # plain symbol,name[,exchange]
+                out.append((row["SYMBOL"], row["NAME"], row.get("EXCHANGE", "")))
+        return out
+
+
+def load_listings(path: str) -> list[tuple[str, str, str]]:
+    """Listings from a file, or every .csv / .txt file in a directory."""
+    if os.path.isdir(path):
+        files = sorted(
+            os.path.join(path, name) for name in os.listdir(path)
+            if name.lower().endswith((".csv", ".txt"))
+        )
+    elif os.path.exists(path):
+        files = [path]
+    else:
+        return []
+    return [row for file in files for row in _read_listing_file(file)]
+
+
+def _encode(padded: np.ndarray) -> np.ndarray:
+    """Trigram codes at every position of an encoded " name " byte array."""
+    c = np.frombuffer(_CHAR_CODES, dtype=np.uint8)[padded].astype(np.int32)
+    return c[:-2] * _ALPHABET * _ALPHABET + c[1:-1] * _ALPHABET + c[2:]
+
+
+def _query_codes(norm: str) -> np.ndarray:
+    return np.unique(_encode(np.frombuffer(f" {norm} ".encode("ascii"), dtype=np.uint8)))
+
+
+class _SortedNorms:
+    """Sequence view of normalized names in sorted order, for bisect."""
+
+    def __init__(self, master: "SymbolMaster", ids: np.ndarray):
+        self.master = master
+        self.ids = ids
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __getitem__(self, i: int) -> str:
+        return self.master._norm(int(self.ids[i]))
+
+
+class SymbolMaster:
+    def __init__(self, listings: list[tuple[str, str, str]]):
+        tickers, names, exchanges, norms = [], [], [], []
+        seen = set()
+        for ticker, name, exchange in listings:
+            ticker = ticker.upper()
+            norm = normalize_name(name)
+            if not norm or not ticker.isascii() or ticker in seen or _SKIP_WORDS.intersection(norm.split()):
+                continue
+            seen.add(ticker)
+            tickers.append(ticker)
+            names.append(name.strip())
+            exchanges.append(exchange)
+            norms.append(norm)
+        n = self._n = len(tickers)
+
+        # Strings are kept as one blob plus offsets rather than n separate objects
+        self._tickers = np.array(tickers, dtype=np.bytes_)
+        self._ticker_order = np.argsort(self._tickers)
+        self._sorted_tickers = self._tickers[self._ticker_order]
+        self._names = "".join(names)
+        self._name_offsets = np.cumsum([0, *map(len, names)], dtype=np.uint32)
+        self._exchange_names = sorted(set(exchanges))
+        self._exchanges = np.array([self._exchange_names.index(e) for e in exchanges], dtype=np.uint8)
+
+        padded = [f" {norm} " for norm in norms]
+        self._norms = "".join(padded)
+        self._norm_offsets = np.cumsum([0, *map(len, padded)], dtype=np.uint32)
+
+        # Every (listing, trigram) pair once, then grouped by trigram: one flat postings array
+        owner = np.repeat(np.arange(n, dtype=np.int64), np.diff(self._norm_offsets).astype(np.int64))
+        codes = _encode(np.frombuffer(self._norms.encode("ascii"), dtype=np.uint8))
+        same_name = owner[:-2] == owner[2:]
+        pairs = np.sort(owner[:-2][same_name] * _CODES + codes[same_name])
+        first = np.ones(len(pairs), dtype=bool)
+        first[1:] = pairs[1:] != pairs[:-1]
+        pairs = pairs[first]
+        ids, codes = pairs // _CODES, pairs % _CODES
+        id_type = np.uint16 if n <= np.iinfo(np.uint16).max else np.uint32
+        self._postings = ids[np.argsort(codes, kind="stable")].astype(id_type)
+        self._gram_offsets = np.concatenate(([0], np.cumsum(np.bincount(codes, minlength=_CODES)))).astype(np.uint32)
+
+        order = sorted(range(n), key=norms.__getitem__)
+        self._sorted = _SortedNorms(self, np.array(order, dtype=id_type))
+
+    @classmethod
+    def from_path(cls, path: str) -> "SymbolMaster":
+        return cls(load_listings(path))
+
+    def __len__(self) -> int:
+        return self._n
+
+    def _norm(self, i: int) -> str:
+        return self._norms[self._norm_offsets[i] + 1:self._norm_offsets[i + 1] - 1]
+
+    def _match(self, i: int, score: float) -> SymbolMatch:
+        return SymbolMatch(
+            self._tickers[i].decode(),
+            self._names[self._name_offsets[i]:self._name_offsets[i + 1]],
+            self._exchange_names[self._exchanges[i]],
+            round(score, 3),
+        )
+
+    def _ticker_id(self, ticker: str) -> int | None:
+        key = ticker.encode("ascii")
+        if len(key) > self._sorted_tickers.itemsize:
+            return None
+        # Same dtype as the array, or numpy casts the whole array to compare
+        pos = int(np.searchsorted(self._sorted_tickers, np.array(key, dtype=self._sorted_tickers.dtype)))
+        if pos < self._n and self._sorted_tickers[pos] == key:
+            return int(self._ticker_order[pos])
+        return None
+
+    def symbol(self, text: str) -> SymbolMatch | None:
+        """Exact listing for a symbol as typed, e.g. "RELIANCE", "RELIANCE.NS", "BRK.B"."""
+        symbol = text.strip().upper()
+        if not symbol or not symbol.isascii() or not self._n:
+            return None
+        for candidate in (symbol, symbol.replace(".", "-"), symbol + ".NS"):
+            i = self._ticker_id(candidate)
+            if i is not None:
+                return self._match(i, 2.0)
+        return None
+
+    def _candidates(self, codes: np.ndarray, k: int) -> np.ndarray:
+        """Listings sharing the most trigrams with the query, counting the rarest trigrams first."""
+        spans = zip(self._gram_offsets[codes].tolist(), self._gram_offsets[codes + 1].tolist())
+        picked, total = [], 0
+        for a, b in sorted(spans, key=lambda span: span[1] - span[0]):
+            if a == b:
+                continue
+            if picked and total + (b - a) > _CANDIDATE_BUDGET:
+                break
+            picked.append(self._postings[a:b])
+            total += b - a
+        if not picked:
+            return np.empty(0, dtype=np.int64)
+        ids, hits = np.unique(np.concatenate(picked), return_counts=True)
+        if len(ids) > k:
+            ids = ids[np.argpartition(-hits, k - 1)[:k]]
+        return ids
+
+    def _score(self, i: int, query_grams: set[str], words: int, norm: str) -> float:
+        """Dice similarity to the whole name or its first `words` words, whichever is higher."""
+        name = self._norm(i)
+        texts = [name]
+        lead = name.split()[:words]
+        if len(lead) < name.count(" ") + 1:
+            texts.append(" ".join(lead))
+        best = 0.0
+        for text in texts:
+            grams = _trigrams(text)
+            best = max(best, 2.0 * len(query_grams & grams) / (len(query_grams) + len(grams)))
+        return best + (_PREFIX_BONUS if name.startswith(norm) else 0.0)
+
+    def search(self, query: str, limit: int = 5) -> list[SymbolMatch]:
+        """Listings ranked by trigram similarity of the name; an exact symbol always ranks first."""
+        norm = normalize_name(query)
+        exact = self.symbol(query)
+        if not norm or not self._n:
+            return [exact] if exact else []
+
+        candidates = set(self._candidates(_query_codes(norm), limit * 4).tolist())
+        lo = bisect_left(self._sorted, norm)
+        for pos in range(lo, min(lo + limit * 4, self._n)):
+            if not self._sorted[pos].startswith(norm):
+                break
+            candidates.add(int(self._sorted.ids[pos]))
+
+        query_grams, words = _trigrams(norm), len(norm.split())
+        scored = sorted(
+            ((self._score(i, query_grams, words, norm), i) for i in candidates),
+            key=lambda item: (-item[0], self._norm_offsets[item[1] + 1] - self._norm_offsets[item[1]]),
+        )
+        matches = [self._match(i, score) for score, i in scored[:limit]]
+        if exact is not None:
+            matches = [exact, *(m for m in matches if m.ticker != exact.ticker)][:limit]
+        return matches
+
+    def best(self, query: str, min_score: float = 0.5, margin: float = 0.0) -> SymbolMatch | None:
+        """The top match, if it scores at least `min_score` and beats the runner-up by `margin`."""
+        matches = self.search(query, limit=2)
+        if not matches or matches[0].score < min_score:
+            return None
+        if len(matches) > 1 and matches[0].score - matches[1].score < margin:
+            return None
+        return matches[0]
@@ -0,0 +1,70 @@
+import os
+import sys
+import tempfile
+
+# App modules read their paths and switches at import, so point everything at a
+# scratch directory and keep the network out before any of them is imported
+_DATA_DIR = tempfile.mkdtemp(prefix="aria-tests-")
+os.environ.update({
+    "HISTORY_DB_PATH": os.path.join(_DATA_DIR, "history.db"),
+    "PRICE_STORE_DIR": os.path.join(_DATA_DIR, "prices"),
+    "RATE_LIMIT_DB_PATH": os.path.join(_DATA_DIR, "ratelimit.db"),
+    "LIVE_DB_PATH": os.path.join(_DATA_DIR, "live.db"),
+    "SYMBOL_MASTER_PATH": os.path.join(_DATA_DIR, "symbols"),
+    "WARM_SNAPSHOT_PATH": os.path.join(_DATA_DIR, "warm_snapshot.json.gz"),
+    "WARM_SNAPSHOT_INTERVAL_SEC": "0",
+    "MARKET_DATA_PROVIDER": "local",
+    "MARKET_DATA_PATH": os.path.join(_DATA_DIR, "market"),
+    "CONVERSATION_STORE": "memory",
+    "STARTUP_PREWARM": "0",
+    "GROQ_API_KEY": "test",
+})
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+
+class FakeProvider:
+    """
+    Market data provider under test control: `mode` is "ok" (a year of bars),
+    "empty" (upstream knows no such symbol) or "error" (throttled / down).
+    """
+    name = "fake"
+
+    def __init__(self):
+        self.mode = "ok"
+        self.info_mode = "ok"
+        self.calls = 0
+
+    def _frame(self) -> pd.DataFrame:
+        idx = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=260, name="Date")
+        close = 100 * np.exp(np.cumsum(np.random.default_rng(5).normal(0.0005, 0.015, len(idx))))
+        return pd.DataFrame(
+            {"Open": close, "High": close * 1.01, "Low": close * 0.99, "Close": close, "Volume": 1e6}, index=idx
+        )
+
+    def history(self, ticker, period="1y", start=None):
+        self.calls += 1
+        if self.mode == "error":
+            raise RuntimeError("429 Too Many Requests")
+        return self._frame() if self.mode == "ok" else self._frame().iloc[:0]
+
+    def history_many(self, tickers, period="1y", start=None):
+        if self.mode == "error":
+            raise RuntimeError("429 Too Many Requests")
+        return {t: self._frame() for t in tickers} if self.mode == "ok" else {}
+
+    def info(self, ticker):
+        if self.info_mode == "error":
+            raise RuntimeError("429 Too Many Requests")
+        return {"longName": f"{ticker} Corp", "sector": "Technology"}
+
+
+@pytest.fixture
+def provider(monkeypatch):
+    import market_data
+    fake = FakeProvider()
+    monkeypatch.setattr(market_data, "provider", fake)
+    return fake
@@ -0,0 +1,53 @@
+import pytest
+
+import genai
+import routes
+from app import app
+
+
+@pytest.fixture
+def client():
+    return app.test_client()
+
+
+def test_unresolved_ticker_is_404(client, monkeypatch):
+    monkeypatch.setattr(routes, "analyze_stock", lambda name: genai.build_analysis(name, None, None, {}))
+    res = client.get("/api/analysis/NOTAREALCO")
+    assert res.status_code == 404
+    assert res.get_json()["reason"] == "unresolved"
+
+
+def test_fetch_failure_for_known_ticker_is_502(client, monkeypatch):
+    monkeypatch.setattr(routes, "analyze_stock", lambda name: genai.build_analysis(name, "TCS.NS", None, {}))
+    res = client.get("/api/analysis/TCS")
+    assert res.status_code == 502
+    body = res.get_json()
+    assert body["reason"] == "unavailable"
+    assert "TCS.NS" in body["error"]
+
+
+def test_batch_reports_reason_per_ticker(client, monkeypatch):
+    monkeypatch.setattr(routes, "analyze_batch", lambda names: [
+        genai.build_analysis("NOTAREALCO", None, None, {}),
+        genai.build_analysis("TCS", "TCS.NS", None, {}),
+    ])
+    res = client.post("/api/analysis", json={"tickers": ["NOTAREALCO", "TCS"]})
+    assert res.status_code == 200
+    assert [r["reason"] for r in res.get_json()["results"]] == ["unresolved", "unavailable"]
+
+
+def test_upstream_error_is_502_not_404(client, provider):
+    provider.mode = "error"
+    res = client.get("/api/analysis/ORCLQ")
+    assert res.status_code == 502
+    assert res.get_json()["reason"] == "unavailable"
+
+    provider.mode = "ok"
+    assert client.get("/api/analysis/ORCLQ").status_code == 200
+
+
+def test_upstream_empty_answer_is_404(client, provider):
+    provider.mode = "empty"
+    res = client.get("/api/analysis/NOPEQ")
+    assert res.status_code == 404
+    assert res.get_json()["reason"] == "unresolved"
@@ -0,0 +1,64 @@
+import time
+import asyncio
+
+import genai
+import history_store
+
+
+def _ticks_during(coro_fn) -> tuple[object, int]:
+    """Run coro_fn() alongside a 10 ms ticker; returns its result and how often the ticker ran."""
+    async def main():
+        ticks = 0
+        done = asyncio.Event()
+
+        async def ticker():
+            nonlocal ticks
+            while not done.is_set():
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        task = asyncio.create_task(ticker())
+        try:
+            return await coro_fn(), ticks
+        finally:
+            done.set()
+            await task
+    return asyncio.run(main())
+
+
+def test_warm_cache_lookup_does_not_block_the_loop(monkeypatch):
+    cached = {"ticker": "TCS.NS", "signal": "HOLD"}
+
+    def slow_load(ticker):
+        time.sleep(0.2)
+        return dict(cached)
+
+    monkeypatch.setattr(genai, "resolve_ticker", lambda name, probe=True: "TCS.NS")
+    monkeypatch.setattr(history_store, "load_analysis", slow_load)
+
+    result, ticks = _ticks_during(lambda: genai.analyze_stock_async("tcs"))
+    assert result == cached
+    # Blocking the loop for the whole lookup would leave the ticker at one tick
+    assert ticks >= 5
+
+
+def test_remembering_an_analysis_does_not_block_the_loop(monkeypatch):
+    saved = []
+
+    def slow_save(kind, ticker, value):
+        time.sleep(0.2)
+        saved.append(ticker)
+
+    async def fetch(ticker, period="1y"):
+        return None, {"name": "Tata Consultancy Services"}
+
+    monkeypatch.setattr(genai, "resolve_ticker", lambda name, probe=True: "TCS.NS")
+    monkeypatch.setattr(genai, "_warm_analysis", lambda ticker: None)
+    monkeypatch.setattr(genai, "fetch_bundle_async", fetch)
+    monkeypatch.setattr(genai, "build_analysis", lambda name, ticker, prices, info: {"ticker": ticker})
+    monkeypatch.setattr(history_store, "save_warm", slow_save)
+
+    result, ticks = _ticks_during(lambda: genai.analyze_stock_async("tcs"))
+    assert result == {"ticker": "TCS.NS"}
+    assert saved == ["TCS.NS"]
+    assert ticks >= 5
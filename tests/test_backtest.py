@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+import backtest
+from genai import predict_signal
+from indicators import compute_indicator_series, indicators_at
+
+
+def _walk(seed: int, n: int = 420, drift: float = 0.0, vol: float = 0.02) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return 100 * np.exp(np.cumsum(rng.normal(drift, vol, n)))
+
+
+SERIES = [
+    pytest.param(_walk(1), id="flat"),
+    pytest.param(_walk(2, drift=0.004, vol=0.01), id="uptrend"),
+    pytest.param(_walk(3, drift=-0.004, vol=0.01), id="downtrend"),
+    pytest.param(_walk(4, vol=0.05), id="volatile"),
+    pytest.param(np.round(_walk(5, n=300), 1), id="ticks"),
+]
+
+
+@pytest.mark.parametrize("close", SERIES)
+def test_scores_match_predict_signal(close):
+    """backtest re-implements predict_signal's rules in NumPy; they must not drift apart."""
+    series = compute_indicator_series(close)
+    scores = backtest.signal_scores(close)
+    buckets = np.digitize(scores, backtest.SCORE_BINS)
+    confidence = backtest.claimed_confidence(scores, buckets)
+    for i in range(len(close)):
+        expected = predict_signal(indicators_at(series, i))
+        assert (int(scores[i]), backtest.SIGNALS[buckets[i]], int(confidence[i])) == (
+            expected["score"], expected["signal"], expected["confidence"]
+        ), f"bar {i}"
+
+
+def test_every_signal_bucket_is_exercised():
+    seen = set()
+    for param in SERIES:
+        close = param.values[0]
+        seen.update(np.digitize(backtest.signal_scores(close), backtest.SCORE_BINS).tolist())
+    assert seen == set(range(len(backtest.SIGNALS)))
+
+
+# The last bar has no forward closes at all
+@pytest.mark.filterwarnings("ignore:All-NaN slice")
+def test_simulate_exits_outcomes():
+    close = np.array([100.0, 105.0, 113.0, 100.0, 97.0, 98.0, 99.0, 100.0])
+    trades = backtest.simulate_exits(close, horizon=3)
+    # 0: +13% target two bars on; 1, 2: -7% stops; 3, 4: held to the horizon; 5-7: still open
+    assert trades["outcome"].tolist() == [0, 1, 1, 2, 2, -1, -1, -1]
+    assert trades["bars"][:5].tolist() == [2, 3, 1, 3, 3]
+    assert trades["return"][0] == pytest.approx(0.13)
+    assert trades["return"][3] == pytest.approx(-0.01)
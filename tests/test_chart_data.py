@@ -0,0 +1,52 @@
+import datetime as dt
+
+import numpy as np
+import pytest
+
+import chart_data
+import history_store
+from chart_data import RANGES, build_payload, lttb
+from price_store import PriceSeries
+
+
+def _series(days: int, seed: int = 3) -> PriceSeries:
+    end = dt.date(2026, 10, 16)
+    dates = np.arange(np.datetime64(end - dt.timedelta(days=days)), np.datetime64(end + dt.timedelta(days=1)))
+    dates = dates[np.is_busday(dates)]
+    ordinals = np.array([d.toordinal() for d in dates.astype(dt.date)], dtype=np.int32)
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.015, len(ordinals))))
+    return PriceSeries(ordinals, close, np.ones(len(ordinals)))
+
+
+def test_lttb_keeps_endpoints_and_count():
+    y = np.sin(np.linspace(0, 20, 1000))
+    picked = lttb(np.arange(1000), y, 100)
+    assert len(picked) == 100
+    assert picked[0] == 0 and picked[-1] == 999
+    assert np.all(np.diff(picked) > 0)
+
+
+def test_lttb_keeps_spikes():
+    y = np.zeros(1000)
+    y[[137, 512, 880]] = [5.0, -7.0, 3.0]
+    picked = lttb(np.arange(1000), y, 50)
+    assert {137, 512, 880} <= set(picked.tolist())
+
+
+@pytest.mark.parametrize("n, threshold", [(10, 20), (10, 10), (10, 2), (0, 5)])
+def test_lttb_passthrough_when_nothing_to_drop(n, threshold):
+    assert lttb(np.arange(n), np.arange(n, dtype=float), threshold).tolist() == list(range(n))
+
+
+@pytest.mark.parametrize("range_key", list(RANGES))
+def test_fetched_period_warms_up_ma200(range_key):
+    days, period = RANGES[range_key]
+    prices = _series(history_store.PERIOD_DAYS[period])
+    payload = build_payload("TCS.NS", range_key, chart_data.DEFAULT_POINTS, prices, "₹")
+    # Short windows average over what they have, so check the first point saw 200 full bars
+    first = int(np.searchsorted(prices.dates, dt.date.fromisoformat(payload["dates"][0]).toordinal()))
+    assert first >= 199
+    assert payload["overlays"]["ma200"][0] == round(float(prices.close[first - 199:first + 1].mean()), 2)
+    assert payload["dates"][0] >= (dt.date(2026, 10, 16) - dt.timedelta(days=days)).isoformat()
+    assert len(payload["close"]) == min(chart_data.DEFAULT_POINTS, payload["total_points"])
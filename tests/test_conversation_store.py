@@ -0,0 +1,96 @@
+import pytest
+
+import conversation_store
+from conversation_store import MemoryConversationStore, SQLiteConversationStore
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self) -> float:
+        return self.now
+
+    monotonic = time
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(conversation_store, "time", fake)
+    return fake
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_store(request, tmp_path):
+    def make(**kwargs):
+        if request.param == "sqlite":
+            return SQLiteConversationStore(str(tmp_path / "conversations.db"), **kwargs)
+        return MemoryConversationStore(**kwargs)
+    return make
+
+
+def _msg(i: int) -> dict:
+    return {"role": "user", "content": f"message {i}"}
+
+
+def test_append_and_get_round_trip(make_store, clock):
+    store = make_store()
+    store.append("a", _msg(1), _msg(2))
+    store.append("a", _msg(3))
+    assert store.get("a") == [_msg(1), _msg(2), _msg(3)]
+    assert store.get("missing") == []
+
+
+def test_keeps_only_the_latest_messages(make_store, clock):
+    store = make_store(max_messages=3)
+    for i in range(5):
+        store.append("a", _msg(i))
+    assert store.get("a") == [_msg(2), _msg(3), _msg(4)]
+
+
+def test_idle_session_expires(make_store, clock):
+    store = make_store(ttl=60)
+    store.append("a", _msg(1))
+    clock.now += 30
+    assert store.get("a") == [_msg(1)]
+    # Reading refreshed it, so it survives another 59s from here
+    clock.now += 59
+    assert store.get("a") == [_msg(1)]
+    clock.now += 61
+    assert store.get("a") == []
+    # A new message after expiry starts a fresh history
+    store.append("a", _msg(2))
+    assert store.get("a") == [_msg(2)]
+
+
+def test_least_recently_used_session_is_evicted(make_store, clock):
+    store = make_store(max_sessions=2)
+    store.append("a", _msg(1))
+    clock.now += 1
+    store.append("b", _msg(2))
+    clock.now += 1
+    store.get("a")
+    clock.now += 1
+    store.append("c", _msg(3))
+    if isinstance(store, SQLiteConversationStore):
+        store.purge()
+    assert store.get("b") == []
+    assert store.get("a") == [_msg(1)]
+    assert store.get("c") == [_msg(3)]
+    assert store.stats()["evictions"] == 1
+
+
+def test_memory_store_tracks_content_bytes(clock):
+    store = MemoryConversationStore(max_messages=2)
+    store.append("a", _msg(1), _msg(2), _msg(3))
+    assert store.stats()["content_bytes"] == 2 * len("message 1")
+    store.reset("a")
+    stats = store.stats()
+    assert (stats["sessions"], stats["messages"], stats["content_bytes"]) == (0, 0, 0)
+
+
+def test_content_bytes_are_utf8_bytes(make_store):
+    store = make_store()
+    store.append("a", {"role": "user", "content": "₹500 पर TCS?"})
+    assert store.stats()["content_bytes"] == len("₹500 पर TCS?".encode())
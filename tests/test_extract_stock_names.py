@@ -0,0 +1,20 @@
+import pytest
+
+from routes import extract_stock_names
+
+
+@pytest.mark.parametrize("message, expected", [
+    ("What does the RSI and MACD say for TCS?", ["tcs"]),
+    ("Is Infosys a BUY or HOLD right now?", ["infosys"]),
+    ("Apple looks cheap, what about EPS and PE?", ["apple"]),
+    ("TCS ETF and SIP", ["tcs"]),
+    ("Should I buy AAPL?", ["AAPL"]),
+    ("What is the NAV of this ETF and its GDP link?", []),
+])
+def test_jargon_is_not_a_ticker(message, expected):
+    assert extract_stock_names(message) == expected
+
+
+def test_raw_tickers_join_known_names_for_comparisons():
+    assert extract_stock_names("compare TCS vs SNOW") == ["tcs", "SNOW"]
+    assert extract_stock_names("Infosys versus PLTR") == ["infosys", "PLTR"]
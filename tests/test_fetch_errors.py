@@ -0,0 +1,71 @@
+import asyncio
+
+import pytest
+
+import genai
+import history_store
+
+
+def test_upstream_error_is_not_an_unknown_symbol(provider):
+    provider.mode = "error"
+    failed = genai.analyze_stock("ERRA")
+    assert failed["reason"] == "unavailable"
+    assert "ERRA" not in genai.UNKNOWN_SYMBOLS
+
+    # Once upstream recovers the same symbol resolves
+    provider.mode = "ok"
+    assert genai.analyze_stock("ERRA")["ticker"] == "ERRA"
+
+
+def test_empty_answer_marks_symbol_unknown(provider):
+    provider.mode = "empty"
+    assert genai.analyze_stock("NODATAB")["reason"] == "unresolved"
+    assert "NODATAB" in genai.UNKNOWN_SYMBOLS
+
+
+def test_async_path_tells_errors_from_empty(provider):
+    provider.mode = "error"
+    failed = asyncio.run(genai.analyze_stock_async("ERRC"))
+    assert failed["reason"] == "unavailable"
+    assert "ERRC" not in genai.UNKNOWN_SYMBOLS
+
+
+def test_batch_tells_errors_from_empty(provider):
+    provider.mode = "error"
+    assert [a["reason"] for a in genai.analyze_batch(["ERRD"])] == ["unavailable"]
+    assert "ERRD" not in genai.UNKNOWN_SYMBOLS
+    provider.mode = "empty"
+    assert [a["reason"] for a in genai.analyze_batch(["NODATAE"])] == ["unresolved"]
+
+
+def test_fetch_prices_still_returns_none_on_error(provider):
+    provider.mode = "error"
+    assert genai.fetch_prices("ERRF") is None
+    with pytest.raises(genai.UpstreamFailed):
+        genai.load_prices("ERRF")
+
+
+def test_stored_bars_cover_an_upstream_error(provider):
+    assert genai.load_prices("CACHEG") is not None
+    provider.mode = "error"
+    # Stale or not, what is on disk is still served
+    assert genai.load_prices("CACHEG") is not None
+
+
+def test_analysis_without_info_is_served_but_not_kept(provider):
+    provider.info_mode = "error"
+    degraded = genai.analyze_stock("NOINFOH")
+    assert degraded["name"] == "NOINFOH" and degraded["sector"] == "N/A"
+    assert history_store.load_analysis("NOINFOH") is None
+
+    provider.info_mode = "ok"
+    assert genai.analyze_stock("NOINFOH")["name"] == "NOINFOH Corp"
+    assert history_store.load_analysis("NOINFOH") is not None
+
+
+def test_batch_keeps_only_analyses_with_info(provider):
+    provider.info_mode = "error"
+    assert [a["sector"] for a in genai.analyze_batch(["NOINFOJ"])] == ["N/A"]
+    assert history_store.load_analysis("NOINFOJ") is None
+    provider.info_mode = "ok"
+    assert [a["sector"] for a in genai.analyze_batch(["NOINFOJ"])] == ["Technology"]
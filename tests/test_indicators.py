@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from indicators import IndicatorState, compute_indicator_series, indicators_at
+
+
+def _walk(n: int, seed: int = 11) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return 100 * np.exp(np.cumsum(rng.normal(0.0005, 0.02, n)))
+
+
+def _assert_close(got: dict, expected: dict) -> None:
+    # Both sides are rounded to 2-4 decimals; a rounding tie may land one step apart
+    assert got.keys() == expected.keys()
+    for key, value in expected.items():
+        assert got[key] == pytest.approx(value, abs=0.011), key
+
+
+def test_streaming_from_empty_matches_vectorized():
+    close = _walk(450)
+    series = compute_indicator_series(close)
+    state = IndicatorState()
+    for i, price in enumerate(close):
+        _assert_close(state.update(price), indicators_at(series, i))
+
+
+@pytest.mark.parametrize("seed_bars", [1, 19, 200, 260])
+def test_seeded_state_continues_like_full_history(seed_bars):
+    close = _walk(420, seed=seed_bars)
+    series = compute_indicator_series(close)
+    state = IndicatorState.from_closes(close[:seed_bars])
+    _assert_close(state.snapshot(), indicators_at(series, seed_bars - 1))
+    for i in range(seed_bars, len(close)):
+        _assert_close(state.update({"Close": close[i]}), indicators_at(series, i))
+
+
+def test_bytes_round_trip_keeps_updating_identically():
+    close = _walk(300)
+    state = IndicatorState.from_closes(close[:250])
+    copy = IndicatorState.from_bytes(state.to_bytes())
+    assert copy.snapshot() == state.snapshot()
+    for price in close[250:]:
+        assert copy.update(price) == state.update(price)
+
+
+def test_empty_state_has_no_snapshot():
+    with pytest.raises(ValueError):
+        IndicatorState().snapshot()
+    assert IndicatorState.from_closes(np.array([])).n == 0
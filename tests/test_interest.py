@@ -0,0 +1,50 @@
+import genai
+import history_store
+import prefetch
+import rate_limit
+
+
+def _remember(ticker: str) -> None:
+    genai._remember_analysis({"ticker": ticker, "signal": "HOLD"}, {"name": ticker})
+
+
+def test_interactive_analysis_notes_interest():
+    history_store.pop_interest()
+    _remember("INTR.NS")
+    assert history_store.pop_interest() == ["INTR.NS"]
+
+
+def test_batch_and_prefetch_analyses_do_not_note_interest():
+    history_store.pop_interest()
+    with rate_limit.priority(rate_limit.BATCH):
+        _remember("BATCH.NS")
+    with rate_limit.priority(rate_limit.PREFETCH):
+        _remember("PREF.NS")
+    assert history_store.pop_interest() == []
+    # Still cached for the next reader
+    assert history_store.load_analysis("BATCH.NS") is not None
+
+
+def test_extra_tickers_expire(monkeypatch):
+    history_store.pop_interest()
+    scheduler = prefetch.PrefetchScheduler(["TCS.NS"])
+    clock = [1_000_000.0]
+    monkeypatch.setattr(prefetch.time, "time", lambda: clock[0])
+
+    history_store.note_interest("OLD.NS")
+    scheduler._drain_interest()
+    clock[0] += prefetch.EXTRA_TTL / 2
+    history_store.note_interest("NEW.NS")
+    scheduler._drain_interest()
+    assert list(scheduler.extra) == ["OLD.NS", "NEW.NS"]
+
+    clock[0] += prefetch.EXTRA_TTL / 2 + 1
+    scheduler._drain_interest()
+    assert list(scheduler.extra) == ["NEW.NS"]
+
+    # Asking again renews it
+    history_store.note_interest("NEW.NS")
+    scheduler._drain_interest()
+    clock[0] += prefetch.EXTRA_TTL - 1
+    scheduler._drain_interest()
+    assert list(scheduler.extra) == ["NEW.NS"]
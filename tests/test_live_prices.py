@@ -0,0 +1,69 @@
+import sys
+
+import pytest
+
+import live_prices
+from live_prices import Broker, LiveHub
+
+
+def _quote(price: float, signal: str = "HOLD") -> dict:
+    return {"ticker": "TCS.NS", "current_price": price, "change_pct": 0.5, "signal": signal,
+            "score": 1, "confidence": 60, "as_of": "2026-10-16"}
+
+
+@pytest.fixture
+def broker(tmp_path):
+    return Broker(str(tmp_path / "live.db"))
+
+
+def test_publish_bumps_seq_only_on_visible_change(broker):
+    assert broker.publish("TCS.NS", _quote(100.0))
+    assert not broker.publish("TCS.NS", _quote(100.0) | {"as_of": "2026-10-17"})
+    assert broker.publish("TCS.NS", _quote(101.0))
+    changes = broker.changes(0)
+    assert [(seq, t) for seq, t, _ in changes] == [(2, "TCS.NS")]
+    assert changes[0][2]["current_price"] == 101.0
+    assert broker.changes(2) == []
+
+
+def test_failed_poll_is_recorded_but_not_published(broker):
+    assert not broker.publish("NODATA", None)
+    assert broker.changes(0) == []
+    broker.heartbeat("w1", ["NODATA"], ttl=60)
+    (ticker, polled), = broker.watched()
+    assert ticker == "NODATA" and polled is not None
+
+
+def test_watched_drops_expired_heartbeats(broker):
+    broker.heartbeat("w1", ["TCS.NS", "AAPL"], ttl=60)
+    broker.heartbeat("w2", ["AAPL"], ttl=-1)
+    assert sorted(t for t, _ in broker.watched()) == ["AAPL", "TCS.NS"]
+    broker.heartbeat("w1", [], ttl=60)
+    assert broker.watched() == []
+
+
+def test_hub_sends_full_quote_then_deltas(broker, monkeypatch):
+    hub = LiveHub(broker)
+    monkeypatch.setattr(hub, "_is_poller", lambda: False)
+    broker.publish("TCS.NS", _quote(100.0))
+    events = []
+    sub = live_prices.Subscription(hub, ["TCS.NS"], lambda event, payload: events.append(payload))
+    hub._by_ticker["TCS.NS"] = {sub}
+    hub._pending.add(sub)
+
+    hub._tick("w1")
+    assert events == [_quote(100.0)]
+
+    broker.publish("TCS.NS", _quote(102.0, "BUY"))
+    hub._tick("w1")
+    assert events[1] == {"ticker": "TCS.NS", "current_price": 102.0, "signal": "BUY"}
+
+    sub.close()
+    broker.publish("TCS.NS", _quote(103.0))
+    hub._tick("w1")
+    assert len(events) == 2
+
+
+def test_every_worker_polls_without_fcntl(broker, monkeypatch):
+    monkeypatch.setitem(sys.modules, "fcntl", None)
+    assert LiveHub(broker)._is_poller()
@@ -0,0 +1,38 @@
+import prompt_builder
+from prompt_builder import build_prompt, count_tokens
+
+
+def _turns(n: int) -> list[dict]:
+    return [
+        {"role": "user" if i % 2 == 0 else "assistant", "content": f"Message number {i}. More detail follows here."}
+        for i in range(n)
+    ]
+
+
+def test_short_history_goes_verbatim():
+    history = _turns(4)
+    messages, stats = build_prompt("SYSTEM", history)
+    assert messages[0] == {"role": "system", "content": "SYSTEM"}
+    assert messages[1:] == history
+    assert stats["messages_summarized"] == 0
+
+
+def test_older_turns_collapse_into_first_sentence_summary():
+    history = _turns(prompt_builder.KEEP_MESSAGES + 4)
+    messages, stats = build_prompt("SYSTEM", history)
+    summary = messages[1]["content"]
+    assert summary.startswith("Summary of the earlier conversation:")
+    assert "- User: Message number 0." in summary
+    assert "More detail" not in summary
+    assert messages[2:] == history[-prompt_builder.KEEP_MESSAGES:]
+    assert stats["messages_summarized"] == 4
+    assert stats["prompt_tokens"] < stats["unbudgeted_tokens"]
+
+
+def test_latest_message_survives_a_tiny_budget(monkeypatch):
+    monkeypatch.setattr(prompt_builder, "HISTORY_TOKEN_BUDGET", 1)
+    history = _turns(3)
+    messages, stats = build_prompt("SYSTEM", history)
+    assert messages[-1] == history[-1]
+    assert stats["messages_verbatim"] == 1
+    assert stats["history_tokens"] == count_tokens(history[-1]["content"])
@@ -0,0 +1,168 @@
+import asyncio
+import time
+import threading
+
+import pytest
+
+import rate_limit
+from rate_limit import Governor, SharedTokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(rate_limit.time, "time", fake)
+    return fake
+
+
+def test_bucket_spends_burst_then_reports_wait(tmp_path, clock):
+    bucket = SharedTokenBucket("up", rate=2.0, burst=3.0, path=str(tmp_path / "rl.db"))
+    assert [bucket.try_take() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.try_take() == pytest.approx(0.5)
+    clock.now += 0.5
+    assert bucket.try_take() == 0.0
+    # Refill stops at the burst size
+    clock.now += 60
+    assert [bucket.try_take() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.try_take() > 0
+
+
+def test_cost_above_burst_is_capped(tmp_path, clock):
+    bucket = SharedTokenBucket("up", rate=1.0, burst=2.0, path=str(tmp_path / "rl.db"))
+    assert bucket.try_take(cost=5) == 0.0
+    assert bucket.try_take(cost=5) == pytest.approx(2.0)
+
+
+def test_buckets_with_one_path_share_a_budget(tmp_path, clock):
+    # Two handles on one file stand in for two worker processes
+    path = str(tmp_path / "rl.db")
+    a = SharedTokenBucket("up", rate=1.0, burst=2.0, path=path)
+    b = SharedTokenBucket("up", rate=1.0, burst=2.0, path=path)
+    other = SharedTokenBucket("other", rate=1.0, burst=2.0, path=path)
+    assert a.try_take() == 0.0
+    assert b.try_take() == 0.0
+    assert a.try_take() > 0 and b.try_take() > 0
+    assert other.try_take() == 0.0
+
+
+def test_penalize_drains_every_handle(tmp_path, clock):
+    path = str(tmp_path / "rl.db")
+    a = SharedTokenBucket("up", rate=2.0, burst=10.0, path=path)
+    b = SharedTokenBucket("up", rate=2.0, burst=10.0, path=path)
+    a.penalize(3.0)
+    assert b.try_take() == pytest.approx(3.5)
+    clock.now += 3.5
+    assert b.try_take() == 0.0
+
+
+def test_governor_serves_interactive_before_batch(tmp_path, monkeypatch):
+    monkeypatch.setattr(rate_limit, "_db_path", lambda: str(tmp_path / "rl.db"))
+    gov = Governor("prio", rate=10.0, burst=1.0)
+    gov.acquire(level=rate_limit.BATCH)
+    order = []
+
+    def waiter(level):
+        gov.acquire(level=level)
+        order.append(level)
+
+    threads = [threading.Thread(target=waiter, args=(rate_limit.BATCH,))]
+    threads[0].start()
+    time.sleep(0.02)
+    threads.append(threading.Thread(target=waiter, args=(rate_limit.INTERACTIVE,)))
+    threads[1].start()
+    for t in threads:
+        t.join(5)
+    assert order == [rate_limit.INTERACTIVE, rate_limit.BATCH]
+
+
+def test_governor_gives_up_after_max_wait(tmp_path, monkeypatch):
+    monkeypatch.setattr(rate_limit, "_db_path", lambda: str(tmp_path / "rl.db"))
+    monkeypatch.setitem(rate_limit.MAX_WAIT, rate_limit.INTERACTIVE, 0.05)
+    gov = Governor("slow", rate=0.01, burst=1.0)
+    gov.acquire(level=rate_limit.INTERACTIVE)
+    with pytest.raises(rate_limit.UpstreamThrottled):
+        gov.acquire(level=rate_limit.INTERACTIVE)
+    assert gov._waiting == []
+
+
+def test_call_retries_upstream_429(monkeypatch, tmp_path):
+    monkeypatch.setattr(rate_limit, "ENABLED", True)
+    monkeypatch.setattr(rate_limit, "backoff_delay", lambda attempt: 0.0)
+    monkeypatch.setattr(rate_limit, "_db_path", lambda: str(tmp_path / "rl.db"))
+    monkeypatch.setattr(rate_limit, "_governors", {})
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise RuntimeError("429 Too Many Requests")
+        return "ok"
+
+    assert rate_limit.call("retry-test", flaky) == "ok"
+    assert len(attempts) == 3
+
+    def broken():
+        raise ValueError("bad ticker")
+
+    with pytest.raises(ValueError):
+        rate_limit.call("retry-test", broken)
+
+
+def test_priority_context():
+    assert rate_limit.current_priority() == rate_limit.INTERACTIVE
+    with rate_limit.priority(rate_limit.PREFETCH):
+        assert rate_limit.current_priority() == rate_limit.PREFETCH
+    assert rate_limit.current_priority() == rate_limit.INTERACTIVE
+
+
+def test_queued_async_calls_hold_no_threads(tmp_path, monkeypatch):
+    monkeypatch.setattr(rate_limit, "ENABLED", True)
+    monkeypatch.setattr(rate_limit, "_db_path", lambda: str(tmp_path / "rl.db"))
+    monkeypatch.setattr(rate_limit, "_governors", {})
+    monkeypatch.setenv("RATE_LIMIT_ASYNC-TEST", "0.01,1")
+    monkeypatch.setitem(rate_limit.MAX_WAIT, rate_limit.INTERACTIVE, 1.5)
+
+    async def upstream():
+        return "ok"
+
+    async def main():
+        calls = [asyncio.ensure_future(rate_limit.call_async("async-test", upstream)) for _ in range(60)]
+        await asyncio.sleep(0.1)
+        # Everything but the first call is queued; the default executor must still be free
+        started = time.monotonic()
+        await asyncio.wait_for(asyncio.to_thread(lambda: None), 1.0)
+        unrelated = time.monotonic() - started
+        results = await asyncio.gather(*calls, return_exceptions=True)
+        return unrelated, results
+
+    unrelated, results = asyncio.run(main())
+    assert unrelated < 0.3
+    assert results.count("ok") == 1
+    assert all(isinstance(r, rate_limit.UpstreamThrottled) for r in results if r != "ok")
+    assert rate_limit.governor("async-test")._waiting == []
+
+
+def test_async_waiters_share_the_priority_queue(tmp_path, monkeypatch):
+    monkeypatch.setattr(rate_limit, "_db_path", lambda: str(tmp_path / "rl.db"))
+    gov = Governor("async-prio", rate=10.0, burst=1.0)
+    gov.acquire(level=rate_limit.BATCH)
+    order = []
+
+    async def waiter(level, delay):
+        await asyncio.sleep(delay)
+        await gov.acquire_async(level=level)
+        order.append(level)
+
+    async def main():
+        await asyncio.gather(waiter(rate_limit.BATCH, 0), waiter(rate_limit.INTERACTIVE, 0.02))
+
+    asyncio.run(main())
+    assert order == [rate_limit.INTERACTIVE, rate_limit.BATCH]
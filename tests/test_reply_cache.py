@@ -0,0 +1,65 @@
+from types import SimpleNamespace
+
+import pytest
+
+import routes
+from app import app
+from reply_cache import ReplyCache
+
+META = {"ticker": "TCS.NS", "snapshot": "snap-1"}
+
+
+class FakeGroq:
+    """Replies with how many messages it was sent, so history-conditioned answers are recognisable."""
+
+    def __init__(self):
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, messages, **kwargs):
+        self.calls += 1
+        reply = f"answer from a {len(messages)}-message prompt"
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=reply))])
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    fake = FakeGroq()
+    monkeypatch.setattr(routes, "groq_client", lambda: fake)
+    monkeypatch.setattr(routes, "reply_cache", ReplyCache())
+    monkeypatch.setattr(routes, "build_stock_context", lambda msg: (
+        ("CONTEXT", dict(META)) if "TCS" in msg else ("", {})
+    ))
+    return fake
+
+
+def _session():
+    client = app.test_client()
+    client.get("/")
+    return client
+
+
+def _ask(client, message: str) -> dict:
+    return client.post("/chat", json={"message": message}).get_json()
+
+
+def test_history_conditioned_reply_is_not_shared(llm):
+    a, b = _session(), _session()
+    _ask(a, "hello, I hold some IT shares")
+    from_a = _ask(a, "should I buy TCS")
+    assert "cached" not in from_a
+
+    # b asks the same question on the same snapshot as its first turn
+    from_b = _ask(b, "should I buy TCS")
+    assert "cached" not in from_b
+    assert from_b["reply"] != from_a["reply"]
+    assert llm.calls == 3
+
+
+def test_first_turn_reply_is_shared(llm):
+    a, b = _session(), _session()
+    first = _ask(a, "should I buy TCS")
+    again = _ask(b, "should I buy TCS")
+    assert again["cached"] is True
+    assert again["reply"] == first["reply"]
+    assert llm.calls == 1
@@ -0,0 +1,44 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import genai
+
+
+@pytest.fixture
+def universe(monkeypatch):
+    rng = np.random.default_rng(7)
+    series = {
+        f"T{i:03d}": SimpleNamespace(close=100 * np.exp(np.cumsum(rng.normal(0, 0.02, 260))))
+        for i in range(40)
+    }
+    monkeypatch.setattr(genai, "fetch_bulk_history", lambda tickers, period="1y": {
+        t: series[t] for t in tickers if t in series
+    })
+    return [*series, "MISSING"]
+
+
+def test_screen_inline(universe, monkeypatch):
+    monkeypatch.setattr(genai, "SCREEN_POOL_MIN", 10_000)
+    out = genai.screen_stocks(universe, top_k=5)
+    assert out["screened"] == 40
+    assert out["missing"] == ["MISSING"]
+    scores = [(r["score"], r["confidence"]) for r in out["results"]]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_screen_pool_matches_inline(universe, monkeypatch):
+    monkeypatch.setattr(genai, "SCREEN_POOL_MIN", 10_000)
+    inline = genai.screen_stocks(universe, top_k=5)
+
+    monkeypatch.setattr(genai, "SCREEN_POOL_MIN", 1)
+    monkeypatch.setattr(genai, "SCREEN_WORKERS", 2)
+    monkeypatch.setattr(genai, "_screen_pool", None)
+    try:
+        pooled = genai.screen_stocks(universe, top_k=5)
+        assert genai._screen_pool._mp_context.get_start_method() in ("forkserver", "spawn")
+    finally:
+        if genai._screen_pool is not None:
+            genai._screen_pool.shutdown()
+    assert pooled == inline
@@ -0,0 +1,51 @@
+import datetime as dt
+from zoneinfo import ZoneInfo
+
+import pytest
+
+import history_store
+from history_store import is_stale, seconds_until_refresh
+
+IST = ZoneInfo("Asia/Kolkata")
+NY = ZoneInfo("America/New_York")
+
+
+def _at(day: int, hour: int, minute: int = 0, tz=IST) -> dt.datetime:
+    # October 2026: the 14th is a Wednesday, the 17th a Saturday
+    return dt.datetime(2026, 10, day, hour, minute, tzinfo=tz)
+
+
+@pytest.mark.parametrize("fetched, now, stale", [
+    # Session open: the intraday TTL applies
+    (_at(14, 10, 0), _at(14, 10, 10), False),
+    (_at(14, 10, 0), _at(14, 10, 20), True),
+    # After the close: current once fetched past close + grace
+    (_at(14, 15, 55), _at(14, 18), False),
+    (_at(14, 15, 45), _at(14, 18), True),
+    (_at(14, 11, 0), _at(14, 18), True),
+    # Inside the grace window the previous settle still counts
+    (_at(14, 15, 25), _at(14, 15, 40), False),
+    (_at(14, 15, 25), _at(14, 15, 51), True),
+    # Friday's settled data holds all weekend, until Monday's open
+    (_at(16, 16), _at(17, 12), False),
+    (_at(16, 16), _at(19, 9, 10), False),
+    (_at(16, 16), _at(19, 9, 40), True),
+    (_at(16, 15), _at(17, 12), True),
+])
+def test_nse_staleness(fetched, now, stale):
+    assert is_stale("TCS.NS", fetched.timestamp(), now) is stale
+
+
+def test_us_tickers_follow_new_york_hours():
+    fetched = _at(14, 16, 30, NY)
+    # Settled overnight, then the intraday TTL once New York opens on Thursday
+    assert not is_stale("AAPL", fetched.timestamp(), _at(15, 9, 0, NY))
+    assert is_stale("AAPL", fetched.timestamp(), _at(15, 10, 0, NY))
+    # 10:00 in New York is 19:30 in Mumbai, after the NSE has closed and settled
+    assert not is_stale("TCS.NS", _at(15, 16).timestamp(), _at(15, 10, 0, NY))
+
+
+def test_seconds_until_refresh():
+    assert seconds_until_refresh("TCS.NS", _at(14, 11)) == history_store.INTRADAY_TTL.total_seconds()
+    # Saturday noon to Monday 09:15
+    assert seconds_until_refresh("TCS.NS", _at(17, 12)) == (_at(19, 9, 15) - _at(17, 12)).total_seconds()
@@ -0,0 +1,63 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+from lazy_imports import lazy_import
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _fresh(code: str) -> str:
+    """Run `code` in a new interpreter (this one has numpy loaded) and return its output."""
+    done = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, env=dict(os.environ),
+        capture_output=True, text=True, timeout=60,
+    )
+    assert done.returncode == 0, done.stderr
+    return done.stdout.strip()
+
+
+def test_importing_the_app_leaves_heavy_modules_unloaded():
+    out = _fresh(
+        "import sys, app\n"
+        "print(sorted(m for m in ('numpy', 'pandas', 'yfinance', 'groq') if m in sys.modules))"
+    )
+    assert out == "[]"
+
+
+def test_lazy_module_rebinds_its_owner_on_first_use():
+    out = _fresh(
+        "import sys, types\n"
+        "from lazy_imports import lazy_import\n"
+        "owner = sys.modules['owner'] = types.ModuleType('owner')\n"
+        "owner.np = lazy_import('numpy', 'owner', 'np')\n"
+        "print('numpy' in sys.modules, owner.np.float64(2) * 2, owner.np is sys.modules['numpy'])"
+    )
+    assert out == "False 4.0 True"
+
+
+def test_lazy_import_of_a_loaded_module_is_the_module():
+    assert lazy_import("numpy", __name__, "np") is np
+
+
+def test_threads_start_with_the_first_request_not_at_import(tmp_path):
+    listings = tmp_path / "symbols.csv"
+    listings.write_text("SYMBOL,NAME\nTCS.NS,Tata Consultancy Services\n")
+    env = {
+        "SYMBOL_MASTER_PATH": str(listings),
+        "STARTUP_PREWARM": "1",
+        "STARTUP_PREWARM_DELAY_SEC": "30",
+        "WARM_SNAPSHOT_INTERVAL_SEC": "30",
+        "WARM_SNAPSHOT_PATH": str(tmp_path / "warm.json.gz"),
+    }
+    out = _fresh(
+        "import os, threading\n"
+        f"os.environ.update({env!r})\n"
+        "import app\n"
+        "print(sorted(t.name for t in threading.enumerate()))\n"
+        "app.app.test_client().get('/metrics')\n"
+        "print(sorted(t.name for t in threading.enumerate() if t.name != 'symbol-master'))"
+    )
+    assert out.splitlines() == ["['MainThread']", "['MainThread', 'prewarm', 'warm-snapshot']"]
@@ -0,0 +1,54 @@
+import genai
+from symbol_index import SymbolMaster
+
+LISTINGS = [
+    ("MSFT", "Microsoft Corporation", "Q"),
+    ("MKT", "The Market Company", "N"),
+    ("ZOM", "Zomato Limited", "NSE"),
+    ("DMART", "Avenue Supermarts Limited", "NSE"),
+    ("BRK-A", "Berkshire Hathaway Inc. Class A", "N"),
+    ("BRK-B", "Berkshire Hathaway Inc. Class B", "N"),
+]
+
+
+def test_empty_master_builds_and_finds_nothing():
+    master = SymbolMaster([])
+    assert len(master) == 0
+    assert master.search("apple") == []
+    assert master.best("apple") is None
+    assert master.symbol("AAPL") is None
+
+
+def test_listing_too_short_for_trigrams():
+    master = SymbolMaster([("X", "X", "N")])
+    assert len(master) == 1
+    assert master.symbol("X").ticker == "X"
+    assert master.best("apple") is None
+
+
+def test_symbol_and_name_lookup():
+    master = SymbolMaster(LISTINGS)
+    assert master.symbol("brk.b").ticker == "BRK-B"
+    assert master.best("zomatto", 0.75).ticker == "ZOM"
+    assert master.best("avenue supermarts").ticker == "DMART"
+
+
+def test_best_requires_margin_over_runner_up():
+    master = SymbolMaster(LISTINGS)
+    assert master.best("berkshire hathaway", 0.75, margin=0.15) is None
+
+
+def test_resolve_ticker_without_listing_files(monkeypatch):
+    monkeypatch.setattr(genai, "_symbol_master", None)
+    monkeypatch.setattr(genai, "SYMBOL_MASTER_PATH", "/nonexistent/symbols")
+    assert genai.resolve_ticker("thoughts on the market today", probe=False) is None
+    assert genai.resolve_ticker("BRK-B", probe=False) == "BRK-B"
+    # The empty master is cached, not rebuilt per call
+    assert genai._symbol_master is not None and len(genai._symbol_master) == 0
+
+
+def test_resolve_ticker_never_fuzzy_matches_chat_fragments(monkeypatch):
+    monkeypatch.setattr(genai, "_symbol_master", SymbolMaster(LISTINGS))
+    assert genai.resolve_ticker("the market today", probe=False) is None
+    assert genai.resolve_ticker("good time to invest", probe=False) is None
+    assert genai.resolve_ticker("zomatto", probe=False) == "ZOM"
@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+import os
+import gzip
+import json
+import time
+import base64
+import logging
+import datetime as dt
+import threading
+
+import history_store
+import metrics
+from indicators import IndicatorState
+from lazy_imports import lazy_import
+
+np = lazy_import("numpy", __name__, "np")
+
+# ─────────────────────────────────────────────
+#  WARM-START SNAPSHOT
+#  One gzipped JSON file holding the most recently
+#  refreshed analyses and, per ticker, the indicator
+#  state over its closes before the latest bar. It is
+#  rewritten every few minutes by one worker per host
+#  and read into memory when a worker boots, so a new
+#  worker (or a new host with an empty store) answers
+#  popular tickers straight away. Entries obey the same
+#  freshness rule as the store's warm cache.
+#
+#    python warm_start.py write   (e.g. before baking an image)
+# ─────────────────────────────────────────────
+SNAPSHOT_PATH = os.getenv("WARM_SNAPSHOT_PATH") or os.path.join(
+    os.path.dirname(history_store.DB_PATH), "warm_snapshot.json.gz"
+)
+SNAPSHOT_INTERVAL = float(os.getenv("WARM_SNAPSHOT_INTERVAL_SEC", "300"))
+SNAPSHOT_MAX_TICKERS = int(os.getenv("WARM_SNAPSHOT_MAX_TICKERS", "200"))
+_FORMAT_VERSION = 1
+
+log = logging.getLogger("warm_start")
+
+# ticker -> {"analysis", "stored_at", "state", "bar_date", "bar_close", "state_close"}
+_entries: dict[str, dict] = {}
+
+metrics.register(metrics.Gauge(
+    "aria_warm_snapshot_entries", "Tickers in the warm-start snapshot loaded at boot.", fn=lambda: len(_entries),
+))
+
+
+def _entry(ticker: str, analysis: dict, stored_at: float) -> dict:
+    entry = {"analysis": analysis, "stored_at": stored_at}
+    # Same 1y window live_prices seeds its indicator states from
+    series = history_store.load_series(ticker, history_store.period_start("1y"))
+    if series is not None and len(series) > 1:
+        state = IndicatorState.from_closes(series.close[:-1])
+        entry.update({
+            "state": base64.b64encode(state.to_bytes()).decode(),
+            "bar_date": int(series.dates[-1]),
+            "bar_close": float(series.close[-1]),
+            "state_close": float(series.close[-2]),
+        })
+    return entry
+
+
+def write(path: str = SNAPSHOT_PATH, limit: int = SNAPSHOT_MAX_TICKERS) -> int:
+    """Snapshot the `limit` most recently refreshed analyses; returns how many were written."""
+    entries = {
+        ticker: _entry(ticker, analysis, stored_at)
+        for ticker, analysis, stored_at in history_store.recent_warm("analysis", limit)
+    }
+    body = json.dumps(
+        {"version": _FORMAT_VERSION, "written_at": time.time(), "entries": entries}, separators=(",", ":")
+    ).encode()
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    # Write then rename so a booting worker never reads half a file
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(gzip.compress(body, compresslevel=6))
+    os.replace(tmp, path)
+    return len(entries)
+
+
+def load(path: str = SNAPSHOT_PATH) -> int:
+    global _entries
+    try:
+        with open(path, "rb") as f:
+            data = json.loads(gzip.decompress(f.read()))
+    except FileNotFoundError:
+        return 0
+    except Exception:
+        log.exception("unreadable warm-start snapshot %s", path)
+        return 0
+    if data.get("version") != _FORMAT_VERSION:
+        return 0
+    _entries = data["entries"]
+    return len(_entries)
+
+
+def analysis(ticker: str) -> dict | None:
+    entry = _entries.get(ticker)
+    if entry is None or history_store.is_stale(ticker, entry["stored_at"]):
+        return None
+    return dict(entry["analysis"])
+
+
+def base_state(ticker: str, before: int) -> tuple[IndicatorState, float] | None:
+    """
+    live_prices' base state (closes before day ordinal `before`, plus the last of
+    them) from the snapshot, when `before` is the snapshot's latest bar or the
+    trading day after it. Anything further on may have missed bars, so None.
+    """
+    entry = _entries.get(ticker)
+    if entry is None or "state" not in entry:
+        return None
+    bar_date = entry["bar_date"]
+    if before == bar_date:
+        return IndicatorState.from_bytes(base64.b64decode(entry["state"])), entry["state_close"]
+    if before > bar_date and np.busday_count(dt.date.fromordinal(bar_date), dt.date.fromordinal(before)) == 1:
+        state = IndicatorState.from_bytes(base64.b64decode(entry["state"]))
+        state.update(entry["bar_close"])
+        return state, entry["bar_close"]
+    return None
+
+
+# ─────────────────────────────────────────────
+#  PERIODIC WRITER
+#  Every worker runs the loop; only the one holding
+#  the snapshot's lock file writes, and the lock is
+#  retried each round so another worker takes over
+#  if the owner exits.
+# ─────────────────────────────────────────────
+_writer_started = False
+_lock_file = None
+
+
+def _owns_lock(path: str) -> bool:
+    global _lock_file
+    if _lock_file is not None:
+        return True
+    try:
+        import fcntl
+    except ImportError:
+        return True
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    handle = open(path + ".lock", "w")
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        handle.close()
+        return False
+    _lock_file = handle   # held for the life of the process
+    return True
+
+
+def _write_forever(path: str, interval: float) -> None:
+    while True:
+        time.sleep(interval)
+        if not _owns_lock(path):
+            continue
+        try:
+            started = time.monotonic()
+            count = write(path)
+            log.info("warm snapshot: %d tickers in %.2fs", count, time.monotonic() - started)
+        except Exception:
+            log.exception("warm snapshot write failed")
+
+
+def start_writer(path: str = SNAPSHOT_PATH, interval: float = SNAPSHOT_INTERVAL) -> None:
+    global _writer_started
+    if _writer_started or interval <= 0:
+        return
+    _writer_started = True
+    threading.Thread(target=_write_forever, args=(path, interval), name="warm-snapshot", daemon=True).start()
+
+
+# ─────────────────────────────────────────────
+#  BACKGROUND IMPORT WARM-UP
+#  numpy / pandas / yfinance / groq are imported on first use
+#  so a worker boots fast; shortly after boot this pulls
+#  them in off the request path, so the first cold
+#  analysis or LLM call doesn't pay for them either.
+# ─────────────────────────────────────────────
+PREWARM = os.getenv("STARTUP_PREWARM", "1") != "0"
+PREWARM_DELAY = float(os.getenv("STARTUP_PREWARM_DELAY_SEC", "1.0"))
+PREWARM_MODULES = ("numpy", "pandas", "yfinance", "groq")
+
+
+def _prewarm(hooks) -> None:
+    time.sleep(PREWARM_DELAY)
+    started = time.monotonic()
+    for name in PREWARM_MODULES:
+        try:
+            __import__(name)
+        except Exception:
+            log.exception("prewarm: import %s failed", name)
+    for hook in hooks:
+        try:
+            hook()
+        except Exception:
+            log.warning("prewarm: %s failed", getattr(hook, "__name__", hook), exc_info=True)
+    log.info("prewarm finished in %.2fs", time.monotonic() - started)
+
+
+def prewarm(*hooks) -> None:
+    """Import the deferred modules, then run `hooks` (client constructors), in a daemon thread."""
+    if PREWARM:
+        threading.Thread(target=_prewarm, args=(hooks,), name="prewarm", daemon=True).start()
+
+
+if __name__ == "__main__":
+    import sys
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+    if sys.argv[1:] != ["write"]:
+        sys.exit("usage: python warm_start.py write")
+    print(f"wrote {write()} tickers to {SNAPSHOT_PATH}")